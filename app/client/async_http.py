@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from typing import Iterable, Mapping, Any
+
+import requests
+
+from app.client.http import (
+    DEFAULT_TIMEOUT,
+    RETRYABLE_STATUS_CODES,
+    HttpClientError,
+    send_request,
+)
+from app.client.metrics import MetricsInstance
+
+logger = logging.getLogger(__name__)
+
+
+async def _sleep_with_backoff(backoff_factor: float, attempt: int) -> None:
+    delay = backoff_factor * (2 ** attempt)
+    await asyncio.sleep(delay)
+
+
+async def async_send_request(
+    method: str,
+    url: str,
+    *,
+    headers: Mapping[str, str] | None = None,
+    params: Mapping[str, Any] | None = None,
+    data: Any | None = None,
+    json: Any | None = None,
+    timeout: int | float = DEFAULT_TIMEOUT,
+    retries: int = 2,
+    backoff_factor: float = 0.5,
+    retry_statuses: Iterable[int] = RETRYABLE_STATUS_CODES,
+    raise_for_status: bool = False,
+) -> requests.Response:
+    """Awaitable counterpart of ``send_request``.
+
+    Each attempt runs on a worker thread over the shared pooled sessions, while
+    the retry loop and its backoff sleeps stay on the event loop so waiting
+    requests never hold a thread.
+    """
+    for attempt in range(retries + 1):
+        if attempt > 0:
+            MetricsInstance.record_retry(url)
+        try:
+            response = await asyncio.to_thread(
+                send_request,
+                method,
+                url,
+                headers=headers,
+                params=params,
+                data=data,
+                json=json,
+                timeout=timeout,
+                retries=0,
+                retry_statuses=(),
+            )
+        except HttpClientError as exc:
+            retryable = isinstance(exc.original_error, (requests.Timeout, requests.ConnectionError))
+            if retryable and attempt < retries:
+                logger.warning(
+                    "HTTP %s %s failed (attempt=%s): %s",
+                    method,
+                    url,
+                    attempt + 1,
+                    exc.original_error.__class__.__name__,
+                )
+                await _sleep_with_backoff(backoff_factor, attempt)
+                continue
+            raise
+
+        status = response.status_code
+        if status in retry_statuses and attempt < retries:
+            logger.warning(
+                "Retrying HTTP %s %s (status=%s, attempt=%s)",
+                method,
+                url,
+                status,
+                attempt + 1,
+            )
+            await _sleep_with_backoff(backoff_factor, attempt)
+            continue
+
+        if raise_for_status:
+            try:
+                response.raise_for_status()
+            except requests.HTTPError as exc:
+                raise HttpClientError(
+                    "Server mengembalikan kesalahan. Silakan coba lagi.", exc
+                ) from exc
+
+        return response
+
+    raise HttpClientError("Terjadi kesalahan saat menghubungi server.")
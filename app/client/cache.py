@@ -0,0 +1,212 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app.util import decode_jwt_claims
+
+CACHE_PATH = os.path.join(os.path.expanduser("~/.myxl-cli"), "response-cache.json")
+DEFAULT_MAX_ENTRIES = 256
+
+# Seconds a successful response stays fresh. Paths not listed are never cached.
+CACHE_TTLS = {
+    "api/v8/xl-stores/options/list": 300,
+    "api/v8/xl-stores/options/detail": 60,
+    "api/v8/xl-stores/families": 600,
+    "api/v8/xl-stores/options/search/family-list": 600,
+    "api/v9/xl-stores/options/search": 300,
+    "api/v8/configs/store/segments": 900,
+    "api/v8/personalization/redeemables": 300,
+}
+
+# Anything that changes server state. Checked before CACHE_TTLS so a mutating
+# path can never be served from cache, even if someone adds it above by mistake.
+NO_CACHE_MARKERS = (
+    "settlement",
+    "unsubscribe",
+    "invite",
+    "invitation",
+    "members/remove",
+    "change-member",
+    "bounties",
+    "exchange",
+    "intercept-page",
+    "payment-methods-option",
+    "mark-as-read",
+    "regist",
+)
+
+
+# Read-only paths whose concurrent identical requests may share one call.
+# Anything not listed, writes included, always gets its own request.
+COALESCE_PATHS = frozenset(CACHE_TTLS) | {
+    "api/v8/profile",
+    "api/v8/packages/balance-and-credit",
+    "api/v8/packages/quota-details",
+    "api/v8/notification-non-grouping",
+    "gamification/api/v8/loyalties/tiering/info",
+    "payments/api/v8/pending-payment",
+    "payments/api/v8/transaction-history",
+    "family-hub/api/v8/groups/status",
+    "family-hub/api/v8/members/info",
+    "sharings/api/v8/family-plan/member-info",
+}
+
+
+def is_mutating_path(path: str) -> bool:
+    return any(marker in path for marker in NO_CACHE_MARKERS)
+
+
+def is_cacheable(path: str) -> bool:
+    if is_mutating_path(path):
+        return False
+    return path in CACHE_TTLS
+
+
+def is_coalescable(path: str) -> bool:
+    if is_mutating_path(path):
+        return False
+    return path in COALESCE_PATHS
+
+
+def make_cache_key(id_token: str, path: str, payload: dict) -> str:
+    subscriber = decode_jwt_claims(id_token).get("sub") or hashlib.sha256(
+        (id_token or "").encode("utf-8")
+    ).hexdigest()
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    raw = f"{subscriber}|{path}|{canonical}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LRU + TTL cache of decrypted API responses, backed by a JSON file.
+
+    Entries are stored as JSON text so every hit hands out a fresh object that
+    callers are free to mutate.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.bypasses = 0
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, entry in raw.items():
+            if entry.get("expires_at", 0) > now:
+                self._entries[key] = (entry["expires_at"], entry["path"], entry["body"])
+
+    def get(self, key: str):
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, _, body = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self._dirty = True
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return json.loads(body)
+
+    def set(self, key: str, path: str, value) -> None:
+        ttl = CACHE_TTLS.get(path)
+        if not ttl:
+            return
+        body = json.dumps(value, separators=(",", ":"))
+        with self._lock:
+            self._load()
+            self._entries[key] = (time.time() + ttl, path, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._dirty = True
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self.bypasses += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._loaded = True
+            self._entries.clear()
+            self._dirty = True
+        self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            data = {
+                key: {"expires_at": expires_at, "path": path, "body": body}
+                for key, (expires_at, path, body) in self._entries.items()
+                if expires_at > now
+            }
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Failed to save response cache: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            per_path: dict[str, int] = {}
+            for _, path, _ in self._entries.values():
+                per_path[path] = per_path.get(path, 0) + 1
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "bypasses": self.bypasses,
+                "entries_per_path": per_path,
+            }
+
+
+ResponseCacheInstance = ResponseCache()
+atexit.register(ResponseCacheInstance.flush)
+
+
+def get_cache_stats() -> dict:
+    return ResponseCacheInstance.stats()
+
+
+def clear_cache() -> None:
+    ResponseCacheInstance.clear()
@@ -2,6 +2,7 @@ import base64
 import os
 import json
 import uuid
+from functools import lru_cache
 from app.client.http import send_request, HttpClientError
 from urllib.parse import urlparse
 
@@ -20,10 +21,25 @@ if not BASE_CIAM_URL:
     raise ValueError("BASE_CIAM_URL environment variable not set")
 
 BASIC_AUTH = os.getenv("BASIC_AUTH")
-AX_DEVICE_ID = ax_device_id()
-AX_FP = load_ax_fp()
 UA = os.getenv("UA")
 
+# The fingerprint is read from (or generated into) ax.fp, so it is only
+# loaded once a CIAM request actually needs it.
+@lru_cache(maxsize=None)
+def get_ax_fp() -> str:
+    return load_ax_fp()
+
+@lru_cache(maxsize=None)
+def get_ax_device_id() -> str:
+    return ax_device_id()
+
+def __getattr__(name: str):
+    if name == "AX_FP":
+        return get_ax_fp()
+    if name == "AX_DEVICE_ID":
+        return get_ax_device_id()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 def validate_contact(contact: str) -> bool:
     if not contact.startswith("628") or len(contact) > 14:
         print("Invalid number")
@@ -50,8 +66,8 @@ def get_otp(contact: str) -> str:
     headers = {
         "Accept-Encoding": "gzip, deflate, br",
         "Authorization": f"Basic {BASIC_AUTH}",
-        "Ax-Device-Id": AX_DEVICE_ID,
-        "Ax-Fingerprint": AX_FP,
+        "Ax-Device-Id": get_ax_device_id(),
+        "Ax-Fingerprint": get_ax_fp(),
         "Ax-Request-At": ax_request_at,
         "Ax-Request-Device": "samsung",
         "Ax-Request-Device-Model": "SM-N935F",
@@ -93,8 +109,8 @@ def extend_session(subscriber_id: str) -> str:
     headers = {
         "Accept-Encoding": "gzip, deflate, br",
         "Authorization": f"Basic {BASIC_AUTH}",
-        "Ax-Device-Id": AX_DEVICE_ID,
-        "Ax-Fingerprint": AX_FP,
+        "Ax-Device-Id": get_ax_device_id(),
+        "Ax-Fingerprint": get_ax_fp(),
         "Ax-Request-At": ax_request_at,
         "Ax-Request-Device": "samsung",
         "Ax-Request-Device-Model": "SM-N935F",
@@ -159,8 +175,8 @@ def submit_otp(
         "Accept-Encoding": "gzip, deflate, br",
         "Authorization": f"Basic {BASIC_AUTH}",
         "Ax-Api-Signature": signature,
-        "Ax-Device-Id": AX_DEVICE_ID,
-        "Ax-Fingerprint": AX_FP,
+        "Ax-Device-Id": get_ax_device_id(),
+        "Ax-Fingerprint": get_ax_fp(),
         "Ax-Request-At": ts_header,
         "Ax-Request-Device": "samsung",
         "Ax-Request-Device-Model": "SM-N935F",
@@ -185,7 +201,7 @@ def submit_otp(
         print(f"[Error submit_otp]: {e.user_message}")
         return None
 
-def get_new_token(api_key: str, refresh_token: str, subscriber_id: str) -> str:
+def get_new_token(api_key: str, refresh_token: str, subscriber_id: str, quiet: bool = False) -> str:
     url = BASE_CIAM_URL + "/realms/xl-ciam/protocol/openid-connect/token"
 
     now = datetime.now(timezone(timedelta(hours=7)))
@@ -195,11 +211,11 @@ def get_new_token(api_key: str, refresh_token: str, subscriber_id: str) -> str:
     headers = {
         "Host": BASE_CIAM_URL.replace("https://", ""),
         "ax-request-at": ax_request_at,
-        "ax-device-id": AX_DEVICE_ID,
+        "ax-device-id": get_ax_device_id(),
         "ax-request-id": ax_request_id,
         "ax-request-device": "samsung",
         "ax-request-device-model": "SM-N935F",
-        "ax-fingerprint": AX_FP,
+        "ax-fingerprint": get_ax_fp(),
         "authorization": f"Basic {BASIC_AUTH}",
         "user-agent": UA,
         "ax-substype": "PREPAID",
@@ -211,15 +227,18 @@ def get_new_token(api_key: str, refresh_token: str, subscriber_id: str) -> str:
         "refresh_token": refresh_token
     }
 
-    print("Refreshing token...")
+    if not quiet:
+        print("Refreshing token...")
     try:
         resp = send_request("POST", url, headers=headers, data=data, timeout=30)
     except HttpClientError as e:
-        print(f"Failed to refresh token: {e.user_message}")
+        if not quiet:
+            print(f"Failed to refresh token: {e.user_message}")
         return None
     if resp.status_code == 400:
         if resp.json().get("error_description") != "Session not active":
-            print(f"Failed to refresh token: {resp.status_code} - {resp.text}")
+            if not quiet:
+                print(f"Failed to refresh token: {resp.status_code} - {resp.text}")
             return None
 
         if subscriber_id == "":
@@ -268,11 +287,11 @@ def get_auth_code(tokens: dict, pin: str, msisdn: str):
     headers = {
         "Host": host_header,
         "Ax-Request-At": ax_request_at,
-        "Ax-Device-Id": AX_DEVICE_ID,
+        "Ax-Device-Id": get_ax_device_id(),
         "Ax-Request-Id": ax_request_id,
         "Ax-Request-Device": "samsung",
         "Ax-Request-Device-Model": "SM-N935F",
-        "Ax-Fingerprint": AX_FP,
+        "Ax-Fingerprint": get_ax_fp(),
         "Authorization": f"Bearer {tokens['access_token']}",
         "User-Agent": UA,
         "Ax-Substype": "PREPAID",
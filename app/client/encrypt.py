@@ -3,6 +3,7 @@ import hashlib
 import requests
 import base64
 import json
+import re
 import time
 
 from random import randint
@@ -23,6 +24,7 @@ from app.service.crypto_helper import (
 )
 
 from app.service.crypto_helper import decrypt_xdata as dec_xdata
+from app.service.crypto_helper import decrypt_xdata_into
 from app.service.crypto_helper import encrypt_circle_msisdn as encrypt_msisdn
 from app.service.crypto_helper import decrypt_circle_msisdn as decrypt_msisdn
 
@@ -154,6 +156,29 @@ def decrypt_xdata(
 
     return json.loads(plaintext)
 
+_XDATA_FIELD_RE = re.compile(rb'"xdata"\s*:\s*"')
+_XTIME_FIELD_RE = re.compile(rb'"xtime"\s*:\s*"?(\d+)')
+
+def decrypt_xdata_bytes(
+    api_key: str,
+    body: bytes
+    ) -> dict:
+    """Like decrypt_xdata, but reads the xdata envelope straight from raw response bytes."""
+    xdata_match = _XDATA_FIELD_RE.search(body)
+    xtime_match = _XTIME_FIELD_RE.search(body)
+    if xdata_match is None or xtime_match is None:
+        raise ValueError("Invalid encrypted data format. Expected 'xdata' and 'xtime' fields.")
+
+    # Base64 never contains a quote, so the next one closes the value.
+    start = xdata_match.end()
+    end = body.find(b'"', start)
+    if end == -1:
+        raise ValueError("Invalid encrypted data format. Unterminated 'xdata' field.")
+    with memoryview(body) as view:
+        plaintext = decrypt_xdata_into(view[start:end], int(xtime_match.group(1)))
+
+    return json.loads(plaintext)
+
 def get_x_signature_payment(
         api_key: str,
         access_token: str,
@@ -1,14 +1,25 @@
+import asyncio
+import copy
 import os
 import json
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from app.client.http import send_request, HttpClientError
+from app.client.async_http import async_send_request
+from app.client.cache import ResponseCacheInstance, is_cacheable, is_coalescable, make_cache_key
+from app.client.metrics import MetricsInstance, path_of
+from app.client.settings import ClientSettingsInstance
 
 from datetime import datetime, timezone
 
+from app.client.timing import PHASE_INTERCEPT, PHASE_PACKAGE_DETAIL, phase
 from app.client.encrypt import (
     encryptsign_xdata,
     java_like_timestamp,
     decrypt_xdata,
+    decrypt_xdata_bytes,
     API_KEY,
 )
 
@@ -17,13 +28,14 @@ if not BASE_API_URL:
     raise ValueError("BASE_API_URL environment variable not set")
 UA = os.getenv("UA")
 
-def send_api_request(
+def _build_api_request(
     api_key: str,
     path: str,
     payload_dict: dict,
     id_token: str,
     method: str = "POST",
-):
+) -> tuple[str, dict, str]:
+    started = time.perf_counter()
     encrypted_payload = encryptsign_xdata(
         api_key=api_key,
         method=method,
@@ -31,6 +43,7 @@ def send_api_request(
         id_token=id_token,
         payload=payload_dict
     )
+    MetricsInstance.record_encrypt(path, time.perf_counter() - started)
     
     xtime = int(encrypted_payload["encrypted_body"]["xtime"])
     
@@ -55,23 +68,193 @@ def send_api_request(
     }
 
     url = f"{BASE_API_URL}/{path}"
-    try:
-        resp = send_request("POST", url, headers=headers, data=json.dumps(body), timeout=30)
-    except HttpClientError as exc:
-        print(f"[request error] {exc.user_message}")
-        return {"status": "ERROR", "error": exc.user_message}
-    
-    # print(f"Headers: {json.dumps(headers, indent=2)}")
+    return url, headers, json.dumps(body)
+
+def decode_api_response(api_key: str, resp):
     # print(f"Response body: {resp.text}")
+    path = path_of(resp.url or "")
+    started = time.perf_counter()
+    try:
+        res = decrypt_xdata_bytes(api_key, resp.content)
+        MetricsInstance.record_decrypt(path, time.perf_counter() - started)
+        return res
+    except ValueError:
+        pass
 
     try:
         decrypted_body = decrypt_xdata(api_key, json.loads(resp.text))
         # print(f"Decrypted body: {json.dumps(decrypted_body, indent=2)}")
+        MetricsInstance.record_decrypt(path, time.perf_counter() - started)
         return decrypted_body
     except Exception as e:
-        print("[decrypt err]", e)
+        MetricsInstance.record_decrypt(path, time.perf_counter() - started, ok=False)
+        print(f"[decrypt err] {path} (HTTP {resp.status_code}): {e}")
         return resp.text
 
+def _cache_lookup(path: str, payload_dict: dict, id_token: str, use_cache: bool):
+    """Return (cache_key, cached_response); cache_key is None when not cacheable."""
+    if not is_cacheable(path):
+        return None, None
+    if not use_cache or not ClientSettingsInstance.response_cache:
+        ResponseCacheInstance.record_bypass()
+        return None, None
+
+    cache_key = make_cache_key(id_token, path, payload_dict)
+    cached = ResponseCacheInstance.get(cache_key)
+    MetricsInstance.record_cache(path, cached is not None)
+    return cache_key, cached
+
+def _cache_store(cache_key: str | None, path: str, res) -> None:
+    if cache_key is not None and isinstance(res, dict) and res.get("status") == "SUCCESS":
+        ResponseCacheInstance.set(cache_key, path, res)
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+class _SingleFlight:
+    """Let concurrent identical read requests share one network call.
+
+    The first caller for a key performs the request; callers arriving while it
+    is in flight wait for it and get their own copy of the decrypted result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: dict[str, _Flight] = {}
+        self._async_flights: dict[tuple[int, str], asyncio.Task] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: str, fn):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    async def do_async(self, key: str, coro_fn):
+        # The request runs in its own task that every caller awaits through a
+        # shield, so cancelling one caller (even the first) leaves the others
+        # waiting on it.
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        with self._lock:
+            task = self._async_flights.get(flight_key)
+            leader = task is None
+            if leader:
+                task = loop.create_task(coro_fn())
+                self._async_flights[flight_key] = task
+                task.add_done_callback(lambda done: self._end_async_flight(flight_key, done))
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        result = await asyncio.shield(task)
+        return result if leader else copy.deepcopy(result)
+
+    def _end_async_flight(self, flight_key: tuple[int, str], task: asyncio.Task) -> None:
+        with self._lock:
+            if self._async_flights.get(flight_key) is task:
+                del self._async_flights[flight_key]
+        if not task.cancelled():
+            # Mark retrieved so failures nobody awaited are not logged as unhandled.
+            task.exception()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "shared": self.shared,
+                "in_flight": len(self._flights) + len(self._async_flights),
+            }
+
+_single_flight = _SingleFlight()
+
+def get_single_flight_stats() -> dict:
+    return _single_flight.stats()
+
+def send_api_request(
+    api_key: str,
+    path: str,
+    payload_dict: dict,
+    id_token: str,
+    method: str = "POST",
+    use_cache: bool = True,
+):
+    cache_key, cached = _cache_lookup(path, payload_dict, id_token, use_cache)
+    if cached is not None:
+        return cached
+
+    def fetch():
+        url, headers, body = _build_api_request(api_key, path, payload_dict, id_token, method)
+        try:
+            resp = send_request("POST", url, headers=headers, data=body, timeout=30)
+        except HttpClientError as exc:
+            print(f"[request error] {exc.user_message}")
+            return {"status": "ERROR", "error": exc.user_message}
+
+        res = decode_api_response(api_key, resp)
+        _cache_store(cache_key, path, res)
+        return res
+
+    # use_cache=False asks for a fresh response, e.g. a new token_confirmation,
+    # so it must not be handed a copy of someone else's either.
+    if not use_cache or not is_coalescable(path):
+        return fetch()
+    return _single_flight.do(f"{method}|{make_cache_key(id_token, path, payload_dict)}", fetch)
+
+async def async_send_api_request(
+    api_key: str,
+    path: str,
+    payload_dict: dict,
+    id_token: str,
+    method: str = "POST",
+    use_cache: bool = True,
+):
+    cache_key, cached = _cache_lookup(path, payload_dict, id_token, use_cache)
+    if cached is not None:
+        return cached
+
+    async def fetch():
+        url, headers, body = _build_api_request(api_key, path, payload_dict, id_token, method)
+        try:
+            resp = await async_send_request("POST", url, headers=headers, data=body, timeout=30)
+        except HttpClientError as exc:
+            print(f"[request error] {exc.user_message}")
+            return {"status": "ERROR", "error": exc.user_message}
+
+        res = decode_api_response(api_key, resp)
+        _cache_store(cache_key, path, res)
+        return res
+
+    if not use_cache or not is_coalescable(path):
+        return await fetch()
+    return await _single_flight.do_async(f"{method}|{make_cache_key(id_token, path, payload_dict)}", fetch)
+
 def get_profile(api_key: str, access_token: str, id_token: str) -> dict:
     path = "api/v8/profile"
 
@@ -105,26 +288,25 @@ def get_balance(api_key: str, id_token: str) -> dict:
         print("Error getting balance:", res.get("error", "Unknown error"))
         return None
 
-def get_family(
-    api_key: str,
-    tokens: dict,
+FAMILY_MIGRATION_TYPES = [
+    "NONE",
+    "PRE_TO_PRIOH",
+    "PRIOH_TO_PRIO",
+    "PRIO_TO_PRIOH"
+]
+
+# Winning (migration_type, is_enterprise) per family code, so repeat lookups
+# only need a single round trip.
+_family_probe_winners: dict[str, tuple[str, bool]] = {}
+_family_probe_lock = threading.Lock()
+
+def _family_probes(
     family_code: str,
-    is_enterprise: bool | None = None,
-    migration_type: str | None = None
-) -> dict:
-    print("Fetching package family...")
-    
-    is_enterprise_list = [
-        False,
-        True
-    ]
-
-    migration_type_list = [
-        "NONE",
-        "PRE_TO_PRIOH",
-        "PRIOH_TO_PRIO",
-        "PRIO_TO_PRIOH"
-    ]
+    is_enterprise: bool | None,
+    migration_type: str | None,
+) -> list[tuple[str, bool]]:
+    is_enterprise_list = [False, True]
+    migration_type_list = FAMILY_MIGRATION_TYPES
 
     if is_enterprise is not None:
         is_enterprise_list = [is_enterprise]
@@ -132,45 +314,145 @@ def get_family(
     if migration_type is not None:
         migration_type_list = [migration_type]
 
+    probes = [(mt, ie) for mt in migration_type_list for ie in is_enterprise_list]
+
+    with _family_probe_lock:
+        winner = _family_probe_winners.get(family_code)
+    if winner in probes:
+        probes.remove(winner)
+        probes.insert(0, winner)
+
+    return probes
+
+def _remember_family_probe(family_code: str, probe: tuple[str, bool]) -> None:
+    with _family_probe_lock:
+        _family_probe_winners[family_code] = probe
+
+def _use_parallel_probe(parallel_probe: bool | None) -> bool:
+    if parallel_probe is not None:
+        return parallel_probe
+    return ClientSettingsInstance.parallel_family_probe
+
+def _family_payload(family_code: str, migration_type: str, is_enterprise: bool) -> dict:
+    return {
+        "is_show_tagging_tab": True,
+        "is_dedicated_event": True,
+        "is_transaction_routine": False,
+        "migration_type": migration_type,
+        "package_family_code": family_code,
+        "is_autobuy": False,
+        "is_enterprise": is_enterprise,
+        "is_pdlp": True,
+        "referral_code": "",
+        "is_migration": False,
+        "lang": "en"
+    }
+
+def _valid_family_data(res) -> dict | None:
+    if not isinstance(res, dict) or res.get("status") != "SUCCESS":
+        return None
+
+    family_name = res["data"]["package_family"].get("name", "")
+    if family_name == "":
+        return None
+
+    return res["data"]
+
+def _probe_family_parallel(
+    api_key: str,
+    id_token: str,
+    family_code: str,
+    probes: list[tuple[str, bool]],
+) -> tuple[tuple[str, bool], dict] | tuple[None, None]:
+    """Fire every probe at once and return the first valid answer.
+
+    "First" follows probe priority, not arrival time: a valid answer is taken
+    as soon as every higher-priority probe has come back empty, so the result
+    matches the serial loop. Probes still queued are cancelled and answers
+    still in flight are ignored.
+    """
+    path = "api/v8/xl-stores/options/list"
+    results: list[dict | None] = [None] * len(probes)
+    done = [False] * len(probes)
+
+    executor = ThreadPoolExecutor(max_workers=len(probes))
+    try:
+        futures = {
+            executor.submit(
+                send_api_request,
+                api_key,
+                path,
+                _family_payload(family_code, mt, ie),
+                id_token,
+                "POST",
+            ): idx
+            for idx, (mt, ie) in enumerate(probes)
+        }
+
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                results[idx] = _valid_family_data(future.result())
+            except Exception as e:
+                print(f"Probe is_enterprise={probes[idx][1]}, migration_type={probes[idx][0]} failed: {e}")
+            done[idx] = True
+
+            for rank in range(len(probes)):
+                if not done[rank]:
+                    break
+                if results[rank] is not None:
+                    return probes[rank], results[rank]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return None, None
+
+def get_family(
+    api_key: str,
+    tokens: dict,
+    family_code: str,
+    is_enterprise: bool | None = None,
+    migration_type: str | None = None,
+    parallel_probe: bool | None = None,
+) -> dict:
+    print("Fetching package family...")
+
     path = "api/v8/xl-stores/options/list"
     id_token = tokens.get("id_token")
 
+    probes = _family_probes(family_code, is_enterprise, migration_type)
     family_data = None
 
-    for mt in migration_type_list:
+    if _use_parallel_probe(parallel_probe) and len(probes) > 1:
+        with _family_probe_lock:
+            known_winner = _family_probe_winners.get(family_code)
+        if known_winner == probes[0]:
+            # Known winner first, only fan out when it stopped working.
+            mt, ie = probes[0]
+            res = send_api_request(api_key, path, _family_payload(family_code, mt, ie), id_token, "POST")
+            family_data = _valid_family_data(res)
+            winner = probes[0]
+            probes = probes[1:]
+        if family_data is None:
+            print(f"Probing {len(probes)} variant/migration combinations in parallel...")
+            winner, family_data = _probe_family_parallel(api_key, id_token, family_code, probes)
         if family_data is not None:
-            break
-
-        for ie in is_enterprise_list:
-            if family_data is not None:
-                break
-        
+            mt, ie = winner
+            _remember_family_probe(family_code, winner)
+            print(f"Success with is_enterprise={ie}, migration_type={mt}. Family name: {family_data['package_family']['name']}")
+    else:
+        for mt, ie in probes:
             print(f"Trying is_enterprise={ie}, migration_type={mt}.")
 
-            payload_dict = {
-                "is_show_tagging_tab": True,
-                "is_dedicated_event": True,
-                "is_transaction_routine": False,
-                "migration_type": mt,
-                "package_family_code": family_code,
-                "is_autobuy": False,
-                "is_enterprise": ie,
-                "is_pdlp": True,
-                "referral_code": "",
-                "is_migration": False,
-                "lang": "en"
-            }
-        
+            payload_dict = _family_payload(family_code, mt, ie)
             res = send_api_request(api_key, path, payload_dict, id_token, "POST")
 
-            if res.get("status") != "SUCCESS":
-                continue
-            
-            family_name = res["data"]["package_family"].get("name", "")
-            if family_name != "":
-                family_data = res["data"]
+            family_data = _valid_family_data(res)
+            if family_data is not None:
+                _remember_family_probe(family_code, (mt, ie))
+                family_name = family_data["package_family"]["name"]
                 print(f"Success with is_enterprise={ie}, migration_type={mt}. Family name: {family_name}")
-
+                break
 
     if family_data is None:
         print(f"Failed to get valid family data for {family_code}")
@@ -178,6 +460,49 @@ def get_family(
 
     return family_data
 
+async def async_get_family(
+    api_key: str,
+    tokens: dict,
+    family_code: str,
+    is_enterprise: bool | None = None,
+    migration_type: str | None = None,
+    parallel_probe: bool | None = None,
+) -> dict:
+    path = "api/v8/xl-stores/options/list"
+    id_token = tokens.get("id_token")
+
+    probes = _family_probes(family_code, is_enterprise, migration_type)
+
+    if _use_parallel_probe(parallel_probe) and len(probes) > 1:
+        tasks = [
+            asyncio.create_task(
+                async_send_api_request(api_key, path, _family_payload(family_code, mt, ie), id_token, "POST")
+            )
+            for mt, ie in probes
+        ]
+        try:
+            # Await in priority order so the answer matches the serial loop.
+            for probe, task in zip(probes, tasks):
+                family_data = _valid_family_data(await task)
+                if family_data is not None:
+                    _remember_family_probe(family_code, probe)
+                    return family_data
+        finally:
+            for task in tasks:
+                task.cancel()
+    else:
+        for mt, ie in probes:
+            payload_dict = _family_payload(family_code, mt, ie)
+            res = await async_send_api_request(api_key, path, payload_dict, id_token, "POST")
+
+            family_data = _valid_family_data(res)
+            if family_data is not None:
+                _remember_family_probe(family_code, (mt, ie))
+                return family_data
+
+    print(f"Failed to get valid family data for {family_code}")
+    return None
+
 def get_families(api_key: str, tokens: dict, package_category_code: str) -> dict:
     print("Fetching families...")
     path = "api/v8/xl-stores/families"
@@ -199,16 +524,12 @@ def get_families(api_key: str, tokens: dict, package_category_code: str) -> dict
         return None
     return res["data"]
 
-def get_package(
-    api_key: str,
-    tokens: dict,
+def _package_payload(
     package_option_code: str,
     package_family_code: str = "",
     package_variant_code: str = ""
-    ) -> dict:
-    path = "api/v8/xl-stores/options/detail"
-    
-    raw_payload = {
+) -> dict:
+    return {
         "is_transaction_routine": False,
         "migration_type": "NONE",
         "package_family_code": package_family_code,
@@ -222,9 +543,30 @@ def get_package(
         "is_upsell_pdp": False,
         "package_variant_code": package_variant_code
     }
+
+def get_package(
+    api_key: str,
+    tokens: dict,
+    package_option_code: str,
+    package_family_code: str = "",
+    package_variant_code: str = "",
+    use_cache: bool = True,
+    quiet: bool = False,
+    ) -> dict:
+    """Fetch an option's detail.
+
+    Pass ``use_cache=False`` when the returned ``token_confirmation`` is going
+    to be used for a purchase; the request then bypasses both the response
+    cache and single-flight, so every caller gets its own token.
+    """
+    path = "api/v8/xl-stores/options/detail"
     
-    print("Fetching package...")
-    res = send_api_request(api_key, path, raw_payload, tokens["id_token"], "POST")
+    raw_payload = _package_payload(package_option_code, package_family_code, package_variant_code)
+    
+    if not quiet:
+        print("Fetching package...")
+    with phase(PHASE_PACKAGE_DETAIL):
+        res = send_api_request(api_key, path, raw_payload, tokens["id_token"], "POST", use_cache=use_cache)
     
     if "data" not in res:
         print(json.dumps(res, indent=2))
@@ -233,6 +575,25 @@ def get_package(
         
     return res["data"]
 
+async def async_get_package(
+    api_key: str,
+    tokens: dict,
+    package_option_code: str,
+    package_family_code: str = "",
+    package_variant_code: str = "",
+    use_cache: bool = True,
+    ) -> dict:
+    path = "api/v8/xl-stores/options/detail"
+
+    raw_payload = _package_payload(package_option_code, package_family_code, package_variant_code)
+    res = await async_send_api_request(api_key, path, raw_payload, tokens["id_token"], "POST", use_cache=use_cache)
+
+    if not isinstance(res, dict) or "data" not in res:
+        print("Error getting package:", res.get("error", "Unknown error") if isinstance(res, dict) else res)
+        return None
+
+    return res["data"]
+
 def get_addons(api_key: str, tokens: dict, package_option_code: str) -> dict:
     path = "api/v8/xl-stores/options/addons-pinky-box"
     
@@ -255,7 +616,8 @@ def intercept_page(
     api_key: str,
     tokens: dict,
     option_code: str,
-    is_enterprise: bool = False
+    is_enterprise: bool = False,
+    quiet: bool = False,
 ):
     path = "misc/api/v8/utility/intercept-page"
     
@@ -265,9 +627,13 @@ def intercept_page(
         "package_option_code": option_code
     }
     
-    print("Fetching intercept page...")
-    res = send_api_request(api_key, path, raw_payload, tokens["id_token"], "POST")
+    if not quiet:
+        print("Fetching intercept page...")
+    with phase(PHASE_INTERCEPT):
+        res = send_api_request(api_key, path, raw_payload, tokens["id_token"], "POST")
     
+    if quiet:
+        return
     if "status" in res:
         print(f"Intercept status: {res['status']}")
     else:
@@ -295,6 +661,16 @@ def login_info(
         
     return res["data"]
 
+def _find_option_code(family_data: dict, variant_code: str, option_order: int) -> str | None:
+    option_code = None
+    for variant in family_data["package_variants"]:
+        if variant["package_variant_code"] == variant_code:
+            for option in variant["package_options"]:
+                if option["order"] == option_order:
+                    option_code = option["package_option_code"]
+                    break
+    return option_code
+
 def get_package_details(
     api_key: str,
     tokens: dict,
@@ -302,38 +678,53 @@ def get_package_details(
     variant_code: str,
     option_order: int,
     is_enterprise: bool | None = None,
-    migration_type: str | None = None
+    migration_type: str | None = None,
+    use_cache: bool = True,
 ) -> dict | None:
     family_data = get_family(api_key, tokens, family_code, is_enterprise, migration_type)
     if not family_data:
         print(f"Gagal mengambil data family untuk {family_code}.")
         return None
     
-    package_options = []
-    
-    package_variants = family_data["package_variants"]
-    option_code = None
-    for variant in package_variants:
-        if variant["package_variant_code"] == variant_code:
-            selected_variant = variant
-            package_options = selected_variant["package_options"]
-            for option in package_options:
-                if option["order"] == option_order:
-                    selected_option = option
-                    option_code = selected_option["package_option_code"]
-                    break
-
+    option_code = _find_option_code(family_data, variant_code, option_order)
     if option_code is None:
         print("Gagal menemukan opsi paket yang sesuai.")
         return None
         
-    package_details_data = get_package(api_key, tokens, option_code)
+    package_details_data = get_package(api_key, tokens, option_code, use_cache=use_cache)
     if not package_details_data:
         print("Gagal mengambil detail paket.")
         return None
     
     return package_details_data
 
+async def async_get_package_details(
+    api_key: str,
+    tokens: dict,
+    family_code: str,
+    variant_code: str,
+    option_order: int,
+    is_enterprise: bool | None = None,
+    migration_type: str | None = None,
+    use_cache: bool = True,
+) -> dict | None:
+    family_data = await async_get_family(api_key, tokens, family_code, is_enterprise, migration_type)
+    if not family_data:
+        print(f"Gagal mengambil data family untuk {family_code}.")
+        return None
+
+    option_code = _find_option_code(family_data, variant_code, option_order)
+    if option_code is None:
+        print("Gagal menemukan opsi paket yang sesuai.")
+        return None
+
+    package_details_data = await async_get_package(api_key, tokens, option_code, use_cache=use_cache)
+    if not package_details_data:
+        print("Gagal mengambil detail paket.")
+        return None
+
+    return package_details_data
+
 def get_notifications(
     api_key: str,
     tokens: dict,
@@ -353,6 +744,60 @@ def get_notifications(
         
     return res
 
+async def async_get_notifications(
+    api_key: str,
+    tokens: dict,
+):
+    path = "api/v8/notification-non-grouping"
+
+    raw_payload = {
+        "is_enterprise": False,
+        "lang": "en"
+    }
+
+    res = await async_send_api_request(api_key, path, raw_payload, tokens["id_token"], "POST")
+
+    if isinstance(res, dict) and res.get("status") != "SUCCESS":
+        print("Error getting notifications:", res.get("error", "Unknown error"))
+        return None
+
+    return res
+
+def _quota_details_payload(family_member_id: str = "") -> dict:
+    return {
+        "is_enterprise": False,
+        "lang": "en",
+        "family_member_id": family_member_id
+    }
+
+def get_quota_details(
+    api_key: str,
+    tokens: dict,
+    family_member_id: str = "",
+):
+    path = "api/v8/packages/quota-details"
+
+    res = send_api_request(api_key, path, _quota_details_payload(family_member_id), tokens["id_token"], "POST")
+
+    if not isinstance(res, dict) or res.get("status") != "SUCCESS":
+        return None
+
+    return res["data"]
+
+async def async_get_quota_details(
+    api_key: str,
+    tokens: dict,
+    family_member_id: str = "",
+):
+    path = "api/v8/packages/quota-details"
+
+    res = await async_send_api_request(api_key, path, _quota_details_payload(family_member_id), tokens["id_token"], "POST")
+
+    if not isinstance(res, dict) or res.get("status") != "SUCCESS":
+        return None
+
+    return res["data"]
+
 def get_notification_detail(
     api_key: str,
     tokens: dict,
@@ -1,12 +1,22 @@
 import logging
+import os
+import threading
 import time
+from contextlib import contextmanager
 from dataclasses import dataclass
 from typing import Iterable, Mapping, Any
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from app.client.metrics import MetricsInstance
 
 DEFAULT_TIMEOUT = 30
 RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+DEFAULT_POOL_SIZE = int(os.getenv("MYXL_HTTP_POOL_SIZE", "10"))
+DEFAULT_IDLE_TIMEOUT = float(os.getenv("MYXL_HTTP_IDLE_TIMEOUT", "60"))
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +40,180 @@ def _map_exception_to_message(exc: Exception) -> str:
     return "Terjadi kesalahan saat menghubungi server. Silakan coba lagi."
 
 
+class _SessionPool:
+    """Keep one keep-alive ``requests.Session`` per scheme+host.
+
+    Sessions idle for longer than ``idle_timeout`` seconds are closed on the
+    next lookup, so we never hand out connections the server already dropped.
+    A session is only closed once no request has it checked out; one dropped
+    from the pool mid-request is closed when that request returns.
+    """
+
+    def __init__(self, pool_size: int, idle_timeout: float):
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._sessions: dict[str, requests.Session] = {}
+        self._last_used: dict[str, float] = {}
+        self._in_use: dict[requests.Session, int] = {}
+        self._retired: set[requests.Session] = set()
+        self._evicted_requests = 0
+        self._evicted_connections = 0
+        self._sessions_created = 0
+        self._sessions_evicted = 0
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=0,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _evict_idle(self, now: float) -> None:
+        for host, last_used in list(self._last_used.items()):
+            if now - last_used > self.idle_timeout and not self._in_use.get(self._sessions.get(host)):
+                self._close_host(host)
+
+    def _close_host(self, host: str) -> None:
+        session = self._sessions.pop(host, None)
+        self._last_used.pop(host, None)
+        if session is None:
+            return
+        requests_count, connections_count = _connection_counts(session)
+        self._evicted_requests += requests_count
+        self._evicted_connections += connections_count
+        self._sessions_evicted += 1
+        if self._in_use.get(session):
+            self._retired.add(session)
+            return
+        session.close()
+        logger.info("Closed idle HTTP session for %s", host)
+
+    @contextmanager
+    def checkout(self, url: str):
+        """The session for url, kept open until the block exits."""
+        session = self._acquire(url)
+        try:
+            yield session
+        finally:
+            self._release(url, session)
+
+    def _acquire(self, url: str) -> requests.Session:
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            session = self._sessions.get(host)
+            if session is None:
+                session = self._new_session()
+                self._sessions[host] = session
+                self._sessions_created += 1
+            self._last_used[host] = now
+            self._in_use[session] = self._in_use.get(session, 0) + 1
+            return session
+
+    def _release(self, url: str, session: requests.Session) -> None:
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            count = self._in_use.pop(session, 1) - 1
+            if count > 0:
+                self._in_use[session] = count
+            elif session in self._retired:
+                self._retired.discard(session)
+                session.close()
+                return
+            if self._sessions.get(host) is session:
+                # Idle time counts from the end of the request, not its start.
+                self._last_used[host] = time.monotonic()
+
+    def configure(self, pool_size: int | None = None, idle_timeout: float | None = None) -> None:
+        with self._lock:
+            if idle_timeout is not None:
+                self.idle_timeout = idle_timeout
+            if pool_size is not None and pool_size != self.pool_size:
+                self.pool_size = pool_size
+                # Existing adapters keep their old size, start fresh ones.
+                for host in list(self._sessions):
+                    self._close_host(host)
+
+    def close(self) -> None:
+        with self._lock:
+            for host in list(self._sessions):
+                self._close_host(host)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total_requests = self._evicted_requests
+            total_connections = self._evicted_connections
+            hosts = {}
+            for host, session in self._sessions.items():
+                requests_count, connections_count = _connection_counts(session)
+                total_requests += requests_count
+                total_connections += connections_count
+                hosts[host] = {
+                    "requests": requests_count,
+                    "connections": connections_count,
+                    "idle_seconds": round(time.monotonic() - self._last_used[host], 1),
+                }
+            return {
+                "pool_size": self.pool_size,
+                "idle_timeout": self.idle_timeout,
+                "sessions_created": self._sessions_created,
+                "sessions_evicted": self._sessions_evicted,
+                # A request that did not need a new connection reused a warm one.
+                "hits": max(total_requests - total_connections, 0),
+                "misses": total_connections,
+                "hosts": hosts,
+            }
+
+
+def _connection_counts(session: requests.Session) -> tuple[int, int]:
+    requests_count = 0
+    connections_count = 0
+    seen = set()
+    for adapter in session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_count += pool.num_requests
+            connections_count += pool.num_connections
+    return requests_count, connections_count
+
+
+_session_pool = _SessionPool(DEFAULT_POOL_SIZE, DEFAULT_IDLE_TIMEOUT)
+
+
+def configure_session_pool(pool_size: int | None = None, idle_timeout: float | None = None) -> None:
+    _session_pool.configure(pool_size=pool_size, idle_timeout=idle_timeout)
+
+
+def get_session_pool_stats() -> dict:
+    return _session_pool.stats()
+
+
+def close_sessions() -> None:
+    _session_pool.close()
+
+
+def _request_not_sent(exc: Exception) -> bool:
+    """True when the failure happened before any byte of the request left."""
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(reason, NewConnectionError)
+
+
 def _sleep_with_backoff(backoff_factor: float, attempt: int) -> None:
     delay = backoff_factor * (2 ** attempt)
     time.sleep(delay)
@@ -48,18 +232,31 @@ def send_request(
     backoff_factor: float = 0.5,
     retry_statuses: Iterable[int] = RETRYABLE_STATUS_CODES,
     raise_for_status: bool = False,
+    retry_unsent_only: bool = False,
 ) -> requests.Response:
+    """Send a request over the pooled session for the host.
+
+    Non-idempotent calls (settlements) should pass ``retry_unsent_only=True``:
+    then timeouts and dropped connections are only retried when the request
+    never reached the server, so a slow response can't turn into a second
+    purchase.
+    """
     for attempt in range(retries + 1):
+        if attempt > 0:
+            MetricsInstance.record_retry(url)
+        started = time.perf_counter()
         try:
-            response = requests.request(
-                method,
-                url,
-                headers=headers,
-                params=params,
-                data=data,
-                json=json,
-                timeout=timeout,
-            )
+            with _session_pool.checkout(url) as session:
+                response = session.request(
+                    method,
+                    url,
+                    headers=headers,
+                    params=params,
+                    data=data,
+                    json=json,
+                    timeout=timeout,
+                )
+            MetricsInstance.record_response(url, time.perf_counter() - started, response)
             status = response.status_code
             logger.info("HTTP %s %s -> %s", method, url, status)
 
@@ -79,6 +276,7 @@ def send_request(
 
             return response
         except (requests.Timeout, requests.ConnectionError) as exc:
+            MetricsInstance.record_request(url, time.perf_counter() - started, 0, 0, error=True)
             logger.warning(
                 "HTTP %s %s failed (attempt=%s): %s",
                 method,
@@ -86,11 +284,14 @@ def send_request(
                 attempt + 1,
                 exc.__class__.__name__,
             )
-            if attempt < retries:
+            if attempt < retries and (not retry_unsent_only or _request_not_sent(exc)):
                 _sleep_with_backoff(backoff_factor, attempt)
                 continue
             raise HttpClientError(_map_exception_to_message(exc), exc) from exc
         except requests.RequestException as exc:
+            if not isinstance(exc, requests.HTTPError):
+                # raise_for_status failures were already counted with their response.
+                MetricsInstance.record_request(url, time.perf_counter() - started, 0, 0, error=True)
             logger.warning(
                 "HTTP %s %s error: %s",
                 method,
@@ -0,0 +1,274 @@
+import atexit
+import json
+import os
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+METRICS_PATH = os.path.join(os.path.expanduser("~/.myxl-cli"), "metrics.json")
+
+# Upper bounds (seconds) of the request latency histogram; the last bucket is +Inf.
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+COUNTERS = (
+    "requests",
+    "errors",
+    "retries",
+    "bytes_out",
+    "bytes_in",
+    "latency_seconds",
+    "encrypt_seconds",
+    "encrypts",
+    "decrypt_seconds",
+    "decrypts",
+    "decrypt_errors",
+    "cache_hits",
+    "cache_misses",
+)
+
+
+def path_of(url: str) -> str:
+    return urlsplit(url).path.lstrip("/") or "/"
+
+
+def _body_size(body) -> int:
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    try:
+        return len(body)
+    except TypeError:
+        return 0
+
+
+def _new_entry() -> dict:
+    entry = {name: 0 for name in COUNTERS}
+    entry["latency_buckets"] = [0] * (len(LATENCY_BUCKETS) + 1)
+    return entry
+
+
+def _merge_entry(into: dict, entry: dict) -> None:
+    for name in COUNTERS:
+        into[name] = into.get(name, 0) + entry.get(name, 0)
+    buckets = entry.get("latency_buckets") or []
+    for index, count in enumerate(buckets[:len(into["latency_buckets"])]):
+        into["latency_buckets"][index] += count
+
+
+class MetricsRegistry:
+    """Per-path counters for every API call, kept across runs.
+
+    Only this run's increments live in memory. flush() adds them to the
+    totals in the JSON file, so several runs (or processes, one after the
+    other) accumulate instead of overwriting each other.
+    """
+
+    def __init__(self, path: str = METRICS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending: dict[str, dict] = {}
+
+    def _entry(self, path: str) -> dict:
+        entry = self._pending.get(path)
+        if entry is None:
+            entry = _new_entry()
+            self._pending[path] = entry
+        return entry
+
+    def record_request(self, url: str, seconds: float, bytes_out: int, bytes_in: int, error: bool = False) -> None:
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+        with self._lock:
+            entry = self._entry(path_of(url))
+            entry["requests"] += 1
+            entry["latency_seconds"] += seconds
+            entry["latency_buckets"][bucket] += 1
+            entry["bytes_out"] += bytes_out
+            entry["bytes_in"] += bytes_in
+            if error:
+                entry["errors"] += 1
+
+    def record_response(self, url: str, seconds: float, response) -> None:
+        self.record_request(
+            url,
+            seconds,
+            _body_size(getattr(response.request, "body", None)),
+            len(response.content or b""),
+        )
+
+    def record_retry(self, url: str) -> None:
+        with self._lock:
+            self._entry(path_of(url))["retries"] += 1
+
+    def record_encrypt(self, path: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._entry(path)
+            entry["encrypts"] += 1
+            entry["encrypt_seconds"] += seconds
+
+    def record_decrypt(self, path: str, seconds: float, ok: bool = True) -> None:
+        with self._lock:
+            entry = self._entry(path)
+            entry["decrypts"] += 1
+            entry["decrypt_seconds"] += seconds
+            if not ok:
+                entry["decrypt_errors"] += 1
+
+    def record_cache(self, path: str, hit: bool) -> None:
+        with self._lock:
+            self._entry(path)["cache_hits" if hit else "cache_misses"] += 1
+
+    @contextmanager
+    def _file_lock(self):
+        """Serialize read-modify-write of the totals file across processes."""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_totals(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {"paths": {}}
+        if not isinstance(data, dict) or not isinstance(data.get("paths"), dict):
+            return {"paths": {}}
+        return data
+
+    def snapshot(self) -> dict[str, dict]:
+        """Totals per path: what is on disk plus this run's increments."""
+        totals = {}
+        for path, entry in self._load_totals()["paths"].items():
+            totals[path] = _new_entry()
+            _merge_entry(totals[path], entry)
+        with self._lock:
+            for path, entry in self._pending.items():
+                _merge_entry(totals.setdefault(path, _new_entry()), entry)
+        return totals
+
+    def flush(self) -> bool:
+        """Persist this run's increments; False when there was nothing to save."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return False
+        try:
+            # Another process exiting at the same time must not overwrite
+            # the totals between our load and replace.
+            with self._file_lock():
+                data = self._load_totals()
+                for path, entry in pending.items():
+                    _merge_entry(data["paths"].setdefault(path, _new_entry()), entry)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Failed to save metrics: {e}")
+        return True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._pending = {}
+        try:
+            with self._file_lock():
+                os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _prometheus_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+PROMETHEUS_COUNTERS = (
+    ("myxl_api_requests_total", "requests", "HTTP requests sent, retries included."),
+    ("myxl_api_request_errors_total", "errors", "Requests that failed without a response."),
+    ("myxl_api_retries_total", "retries", "Requests sent again after a failure or retryable status."),
+    ("myxl_api_request_bytes_total", "bytes_out", "Request body bytes sent."),
+    ("myxl_api_response_bytes_total", "bytes_in", "Response body bytes received."),
+    ("myxl_api_encrypt_seconds_total", "encrypt_seconds", "Time spent encrypting and signing payloads."),
+    ("myxl_api_decrypt_seconds_total", "decrypt_seconds", "Time spent decrypting responses."),
+    ("myxl_api_decrypt_errors_total", "decrypt_errors", "Responses that could not be decrypted."),
+    ("myxl_api_cache_hits_total", "cache_hits", "Responses served from the response cache."),
+    ("myxl_api_cache_misses_total", "cache_misses", "Cacheable requests that missed the response cache."),
+)
+
+
+def render_prometheus(totals: dict[str, dict]) -> str:
+    lines = []
+    paths = sorted(totals)
+    for metric, key, help_text in PROMETHEUS_COUNTERS:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for path in paths:
+            lines.append(f'{metric}{{path="{_prometheus_label(path)}"}} {totals[path][key]}')
+
+    metric = "myxl_api_request_duration_seconds"
+    lines.append(f"# HELP {metric} Latency of one HTTP request.")
+    lines.append(f"# TYPE {metric} histogram")
+    for path in paths:
+        label = _prometheus_label(path)
+        entry = totals[path]
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), entry["latency_buckets"]):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{path="{label}",le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_sum{{path="{label}"}} {entry["latency_seconds"]}')
+        lines.append(f'{metric}_count{{path="{label}"}} {entry["requests"]}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus_textfile(path: str, totals: dict[str, dict] | None = None) -> bool:
+    """Write totals for the node exporter textfile collector (atomically)."""
+    totals = MetricsInstance.snapshot() if totals is None else totals
+    try:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(render_prometheus(totals))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Failed to write Prometheus textfile: {e}")
+        return False
+    return True
+
+
+MetricsInstance = MetricsRegistry()
+
+
+def _flush_at_exit() -> None:
+    if not MetricsInstance.flush():
+        return
+    from app.service.config import load_config
+
+    try:
+        textfile = load_config().get("metrics_textfile", "")
+    except (OSError, ValueError):
+        return
+    if textfile:
+        write_prometheus_textfile(os.path.expanduser(textfile))
+
+
+atexit.register(_flush_at_exit)
+
+
+def get_metrics() -> dict[str, dict]:
+    return MetricsInstance.snapshot()
+
+
+def reset_metrics() -> None:
+    MetricsInstance.reset()
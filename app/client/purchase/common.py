@@ -1,16 +1,30 @@
-import os, json
-from app.client.engsel import send_api_request
+import os, json, time, threading, contextvars
+from app.client.engsel import intercept_page, send_api_request
+from app.client.timing import PHASE_PAYMENT_METHODS, phase
+from app.type_dict import PaymentItem
 
 BASE_API_URL = os.getenv("BASE_API_URL")
 AX_FP = os.getenv("AX_FP")
 UA = os.getenv("UA")
 
-def get_payment_methods(
+# How long a token_payment from payment-methods-option is trusted before it
+# is fetched again. The server documents neither its lifetime nor an error
+# code for an expired one, so a rejected settlement can't be told apart and
+# is never retried; instead the window is kept short, covering a user
+# confirming a purchase but not a token left waiting.
+PREPARED_PAYMENT_TTL = 30
+# How long a settlement waits for a pre-arm still in flight before it
+# fetches its own token.
+PREARM_WAIT_SECONDS = 10
+
+def fetch_payment_methods(
     api_key: str,
     tokens: dict,
     token_confirmation: str,
     payment_target: str,
-):
+    quiet: bool = False,
+) -> dict:
+    """The raw payment-methods-option response, failures included."""
     payment_path = "payments/api/v8/payment-methods-option"
     payment_payload = {
         "payment_type": "PURCHASE",
@@ -21,10 +35,131 @@ def get_payment_methods(
         "token_confirmation": token_confirmation
     }
     
-    payment_res = send_api_request(api_key, payment_path, payment_payload, tokens["id_token"], "POST")
-    if payment_res["status"] != "SUCCESS":
+    with phase(PHASE_PAYMENT_METHODS):
+        payment_res = send_api_request(api_key, payment_path, payment_payload, tokens["id_token"], "POST")
+    if not isinstance(payment_res, dict):
+        payment_res = {"status": "FAILED", "message": str(payment_res)}
+    if payment_res.get("status") != "SUCCESS" and not quiet:
         print("Failed to fetch payment methods.")
         print(f"Error: {payment_res}")
+    return payment_res
+
+def get_payment_methods(
+    api_key: str,
+    tokens: dict,
+    token_confirmation: str,
+    payment_target: str,
+    quiet: bool = False,
+):
+    payment_res = fetch_payment_methods(api_key, tokens, token_confirmation, payment_target, quiet=quiet)
+    if payment_res.get("status") != "SUCCESS":
         return None
 
     return payment_res["data"]
+
+
+def prepare_payment(
+    api_key: str,
+    tokens: dict,
+    items: list[PaymentItem],
+    token_confirmation_idx: int = 0,
+    quiet: bool = False,
+) -> dict:
+    """Run intercept-page and payment-methods-option ahead of a settlement.
+
+    The result can be passed to a settlement as ``prepared_payment`` so the
+    settlement itself is a single round trip. When payment-methods-option
+    fails, the server's response is returned as is (status != SUCCESS).
+    """
+    payment_target = items[token_confirmation_idx]["item_code"]
+    token_confirmation = items[token_confirmation_idx]["token_confirmation"]
+
+    intercept_page(api_key, tokens, items[0]["item_code"], False, quiet=quiet)
+    if not quiet:
+        print("Getting payment methods...")
+    payment_res = fetch_payment_methods(api_key, tokens, token_confirmation, payment_target, quiet=quiet)
+    if payment_res.get("status") != "SUCCESS":
+        return payment_res
+
+    payment_data = payment_res["data"]
+    return {
+        "status": "SUCCESS",
+        "token_payment": payment_data["token_payment"],
+        "timestamp": payment_data["timestamp"],
+        "payment_target": payment_target,
+        "token_confirmation": token_confirmation,
+        "id_token": tokens["id_token"],
+        "prepared_at": time.monotonic(),
+    }
+
+def is_prepared_payment_usable(
+    prepared: dict | None,
+    tokens: dict,
+    items: list[PaymentItem],
+    token_confirmation_idx: int = 0,
+    ttl: float = PREPARED_PAYMENT_TTL,
+) -> bool:
+    if not prepared or prepared.get("status") != "SUCCESS":
+        return False
+    item = items[token_confirmation_idx]
+    return (
+        prepared["payment_target"] == item["item_code"]
+        and prepared["token_confirmation"] == item["token_confirmation"]
+        and prepared["id_token"] == tokens["id_token"]
+        and time.monotonic() - prepared["prepared_at"] < ttl
+    )
+
+def resolve_payment_token(
+    api_key: str,
+    tokens: dict,
+    items: list[PaymentItem],
+    token_confirmation_idx: int = 0,
+    prepared_payment: dict | None = None,
+    quiet: bool = False,
+) -> dict:
+    """The prepared payment when still usable, otherwise a freshly fetched
+    one (or the server's response when fetching it failed)."""
+    if is_prepared_payment_usable(prepared_payment, tokens, items, token_confirmation_idx):
+        return prepared_payment
+    return prepare_payment(api_key, tokens, items, token_confirmation_idx, quiet=quiet)
+
+class PaymentPreArm:
+    """Fetches a payment token in the background while the user decides.
+
+    The token is handed out once; settlements check it with
+    is_prepared_payment_usable and fetch a new one when it went stale.
+    """
+
+    def __init__(self, api_key: str, tokens: dict, items: list[PaymentItem], token_confirmation_idx: int = 0):
+        self.api_key = api_key
+        self.tokens = tokens
+        # Copy so later changes to the caller's list (decoys) don't race the worker.
+        self.items = list(items)
+        self.token_confirmation_idx = token_confirmation_idx
+        self._payment = None
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self) -> "PaymentPreArm":
+        # Carry the caller's context so the pre-arm shows up in its purchase trace.
+        context = contextvars.copy_context()
+        self._thread = threading.Thread(target=context.run, args=(self._run,), name="payment-prearm", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self._payment = prepare_payment(
+                self.api_key, self.tokens, self.items, self.token_confirmation_idx, quiet=True
+            )
+        except Exception:
+            self._payment = None
+        finally:
+            self._done.set()
+
+    def take(self, timeout: float = PREARM_WAIT_SECONDS) -> dict | None:
+        if self._thread is None:
+            return None
+        self._done.wait(timeout)
+        payment, self._payment = self._payment, None
+        return payment
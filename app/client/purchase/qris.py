@@ -1,13 +1,12 @@
-from datetime import datetime, timezone, timedelta
-import json
-import uuid
 import base64
 import qrcode
 
 import time
-import requests
-from app.client.engsel import *
-from app.client.encrypt import API_KEY, decrypt_xdata, encryptsign_xdata, java_like_timestamp, get_x_signature_payment
+from app.client.engsel import send_api_request
+from app.client.encrypt import get_x_signature_payment
+from app.client.purchase.common import resolve_payment_token
+from app.client.timing import PHASE_SIGNING, phase
+from app.client.purchase.settlement import payment_targets_of, resolve_amount, send_settlement
 from app.type_dict import PaymentItem
 
 def settlement_qris(
@@ -21,60 +20,23 @@ def settlement_qris(
     amount_idx: int = -1,
     topup_number: str = "",
     stage_token: str = "",
+    prepared_payment: dict | None = None,
 ):  
     # Sanity check
     if overwrite_amount == -1 and not ask_overwrite:
         print("Either ask_overwrite must be True or overwrite_amount must be set.")
         return None
 
-    token_confirmation = items[token_confirmation_idx]["token_confirmation"]
-    payment_targets = ""
-    for item in items:
-        if payment_targets != "":
-            payment_targets += ";"
-        payment_targets += item["item_code"]
-
-    amount_int = 0
-    
-    # Determine amount to use
-    if overwrite_amount != -1:
-        amount_int = overwrite_amount
-    elif amount_idx == -1:
-        amount_int = items[amount_idx]["item_price"]
-
-    # If Overwrite
-    if ask_overwrite:
-        print(f"Total amount is {amount_int}.\nEnter new amount if you need to overwrite.")
-        amount_str = input("Press enter to ignore & use default amount: ")
-        if amount_str != "":
-            try:
-                amount_int = int(amount_str)
-            except ValueError:
-                print("Invalid overwrite input, using original price.")
-                # return None
+    payment_targets = payment_targets_of(items)
+    amount_int = resolve_amount(items, ask_overwrite, overwrite_amount, amount_idx)
     
-    intercept_page(api_key, tokens, items[0]["item_code"], False)
-    
-    # Get payment methods
-    payment_path = "payments/api/v8/payment-methods-option"
-    payment_payload = {
-        "payment_type": "PURCHASE",
-        "is_enterprise": False,
-        "payment_target": items[token_confirmation_idx]["item_code"],
-        "lang": "en",
-        "is_referral": False,
-        "token_confirmation": token_confirmation
-    }
-    
-    print("Getting payment methods...")
-    payment_res = send_api_request(api_key, payment_path, payment_payload, tokens["id_token"], "POST")
-    if payment_res["status"] != "SUCCESS":
-        print("Failed to fetch payment methods.")
-        print(f"Error: {payment_res}")
+    payment = resolve_payment_token(
+        api_key, tokens, items, token_confirmation_idx, prepared_payment
+    )
+    if payment.get("status") != "SUCCESS":
         return None
-    
-    token_payment = payment_res["data"]["token_payment"]
-    ts_to_sign = payment_res["data"]["timestamp"]
+    token_payment = payment["token_payment"]
+    ts_to_sign = payment["timestamp"]
     
     # Settlement request
     path = "payments/api/v8/settlement-multipayment/qris"
@@ -129,62 +91,31 @@ def settlement_qris(
         "timestamp": int(time.time()),
     }
     
-    encrypted_payload = encryptsign_xdata(
-        api_key=api_key,
-        method="POST",
-        path=path,
-        id_token=tokens["id_token"],
-        payload=settlement_payload
-    )
-    
-    xtime = int(encrypted_payload["encrypted_body"]["xtime"])
-    sig_time_sec = (xtime // 1000)
-    x_requested_at = datetime.fromtimestamp(sig_time_sec, tz=timezone.utc).astimezone()
-    settlement_payload["timestamp"] = ts_to_sign
+    with phase(PHASE_SIGNING):
+        x_sig = get_x_signature_payment(
+                api_key,
+                tokens["access_token"],
+                ts_to_sign,
+                payment_targets,
+                token_payment,
+                "QRIS",
+                payment_for,
+                path
+            )
     
-    body = encrypted_payload["encrypted_body"]
-    x_sig = get_x_signature_payment(
-            api_key,
-            tokens["access_token"],
-            ts_to_sign,
-            payment_targets,
-            token_payment,
-            "QRIS",
-            payment_for,
-            path
-        )
-    
-    headers = {
-        "host": BASE_API_URL.replace("https://", ""),
-        "content-type": "application/json; charset=utf-8",
-        "user-agent": UA,
-        "x-api-key": API_KEY,
-        "authorization": f"Bearer {tokens['id_token']}",
-        "x-hv": "v3",
-        "x-signature-time": str(sig_time_sec),
-        "x-signature": x_sig,
-        "x-request-id": str(uuid.uuid4()),
-        "x-request-at": java_like_timestamp(x_requested_at),
-        "x-version-app": "8.9.0",
-    }
-    
-    url = f"{BASE_API_URL}/{path}"
     print("Sending settlement request...")
-    resp = requests.post(url, headers=headers, data=json.dumps(body), timeout=30)
+    decrypted_body = send_settlement(api_key, tokens, path, settlement_payload, x_sig)
+    if not isinstance(decrypted_body, dict):
+        return decrypted_body
+
+    if decrypted_body.get("status") != "SUCCESS":
+        print("Failed to initiate settlement.")
+        print(f"Error: {decrypted_body}")
+        return None
+    
+    transaction_id = decrypted_body["data"]["transaction_code"]
     
-    try:
-        decrypted_body = decrypt_xdata(api_key, json.loads(resp.text))
-        if decrypted_body["status"] != "SUCCESS":
-            print("Failed to initiate settlement.")
-            print(f"Error: {decrypted_body}")
-            return None
-        
-        transaction_id = decrypted_body["data"]["transaction_code"]
-        
-        return transaction_id
-    except Exception as e:
-        print("[decrypt err]", e)
-        return resp.text
+    return transaction_id
 
 def get_qris_code(
     api_key: str,
@@ -218,6 +149,7 @@ def show_qris_payment(
     amount_idx: int = -1,
     topup_number: str = "",
     stage_token: str = "",
+    prepared_payment: dict | None = None,
 ):  
     transaction_id = settlement_qris(
         api_key,
@@ -229,7 +161,8 @@ def show_qris_payment(
         token_confirmation_idx,
         amount_idx,
         topup_number,
-        stage_token
+        stage_token,
+        prepared_payment=prepared_payment,
     )
     
     if not transaction_id:
@@ -1,25 +1,13 @@
-import os
-import json
-import uuid
-import requests
+from datetime import datetime
 
-from datetime import datetime, timezone
-
-from app.client.engsel import BASE_API_URL, UA
 from app.client.encrypt import (
-    API_KEY,
     build_encrypted_field,
-    decrypt_xdata,
-    encryptsign_xdata,
     get_x_signature_loyalty,
-    java_like_timestamp,
     get_x_signature_bounty,
     get_x_signature_bounty_allotment,
 )
-
-BASE_API_URL = os.getenv("BASE_API_URL")
-AX_FP = os.getenv("AX_FP")
-UA = os.getenv("UA")
+from app.client.timing import PHASE_SIGNING, phase
+from app.client.purchase.settlement import send_settlement
 
 def settlement_bounty(
     api_key: str,
@@ -103,60 +91,27 @@ def settlement_bounty(
         }]
     }
         
-    encrypted_payload = encryptsign_xdata(
-        api_key=api_key,
-        method="POST",
-        path=path,
-        id_token=tokens["id_token"],
-        payload=settlement_payload
-    )
-    
-    xtime = int(encrypted_payload["encrypted_body"]["xtime"])
-    sig_time_sec = (xtime // 1000)
-    x_requested_at = datetime.fromtimestamp(sig_time_sec, tz=timezone.utc).astimezone()
-    settlement_payload["timestamp"] = ts_to_sign
-    
-    body = encrypted_payload["encrypted_body"]
-        
-    x_sig = get_x_signature_bounty(
-        api_key=api_key,
-        access_token=tokens["access_token"],
-        sig_time_sec=ts_to_sign,
-        package_code=payment_target,
-        token_payment=token_confirmation
-    )
-    
-    headers = {
-        "host": BASE_API_URL.replace("https://", ""),
-        "content-type": "application/json; charset=utf-8",
-        "user-agent": UA,
-        "x-api-key": API_KEY,
-        "authorization": f"Bearer {tokens['id_token']}",
-        "x-hv": "v3",
-        "x-signature-time": str(sig_time_sec),
-        "x-signature": x_sig,
-        "x-request-id": str(uuid.uuid4()),
-        "x-request-at": java_like_timestamp(x_requested_at),
-        "x-version-app": "8.9.0",
-    }
+    with phase(PHASE_SIGNING):
+        x_sig = get_x_signature_bounty(
+            api_key=api_key,
+            access_token=tokens["access_token"],
+            sig_time_sec=ts_to_sign,
+            package_code=payment_target,
+            token_payment=token_confirmation
+        )
     
-    url = f"{BASE_API_URL}/{path}"
     print("Sending bounty request...")
-    resp = requests.post(url, headers=headers, data=json.dumps(body), timeout=30)
-    
-    try:
-        decrypted_body = decrypt_xdata(api_key, json.loads(resp.text))
-        if decrypted_body["status"] != "SUCCESS":
-            print("Failed to claim bounty.")
-            print(f"Error: {decrypted_body}")
-            return None
-        
-        print(decrypted_body)
-        
+    decrypted_body = send_settlement(api_key, tokens, path, settlement_payload, x_sig)
+    if not isinstance(decrypted_body, dict):
         return decrypted_body
-    except Exception as e:
-        print("[decrypt err]", e)
-        return resp.text
+    if decrypted_body.get("status") != "SUCCESS":
+        print("Failed to claim bounty.")
+        print(f"Error: {decrypted_body}")
+        return None
+    
+    print(decrypted_body)
+    
+    return decrypted_body
 
 def settlement_loyalty(
     api_key: str,
@@ -180,60 +135,27 @@ def settlement_loyalty(
         "token_confirmation": token_confirmation
     }
 
-    encrypted_payload = encryptsign_xdata(
-        api_key=api_key,
-        method="POST",
-        path=path,
-        id_token=tokens["id_token"],
-        payload=settlement_payload
-    )
+    with phase(PHASE_SIGNING):
+        x_sig = get_x_signature_loyalty(
+            api_key=api_key,
+            sig_time_sec=ts_to_sign,
+            package_code=payment_target,
+            token_confirmation=token_confirmation,
+            path=path
+        )
     
-    xtime = int(encrypted_payload["encrypted_body"]["xtime"])
-    sig_time_sec = (xtime // 1000)
-    x_requested_at = datetime.fromtimestamp(sig_time_sec, tz=timezone.utc).astimezone()
-    settlement_payload["timestamp"] = ts_to_sign
-    
-    body = encrypted_payload["encrypted_body"]
-
-    x_sig = get_x_signature_loyalty(
-        api_key=api_key,
-        sig_time_sec=ts_to_sign,
-        package_code=payment_target,
-        token_confirmation=token_confirmation,
-        path=path
-    )
-
-    headers = {
-        "host": BASE_API_URL.replace("https://", ""),
-        "content-type": "application/json; charset=utf-8",
-        "user-agent": UA,
-        "x-api-key": API_KEY,
-        "authorization": f"Bearer {tokens['id_token']}",
-        "x-hv": "v3",
-        "x-signature-time": str(sig_time_sec),
-        "x-signature": x_sig,
-        "x-request-id": str(uuid.uuid4()),
-        "x-request-at": java_like_timestamp(x_requested_at),
-        "x-version-app": "8.9.0",
-    }
-
-    url = f"{BASE_API_URL}/{path}"
     print("Sending loyalty request...")
-    resp = requests.post(url, headers=headers, data=json.dumps(body), timeout=30)
-    
-    try:
-        decrypted_body = decrypt_xdata(api_key, json.loads(resp.text))
-        if decrypted_body["status"] != "SUCCESS":
-            print("Failed purchase.")
-            print(f"Error: {decrypted_body}")
-            return None
-        
-        print(decrypted_body)
-        
+    decrypted_body = send_settlement(api_key, tokens, path, settlement_payload, x_sig)
+    if not isinstance(decrypted_body, dict):
         return decrypted_body
-    except Exception as e:
-        print("[decrypt err]", e)
-        return resp.text
+    if decrypted_body.get("status") != "SUCCESS":
+        print("Failed purchase.")
+        print(f"Error: {decrypted_body}")
+        return None
+    
+    print(decrypted_body)
+    
+    return decrypted_body
 
 def bounty_allotment(
     api_key: str,
@@ -256,58 +178,25 @@ def bounty_allotment(
         "token_confirmation": token_confirmation,
     }
     
-    encrypted_payload = encryptsign_xdata(
-        api_key=api_key,
-        method="POST",
-        path=path,
-        id_token=tokens["id_token"],
-        payload=settlement_payload
-    )
-    
-    xtime = int(encrypted_payload["encrypted_body"]["xtime"])
-    sig_time_sec = (xtime // 1000)
-    x_requested_at = datetime.fromtimestamp(sig_time_sec, tz=timezone.utc).astimezone()
-    settlement_payload["timestamp"] = ts_to_sign
-    
-    body = encrypted_payload["encrypted_body"]
+    with phase(PHASE_SIGNING):
+        x_sig = get_x_signature_bounty_allotment(
+            api_key=api_key,
+            sig_time_sec=ts_to_sign,
+            package_code=item_code,
+            token_confirmation=token_confirmation,
+            destination_msisdn=destination_msisdn,
+            path=path
+        )
     
-    x_sig = get_x_signature_bounty_allotment(
-        api_key=api_key,
-        sig_time_sec=ts_to_sign,
-        package_code=item_code,
-        token_confirmation=token_confirmation,
-        destination_msisdn=destination_msisdn,
-        path=path
-    )
-    
-    headers = {
-        "host": BASE_API_URL.replace("https://", ""),
-        "content-type": "application/json; charset=utf-8",
-        "user-agent": UA,
-        "x-api-key": API_KEY,
-        "authorization": f"Bearer {tokens['id_token']}",
-        "x-hv": "v3",
-        "x-signature-time": str(sig_time_sec),
-        "x-signature": x_sig,
-        "x-request-id": str(uuid.uuid4()),
-        "x-request-at": java_like_timestamp(x_requested_at),
-        "x-version-app": "8.9.0",
-    }
-    
-    url = f"{BASE_API_URL}/{path}"
     print("Sending bounty request...")
-    resp = requests.post(url, headers=headers, data=json.dumps(body), timeout=30)
-    
-    try:
-        decrypted_body = decrypt_xdata(api_key, json.loads(resp.text))
-        if decrypted_body["status"] != "SUCCESS":
-            print("Failed to claim bounty.")
-            print(f"Error: {decrypted_body}")
-            return None
-        
-        print(decrypted_body)
-        
+    decrypted_body = send_settlement(api_key, tokens, path, settlement_payload, x_sig)
+    if not isinstance(decrypted_body, dict):
         return decrypted_body
-    except Exception as e:
-        print("[decrypt err]", e)
-        return resp.text
+    if decrypted_body.get("status") != "SUCCESS":
+        print("Failed to claim bounty.")
+        print(f"Error: {decrypted_body}")
+        return None
+    
+    print(decrypted_body)
+    
+    return decrypted_body
@@ -0,0 +1,121 @@
+"""Shared transport for every settlement request.
+
+Each payment method builds its own payload and x-signature; this module
+encrypts, signs and sends it over the pooled session from app.client.http
+and decodes the reply. Settlements are not idempotent, so only 429s and
+failures that provably never reached the server are retried.
+"""
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+
+from app.client.encrypt import API_KEY, encryptsign_xdata, java_like_timestamp
+from app.client.engsel import BASE_API_URL, UA, decode_api_response
+from app.client.http import HttpClientError, send_request
+from app.client.metrics import MetricsInstance
+from app.client.timing import (
+    PHASE_DECRYPT,
+    PHASE_SETTLEMENT,
+    PHASE_SIGNING,
+    note_settlement_status,
+    phase,
+)
+from app.type_dict import PaymentItem
+
+SETTLEMENT_TIMEOUT = 30
+SETTLEMENT_RETRY_STATUSES = frozenset({429})
+
+
+def payment_targets_of(items: list[PaymentItem]) -> str:
+    return ";".join(item["item_code"] for item in items)
+
+
+def resolve_amount(
+    items: list[PaymentItem],
+    ask_overwrite: bool,
+    overwrite_amount: int = -1,
+    amount_idx: int = -1,
+) -> int:
+    amount_int = 0
+
+    # Determine amount to use
+    if overwrite_amount != -1:
+        amount_int = overwrite_amount
+    elif amount_idx == -1:
+        amount_int = items[amount_idx]["item_price"]
+
+    # If Overwrite
+    if ask_overwrite:
+        print(f"Total amount is {amount_int}.\nEnter new amount if you need to overwrite.")
+        amount_str = input("Press enter to ignore & use default amount: ")
+        if amount_str != "":
+            try:
+                amount_int = int(amount_str)
+            except ValueError:
+                print("Invalid overwrite input, using original price.")
+    return amount_int
+
+
+def build_settlement_headers(id_token: str, sig_time_sec: int, x_signature: str) -> dict:
+    x_requested_at = datetime.fromtimestamp(sig_time_sec, tz=timezone.utc).astimezone()
+    return {
+        "host": BASE_API_URL.replace("https://", ""),
+        "content-type": "application/json; charset=utf-8",
+        "user-agent": UA,
+        "x-api-key": API_KEY,
+        "authorization": f"Bearer {id_token}",
+        "x-hv": "v3",
+        "x-signature-time": str(sig_time_sec),
+        "x-signature": x_signature,
+        "x-request-id": str(uuid.uuid4()),
+        "x-request-at": java_like_timestamp(x_requested_at),
+        "x-version-app": "8.9.0",
+    }
+
+
+def send_settlement(
+    api_key: str,
+    tokens: dict,
+    path: str,
+    payload: dict,
+    x_signature: str,
+):
+    """POST one settlement; returns the decrypted body, the raw text if it
+    could not be decrypted, or an ERROR dict when the request failed."""
+    with phase(PHASE_SIGNING):
+        started = time.perf_counter()
+        encrypted_payload = encryptsign_xdata(
+            api_key=api_key,
+            method="POST",
+            path=path,
+            id_token=tokens["id_token"],
+            payload=payload
+        )
+        MetricsInstance.record_encrypt(path, time.perf_counter() - started)
+        body = encrypted_payload["encrypted_body"]
+        sig_time_sec = int(body["xtime"]) // 1000
+        headers = build_settlement_headers(tokens["id_token"], sig_time_sec, x_signature)
+
+    url = f"{BASE_API_URL}/{path}"
+    try:
+        with phase(PHASE_SETTLEMENT):
+            resp = send_request(
+                "POST",
+                url,
+                headers=headers,
+                data=json.dumps(body),
+                timeout=SETTLEMENT_TIMEOUT,
+                retry_statuses=SETTLEMENT_RETRY_STATUSES,
+                retry_unsent_only=True,
+            )
+    except HttpClientError as exc:
+        print(f"[request error] {exc.user_message}")
+        res = {"status": "ERROR", "error": exc.user_message}
+        note_settlement_status(res)
+        return res
+
+    with phase(PHASE_DECRYPT):
+        res = decode_api_response(api_key, resp)
+    note_settlement_status(res)
+    return res
@@ -0,0 +1,18 @@
+"""Config flags the client layer reads on the request path.
+
+apply_config() in app.service.config pushes them here, so requests never
+read the config file themselves. Defaults match DEFAULT_CONFIG.
+"""
+
+
+class ClientSettings:
+    def __init__(self):
+        self.parallel_family_probe = False
+        self.response_cache = True
+
+    def update(self, config: dict) -> None:
+        self.parallel_family_probe = bool(config.get("parallel_family_probe", False))
+        self.response_cache = bool(config.get("response_cache", True))
+
+
+ClientSettingsInstance = ClientSettings()
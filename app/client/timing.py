@@ -0,0 +1,110 @@
+"""Per-phase spans of a purchase, recorded on the request path.
+
+Client code marks phases with ``phase()``. It reads the trace from a context
+variable and does nothing outside one, so the clients take no extra
+arguments. Logging and summaries live in app.service.purchase_timing.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+PHASE_PACKAGE_DETAIL = "package_detail"
+PHASE_INTERCEPT = "intercept_page"
+PHASE_PAYMENT_METHODS = "payment_methods"
+PHASE_SIGNING = "signing"
+PHASE_SETTLEMENT = "settlement_post"
+PHASE_DECRYPT = "decrypt"
+PHASES = (
+    PHASE_PACKAGE_DETAIL,
+    PHASE_INTERCEPT,
+    PHASE_PAYMENT_METHODS,
+    PHASE_SIGNING,
+    PHASE_SETTLEMENT,
+    PHASE_DECRYPT,
+)
+
+_current_trace: contextvars.ContextVar["PurchaseTrace | None"] = contextvars.ContextVar(
+    "purchase_trace", default=None
+)
+
+
+class PurchaseTrace:
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.status = ""
+        # phase -> [total seconds, span count]
+        self.phases: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            totals = self.phases.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+
+    def seconds(self, name: str) -> float | None:
+        totals = self.phases.get(name)
+        return totals[0] if totals else None
+
+    @property
+    def settled(self) -> bool:
+        return PHASE_SETTLEMENT in self.phases
+
+    @contextmanager
+    def activate(self):
+        token = _current_trace.set(self)
+        try:
+            yield self
+        finally:
+            _current_trace.reset(token)
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn with this trace active; for work handed to other threads."""
+        with self.activate():
+            return fn(*args, **kwargs)
+
+    def to_record(self, run_id: str | None = None) -> dict:
+        return {
+            "type": "purchase",
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "run": run_id,
+            "label": self.label,
+            "status": self.status,
+            "phases": {name: round(totals[0], 4) for name, totals in self.phases.items()},
+            "spans": {name: totals[1] for name, totals in self.phases.items()},
+        }
+
+
+def current_trace() -> PurchaseTrace | None:
+    return _current_trace.get()
+
+
+@contextmanager
+def phase(name: str):
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - started)
+
+
+def note_settlement_status(res) -> None:
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.status = res.get("status", "") if isinstance(res, dict) else "ERROR"
+
+
+def restart_trace(label: str) -> None:
+    """Drop spans gathered so far, e.g. when a menu moves on to another package."""
+    trace = _current_trace.get()
+    if trace is not None:
+        with trace._lock:
+            trace.phases.clear()
+        trace.label = label
+        trace.status = ""
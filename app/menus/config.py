@@ -1,5 +1,8 @@
+from app.client.cache import clear_cache
 from app.menus.util import clear_screen, pause
-from app.service.config import apply_config, load_config, prompt_bool, prompt_int, save_config
+from app.service.config import apply_config, input_with_default, load_config, prompt_bool, prompt_int, save_config
+
+SENTRY_LOG_FORMATS = ("jsonl", "columnar", "both")
 
 
 def show_config_menu() -> dict:
@@ -18,6 +21,15 @@ def show_config_menu() -> dict:
         print(f"4. Lebar tabel: {table_width_label}")
         print(f"5. Delay loop pembelian (detik): {config['purchase_delay_seconds']}")
         print(f"6. Tampilkan banner: {'ON' if config['show_banner'] else 'OFF'}")
+        print(f"7. Request paralel maksimal: {config['fetch_concurrency']}")
+        print(f"8. Probe family paralel: {'ON' if config['parallel_family_probe'] else 'OFF'}")
+        print(f"9. Cache respons katalog: {'ON' if config['response_cache'] else 'OFF'}")
+        print(f"10. Warm-up sesi semua akun: {'ON' if config['warm_sessions'] else 'OFF'}")
+        print(f"11. Format log sentry: {config['sentry_log_format']}")
+        print(f"12. Persiapan pembelian paralel: {config['purchase_concurrency']}")
+        print(f"13. Siapkan token pembayaran di detail paket: {'ON' if config['prearm_settlement'] else 'OFF'}")
+        print(f"14. Textfile Prometheus: {config['metrics_textfile'] or 'OFF'}")
+        print("C. Bersihkan cache respons")
         print("S. Simpan konfigurasi")
         print("00. Kembali")
         print("-------------------------------------------------------")
@@ -53,6 +65,53 @@ def show_config_menu() -> dict:
                 "Tampilkan banner ASCII? (y/n)",
                 config["show_banner"],
             )
+        elif choice == "7":
+            config["fetch_concurrency"] = max(1, prompt_int(
+                "Request paralel maksimal",
+                config["fetch_concurrency"],
+            ))
+        elif choice == "8":
+            config["parallel_family_probe"] = prompt_bool(
+                "Probe kombinasi family secara paralel? (y/n)",
+                config["parallel_family_probe"],
+            )
+        elif choice == "9":
+            config["response_cache"] = prompt_bool(
+                "Aktifkan cache respons katalog? (y/n)",
+                config["response_cache"],
+            )
+        elif choice == "10":
+            config["warm_sessions"] = prompt_bool(
+                "Siapkan sesi semua akun di latar belakang saat start? (y/n)",
+                config["warm_sessions"],
+            )
+        elif choice == "11":
+            log_format = input("Format log sentry (jsonl/columnar/both): ").strip().lower()
+            if log_format in SENTRY_LOG_FORMATS:
+                config["sentry_log_format"] = log_format
+            else:
+                print("Format tidak dikenal.")
+                pause()
+        elif choice == "12":
+            config["purchase_concurrency"] = max(1, prompt_int(
+                "Jumlah opsi yang disiapkan paralel saat beli massal",
+                config["purchase_concurrency"],
+            ))
+        elif choice == "13":
+            config["prearm_settlement"] = prompt_bool(
+                "Ambil token pembayaran di latar belakang saat melihat detail paket? (y/n)",
+                config["prearm_settlement"],
+            )
+        elif choice == "14":
+            textfile = input_with_default(
+                "Path textfile Prometheus ('-' untuk mematikan)",
+                config["metrics_textfile"],
+            )
+            config["metrics_textfile"] = "" if textfile == "-" else textfile
+        elif choice == "c":
+            clear_cache()
+            print("Cache respons dibersihkan.")
+            pause()
         elif choice == "s":
             save_config(config)
             apply_config(config)
@@ -18,6 +18,8 @@ from app.menus.util import (
 from app.client.purchase.ewallet import show_multipayment
 from app.client.purchase.qris import show_qris_payment
 from app.client.purchase.balance import settlement_balance
+from app.client.timing import restart_trace
+from app.service.purchase_timing import traced_purchase
 from app.type_dict import PaymentItem
 
 def show_hot_menu():
@@ -92,6 +94,7 @@ def show_hot_menu():
             pause()
             continue
 
+@traced_purchase("hot2")
 def show_hot_menu2():
     api_key = AuthInstance.api_key
     tokens = AuthInstance.get_active_tokens()
@@ -132,6 +135,7 @@ def show_hot_menu2():
             return None
         if choice.isdigit() and 1 <= int(choice) <= len(hot_packages):
             selected_package = hot_packages[int(choice) - 1]
+            restart_trace(f"hot2 {selected_package['name']}")
             packages = selected_package.get("packages", [])
             if len(packages) == 0:
                 print(format_status("Paket tidak tersedia.", success=False))
@@ -148,6 +152,7 @@ def show_hot_menu2():
                     package["order"],
                     package["is_enterprise"],
                     package["migration_type"],
+                    use_cache=False,
                 )
                 
                 if package == packages[0]:
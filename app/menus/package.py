@@ -1,5 +1,6 @@
 import json
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from app.service.auth import AuthInstance
@@ -21,18 +22,22 @@ from app.menus.util import (
 from app.client.purchase.qris import show_qris_payment
 from app.client.purchase.ewallet import show_multipayment
 from app.client.purchase.balance import settlement_balance
+from app.client.purchase.common import PaymentPreArm
 from app.type_dict import PaymentItem
 from app.menus.purchase import purchase_n_times, purchase_n_times_by_option_code
 from app.menus.util import format_quota_byte
 from app.service.decoy import DecoyInstance
+from app.service.config import DEFAULT_FETCH_CONCURRENCY, load_config
+from app.service.purchase_timing import traced_purchase
 
+@traced_purchase("package_details")
 def show_package_details(api_key, tokens, package_option_code, is_enterprise, option_order = -1):
     active_user = AuthInstance.active_user
     subscription_type = active_user.get("subscription_type", "")
     
     clear_screen()
     print(render_header("Detail Paket", 55, subtitle=subscription_type))
-    package = get_package(api_key, tokens, package_option_code)
+    package = get_package(api_key, tokens, package_option_code, use_cache=False)
     # print(f"[SPD-202]:\n{json.dumps(package, indent=1)}")
     if not package:
         print(format_status("Failed to load package details.", success=False))
@@ -70,6 +75,12 @@ def show_package_details(api_key, tokens, package_option_code, is_enterprise, op
         )
     ]
     
+    # Fetch the payment token while the user reads the details, so paying
+    # only costs the settlement request.
+    prearm = PaymentPreArm(api_key, tokens, payment_items)
+    if load_config().get("prearm_settlement", True):
+        prearm.start()
+    
     print("-------------------------------------------------------")
     print(f"Nama: {title}")
     print(f"Harga: {format_price(price)}")
@@ -202,7 +213,8 @@ def show_package_details(api_key, tokens, package_option_code, is_enterprise, op
                 tokens,
                 payment_items,
                 payment_for,
-                True
+                True,
+                prepared_payment=prearm.take(),
             )
             input("Silahkan cek hasil pembelian di aplikasi MyXL. Tekan Enter untuk kembali.")
             return True
@@ -213,6 +225,7 @@ def show_package_details(api_key, tokens, package_option_code, is_enterprise, op
                 payment_items,
                 payment_for,
                 True,
+                prepared_payment=prearm.take(),
             )
             input("Silahkan lakukan pembayaran & cek hasil pembelian di aplikasi MyXL. Tekan Enter untuk kembali.")
             return True
@@ -223,6 +236,7 @@ def show_package_details(api_key, tokens, package_option_code, is_enterprise, op
                 payment_items,
                 payment_for,
                 True,
+                prepared_payment=prearm.take(),
             )
             input("Silahkan lakukan pembayaran & cek hasil pembelian di aplikasi MyXL. Tekan Enter untuk kembali.")
             return True
@@ -234,6 +248,7 @@ def show_package_details(api_key, tokens, package_option_code, is_enterprise, op
                 api_key,
                 tokens,
                 decoy["option_code"],
+                use_cache=False,
             )
             
             if not decoy_package_detail:
@@ -291,6 +306,7 @@ def show_package_details(api_key, tokens, package_option_code, is_enterprise, op
                 api_key,
                 tokens,
                 decoy["option_code"],
+                use_cache=False,
             )
             
             if not decoy_package_detail:
@@ -350,6 +366,7 @@ def show_package_details(api_key, tokens, package_option_code, is_enterprise, op
                 api_key,
                 tokens,
                 decoy["option_code"],
+                use_cache=False,
             )
             
             if not decoy_package_detail:
@@ -393,6 +410,7 @@ def show_package_details(api_key, tokens, package_option_code, is_enterprise, op
                 api_key,
                 tokens,
                 decoy["option_code"],
+                use_cache=False,
             )
             
             if not decoy_package_detail:
@@ -646,76 +664,87 @@ def fetch_my_packages():
         print("======================My Packages======================")
         print("=======================================================")
         my_packages =[]
-        num = 1
-        for quota in quotas:
-            quota_code = quota["quota_code"] # Can be used as option_code
-            group_code = quota["group_code"]
-            group_name = quota["group_name"]
-            quota_name = quota["name"]
-            family_code = "N/A"
-            
-            product_subscription_type = quota.get("product_subscription_type", "")
-            product_domain = quota.get("product_domain", "")
-            
-            benefit_infos = []
-            benefits = quota.get("benefits", [])
-            if len(benefits) > 0:
-                for benefit in benefits:
-                    benefit_id = benefit.get("id", "")
-                    name = benefit.get("name", "")
-                    data_type = benefit.get("data_type", "N/A")
-                    benefit_info = "  -----------------------------------------------------\n"
-                    benefit_info += f"  ID    : {benefit_id}\n"
-                    benefit_info += f"  Name  : {name}\n"
-                    benefit_info += f"  Type  : {data_type}\n"
-                    
+        config = load_config()
+        max_workers = max(1, int(config.get("fetch_concurrency", DEFAULT_FETCH_CONCURRENCY)))
 
-                    remaining = benefit.get("remaining", 0)
-                    total = benefit.get("total", 0)
+        # Resolve family codes concurrently, then print in the original order
+        # as soon as each package (and every one before it) is ready.
+        print(f"Fetching {len(quotas)} package details...")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            detail_futures = [
+                executor.submit(get_package, api_key, tokens, quota["quota_code"], quiet=True)
+                for quota in quotas
+            ]
 
-                    if data_type == "DATA":
-                        remaining_str = format_quota_byte(remaining)
-                        total_str = format_quota_byte(total)
+            for num, (quota, detail_future) in enumerate(zip(quotas, detail_futures), start=1):
+                quota_code = quota["quota_code"] # Can be used as option_code
+                group_code = quota["group_code"]
+                group_name = quota["group_name"]
+                quota_name = quota["name"]
+                family_code = "N/A"
+                
+                product_subscription_type = quota.get("product_subscription_type", "")
+                product_domain = quota.get("product_domain", "")
+                
+                benefit_infos = []
+                benefits = quota.get("benefits", [])
+                if len(benefits) > 0:
+                    for benefit in benefits:
+                        benefit_id = benefit.get("id", "")
+                        name = benefit.get("name", "")
+                        data_type = benefit.get("data_type", "N/A")
+                        benefit_info = "  -----------------------------------------------------\n"
+                        benefit_info += f"  ID    : {benefit_id}\n"
+                        benefit_info += f"  Name  : {name}\n"
+                        benefit_info += f"  Type  : {data_type}\n"
                         
-                        benefit_info += f"  Kuota : {remaining_str} / {total_str}"
-                    elif data_type == "VOICE":
-                        benefit_info += f"  Kuota : {remaining/60:.2f} / {total/60:.2f} menit"
-                    elif data_type == "TEXT":
-                        benefit_info += f"  Kuota : {remaining} / {total} SMS"
-                    else:
-                        benefit_info += f"  Kuota : {remaining} / {total}"
 
-                    benefit_infos.append(benefit_info)
+                        remaining = benefit.get("remaining", 0)
+                        total = benefit.get("total", 0)
+
+                        if data_type == "DATA":
+                            remaining_str = format_quota_byte(remaining)
+                            total_str = format_quota_byte(total)
+                            
+                            benefit_info += f"  Kuota : {remaining_str} / {total_str}"
+                        elif data_type == "VOICE":
+                            benefit_info += f"  Kuota : {remaining/60:.2f} / {total/60:.2f} menit"
+                        elif data_type == "TEXT":
+                            benefit_info += f"  Kuota : {remaining} / {total} SMS"
+                        else:
+                            benefit_info += f"  Kuota : {remaining} / {total}"
+
+                        benefit_infos.append(benefit_info)
+
+                try:
+                    package_details = detail_future.result()
+                except Exception as e:
+                    print(f"Failed to fetch package no. {num} details: {e}")
+                    package_details = None
+                if package_details:
+                    family_code = package_details["package_family"]["package_family_code"]
                 
-            
-            print(f"fetching package no. {num} details...")
-            package_details = get_package(api_key, tokens, quota_code)
-            if package_details:
-                family_code = package_details["package_family"]["package_family_code"]
-            
-            print("=======================================================")
-            print(f"Package {num}")
-            print(f"Name: {quota_name}")
-            print("Benefits:")
-            if len(benefit_infos) > 0:
-                for bi in benefit_infos:
-                    print(bi)
-                print("  -----------------------------------------------------")
-            print(f"Group Name: {group_name}")
-            print(f"Quota Code: {quota_code}")
-            print(f"Family Code: {family_code}")
-            print(f"Group Code: {group_code}")
-            print("=======================================================")
-            
-            my_packages.append({
-                "number": num,
-                "name": quota_name,
-                "quota_code": quota_code,
-                "product_subscription_type": product_subscription_type,
-                "product_domain": product_domain,
-            })
-            
-            num += 1
+                print("=======================================================")
+                print(f"Package {num}")
+                print(f"Name: {quota_name}")
+                print("Benefits:")
+                if len(benefit_infos) > 0:
+                    for bi in benefit_infos:
+                        print(bi)
+                    print("  -----------------------------------------------------")
+                print(f"Group Name: {group_name}")
+                print(f"Quota Code: {quota_code}")
+                print(f"Family Code: {family_code}")
+                print(f"Group Code: {group_code}")
+                print("=======================================================")
+                
+                my_packages.append({
+                    "number": num,
+                    "name": quota_name,
+                    "quota_code": quota_code,
+                    "product_subscription_type": product_subscription_type,
+                    "product_domain": product_domain,
+                })
         
         print("Input package number to view detail.")
         print("Input del <package number> to unsubscribe from a package.")
@@ -5,6 +5,7 @@ from app.client.purchase.balance import settlement_balance
 from app.client.purchase.ewallet import settlement_multipayment
 from app.client.purchase.qris import show_qris_payment
 from app.menus.util import clear_screen
+from app.service.purchase_timing import traced_purchase
 from app.type_dict import PaymentItem
 
 def get_latest_transaction(history):
@@ -57,6 +58,7 @@ def prompt_ewallet_method(default_method):
                 return method
         print("Pilihan tidak valid.")
 
+@traced_purchase("repurchase")
 def show_last_package_repurchase_menu(api_key, tokens, history):
     latest_transaction = get_latest_transaction(history)
     if not latest_transaction:
@@ -68,7 +70,7 @@ def show_last_package_repurchase_menu(api_key, tokens, history):
         print("Tidak menemukan kode paket pada riwayat transaksi terakhir.")
         return
 
-    package = get_package(api_key, tokens, package_option_code)
+    package = get_package(api_key, tokens, package_option_code, use_cache=False)
     if not package:
         print("Gagal memuat detail paket terakhir.")
         return
@@ -6,6 +6,22 @@ from app.service.auth import AuthInstance
 from app.service.decoy import DecoyInstance
 from app.type_dict import PaymentItem
 from app.client.purchase.balance import settlement_balance
+from app.service.config import DEFAULT_FETCH_CONCURRENCY, load_config
+from app.service.purchase_engine import (
+    DEFAULT_PURCHASE_CONCURRENCY,
+    PurchaseEngine,
+    family_targets,
+    print_purchase_report,
+)
+from app.service.purchase_journal import PurchaseJournal
+from app.service.purchase_timing import TimingRun
+from app.service.purchase_scheduler import (
+    DEFAULT_SETTLE_INTERVAL,
+    PurchaseScheduler,
+    load_hot_entries,
+    print_scheduler_report,
+    save_scheduler_report,
+)
 
 # Purchase
 def purchase_by_family(
@@ -14,6 +30,7 @@ def purchase_by_family(
     pause_on_success: bool = True,
     delay_seconds: int = 0,
     start_from_option: int = 1,
+    resume: bool = False,
 ):
     active_user = AuthInstance.get_active_user()
     subscription_type = active_user.get("subscription_type", "")
@@ -21,6 +38,27 @@ def purchase_by_family(
     api_key = AuthInstance.api_key
     tokens: dict = AuthInstance.get_active_tokens() or {}
     
+    journal = None
+    retry_interrupted = False
+    if resume:
+        journal = PurchaseJournal.find_latest(family_code or None)
+        if journal is None:
+            print(f"Tidak ada jurnal pembelian untuk family {family_code or '(semua)'}.")
+            pause()
+            return None
+        family_code = journal.run["family_code"]
+        use_decoy = journal.run["use_decoy"]
+        print(f"Melanjutkan jurnal {journal.path}")
+        print(f"Status: {journal.counts()}")
+        interrupted = journal.interrupted_targets()
+        if interrupted:
+            print("Opsi berikut terputus saat settlement, pembayarannya mungkin sudah terkirim:")
+            for target in interrupted:
+                print(f"- {target.label}")
+            print("Cek riwayat transaksi sebelum membeli ulang.")
+            retry_answer = input("Beli ulang opsi di atas? (y/n): ")
+            retry_interrupted = retry_answer.lower() == "y"
+    
     if use_decoy:
         # Balance with Decoy
         decoy = DecoyInstance.get_decoy("balance")
@@ -29,6 +67,7 @@ def purchase_by_family(
             api_key,
             tokens,
             decoy["option_code"],
+            use_cache=False,
         )
         
         if not decoy_package_detail:
@@ -44,173 +83,98 @@ def purchase_by_family(
             pause()
             return None
     
-    family_data = get_family(api_key, tokens, family_code)
-    if not family_data:
-        print(f"Failed to get family data for code: {family_code}.")
-        pause()
-        return None
-    
-    family_name = family_data["package_family"]["name"]
-    variants = family_data["package_variants"]
+    if journal is not None:
+        family_name = journal.run["family_name"]
+        targets = journal.remaining_targets(include_interrupted=retry_interrupted)
+        print("-------------------------------------------------------")
+        if not targets:
+            if journal.interrupted_targets():
+                print("Tidak ada opsi lain untuk dibeli.")
+            else:
+                print(f"Semua opsi family {family_name} sudah terbeli.")
+            pause()
+            return []
+    else:
+        family_data = get_family(api_key, tokens, family_code)
+        if not family_data:
+            print(f"Failed to get family data for code: {family_code}.")
+            pause()
+            return None
+        
+        family_name = family_data["package_family"]["name"]
+        print("-------------------------------------------------------")
+        targets = family_targets(family_data, start_from_option)
+        journal = PurchaseJournal.create(family_code, family_name, targets, use_decoy)
     
-    print("-------------------------------------------------------")
-    successful_purchases = []
-    packages_count = 0
-    for variant in variants:
-        packages_count += len(variant["package_options"])
+    concurrency = load_config().get("purchase_concurrency", DEFAULT_PURCHASE_CONCURRENCY)
+    timings = TimingRun(f"Family: {family_name}")
+    engine = PurchaseEngine(
+        api_key,
+        targets,
+        decoy_option_code=decoy["option_code"] if use_decoy else None,
+        concurrency=concurrency,
+        delay_seconds=delay_seconds,
+        pause_on_success=pause_on_success,
+        journal=journal,
+        timings=timings,
+    )
+    try:
+        results = engine.run()
+    except KeyboardInterrupt:
+        print("\nPembelian dihentikan.")
+        results = engine.results
     
-    purchase_count = 0
-    start_buying = False
-    if start_from_option <= 1:
-        start_buying = True
-
-    for variant in variants:
-        variant_name = variant["name"]
-        for option in variant["package_options"]:
-            tokens = AuthInstance.get_active_tokens()
-            option_order = option["order"]
-            if not start_buying and option_order == start_from_option:
-                start_buying = True
-            if not start_buying:
-                print(f"Skipping option {option_order}. {option['name']}")
-                continue
-            
-            option_name = option["name"]
-            option_price = option["price"]
-            
-            purchase_count += 1
-            print(f"Pruchase {purchase_count} of {packages_count}...")
-            print(f"Trying to buy: {variant_name} - {option_order}. {option_name} - {option['price']}")
-            
-            payment_items = []
-            
-            try:
-                if use_decoy:                
-                    decoy = DecoyInstance.get_decoy("balance")
-                    
-                    decoy_package_detail = get_package(
-                        api_key,
-                        tokens,
-                        decoy["option_code"],
-                    )
-                    
-                    if not decoy_package_detail:
-                        print("Failed to load decoy package details.")
-                        pause()
-                        return False
-                
-                target_package_detail = get_package_details(
-                    api_key,
-                    tokens,
-                    family_code,
-                    variant["package_variant_code"],
-                    option["order"],
-                    None,
-                    None,
-                )
-            except Exception as e:
-                print(f"Exception occurred while fetching package details: {e}")
-                print(f"Failed to get package details for {variant_name} - {option_name}. Skipping.")
-                continue
-            
-            payment_items.append(
-                PaymentItem(
-                    item_code=target_package_detail["package_option"]["package_option_code"],
-                    product_type="",
-                    item_price=target_package_detail["package_option"]["price"],
-                    item_name=str(randint(1000, 9999)) + " " + target_package_detail["package_option"]["name"],
-                    tax=0,
-                    token_confirmation=target_package_detail["token_confirmation"],
-                )
-            )
-            
-            if use_decoy:
-                payment_items.append(
-                    PaymentItem(
-                        item_code=decoy_package_detail["package_option"]["package_option_code"],
-                        product_type="",
-                        item_price=decoy_package_detail["package_option"]["price"],
-                        item_name=str(randint(1000, 9999)) + " " + decoy_package_detail["package_option"]["name"],
-                        tax=0,
-                        token_confirmation=decoy_package_detail["token_confirmation"],
-                    )
-                )
-            
-            res = None
-            
-            overwrite_amount = target_package_detail["package_option"]["price"]
-            if use_decoy or overwrite_amount == 0:
-                overwrite_amount += decoy_package_detail["package_option"]["price"]
-                
-            error_msg = ""
-
-            try:
-                res = settlement_balance(
-                    api_key,
-                    tokens,
-                    payment_items,
-                    "🤑",
-                    False,
-                    overwrite_amount=overwrite_amount,
-                    token_confirmation_idx=1
-                )
-                
-                if res and res.get("status", "") != "SUCCESS":
-                    error_msg = res.get("message", "")
-                    if "Bizz-err.Amount.Total" in error_msg:
-                        error_msg_arr = error_msg.split("=")
-                        valid_amount = int(error_msg_arr[1].strip())
-                        
-                        print(f"Adjusted total amount to: {valid_amount}")
-                        res = settlement_balance(
-                            api_key,
-                            tokens,
-                            payment_items,
-                            "SHARE_PACKAGE",
-                            False,
-                            overwrite_amount=valid_amount,
-                            token_confirmation_idx=-1
-                        )
-                        if res and res.get("status", "") == "SUCCESS":
-                            error_msg = ""
-                            successful_purchases.append(
-                                f"{variant_name}|{option_order}. {option_name} - {option_price}"
-                            )
-                            
-                            if pause_on_success:
-                                print("Purchase successful!")
-                                pause()
-                            else:
-                                print("Purchase successful!")
-                        else:
-                            error_msg = res.get("message", "")
-                else:
-                    successful_purchases.append(
-                        f"{variant_name}|{option_order}. {option_name} - {option_price}"
-                    )
-                    if pause_on_success:
-                        print("Purchase successful!")
-                        pause()
-                    else:
-                        print("Purchase successful!")
+    print_purchase_report(f"Family: {family_name}", results)
+    timings.finish()
+    print(f"Jurnal: {journal.path}")
+    if journal.remaining_targets(include_interrupted=True):
+        print("Lanjutkan opsi yang belum terbeli dengan: python main.py purchase --resume")
+    pause()
+    return results
 
-            except Exception as e:
-                print(f"Exception occurred while creating order: {e}")
-                res = None
-            print("-------------------------------------------------------")
-            should_delay = error_msg == "" or "Failed call ipaas purchase" in error_msg
-            if delay_seconds > 0 and should_delay:
-                print(f"Waiting for {delay_seconds} seconds before next purchase...")
-                time.sleep(delay_seconds)
-                
-    print(f"Family: {family_name}\nSuccessful: {len(successful_purchases)}")
-    if len(successful_purchases) > 0:
-        print("-" * 55)
-        print("Successful purchases:")
-        for purchase in successful_purchases:
-            print(f"- {purchase}")
-    print("-" * 55)
+def purchase_for_accounts(
+    numbers: list[int],
+    family_code: str | None = None,
+    hot_indexes: list[int] | None = None,
+    start_from_option: int = 1,
+    delay_seconds: int = 0,
+    parallel_accounts: int | None = None,
+    account_interval: float | None = None,
+):
+    config = load_config()
+    hot_entries = None
+    if not family_code:
+        try:
+            hot_entries = load_hot_entries(hot_indexes)
+        except (OSError, ValueError) as e:
+            print(f"Gagal membaca hot list: {e}")
+            pause()
+            return None
+    
+    scheduler = PurchaseScheduler(
+        AuthInstance.api_key,
+        numbers,
+        family_code=family_code,
+        hot_entries=hot_entries,
+        start_from_option=start_from_option,
+        parallel_accounts=parallel_accounts or config.get("fetch_concurrency", DEFAULT_FETCH_CONCURRENCY),
+        concurrency=config.get("purchase_concurrency", DEFAULT_PURCHASE_CONCURRENCY),
+        min_settle_interval=DEFAULT_SETTLE_INTERVAL if account_interval is None else account_interval,
+        delay_seconds=delay_seconds,
+    )
+    runs = scheduler.run()
+    if not runs:
+        pause()
+        return None
+    
+    print_scheduler_report(scheduler.title, runs)
+    if scheduler.timings is not None:
+        scheduler.timings.finish()
+    report_path = save_scheduler_report(scheduler.title, runs)
+    if report_path:
+        print(f"Laporan: {report_path}")
     pause()
+    return runs
 
 def purchase_n_times(
     n: int,
@@ -236,6 +200,7 @@ def purchase_n_times(
             api_key,
             tokens,
             decoy["option_code"],
+            use_cache=False,
         )
         
         if not decoy_package_detail:
@@ -280,8 +245,10 @@ def purchase_n_times(
     option_price = target_option["price"]
     print("-------------------------------------------------------")
     successful_purchases = []
+    timings = TimingRun(f"{family_name} - {target_variant['name']} - {option_name} x{n}")
     
     for i in range(n):
+        timings.track(f"{i + 1}/{n} {target_variant['name']}|{option_order}. {option_name}")
         print(f"Pruchase {i + 1} of {n}...")
         print(f"Trying to buy: {target_variant['name']} - {option_order}. {option_name} - {option_price}")
         
@@ -298,6 +265,7 @@ def purchase_n_times(
                     api_key,
                     tokens,
                     decoy["option_code"],
+                    use_cache=False,
                 )
                 
                 if not decoy_package_detail:
@@ -313,6 +281,7 @@ def purchase_n_times(
                 target_option["order"],
                 None,
                 None,
+                use_cache=False,
             )
         except Exception as e:
             print(f"Exception occurred while fetching package details: {e}")
@@ -403,6 +372,7 @@ def purchase_n_times(
             print(f"Waiting for {delay_seconds} seconds before next purchase...")
             time.sleep(delay_seconds)
 
+    timings.finish()
     print(f"Total successful purchases {len(successful_purchases)}/{n} for:\nFamily: {family_name}\nVariant: {target_variant['name']}\nOption: {option_order}. {option_name} - {option_price}")
     if len(successful_purchases) > 0:
         print("-------------------------------------------------------")
@@ -434,6 +404,7 @@ def purchase_n_times_by_option_code(
             api_key,
             tokens,
             decoy["option_code"],
+            use_cache=False,
         )
         
         if not decoy_package_detail:
@@ -451,8 +422,10 @@ def purchase_n_times_by_option_code(
     
     print("-------------------------------------------------------")
     successful_purchases = []
+    timings = TimingRun(f"{option_code} x{n}")
     
     for i in range(n):
+        timings.track(f"{i + 1}/{n} {option_code}")
         print(f"Pruchase {i + 1} of {n}...")
         
         api_key = AuthInstance.api_key
@@ -468,6 +441,7 @@ def purchase_n_times_by_option_code(
                     api_key,
                     tokens,
                     decoy["option_code"],
+                    use_cache=False,
                 )
                 
                 if not decoy_package_detail:
@@ -479,6 +453,7 @@ def purchase_n_times_by_option_code(
                 api_key,
                 tokens,
                 option_code,
+                use_cache=False,
             )
         except Exception as e:
             print(f"Exception occurred while fetching package details: {e}")
@@ -568,6 +543,7 @@ def purchase_n_times_by_option_code(
             print(f"Waiting for {delay_seconds} seconds before next purchase...")
             time.sleep(delay_seconds)
 
+    timings.finish()
     print(f"Total successful purchases {len(successful_purchases)}/{n}")
     if len(successful_purchases) > 0:
         print("-------------------------------------------------------")
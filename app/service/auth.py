@@ -1,8 +1,11 @@
+import atexit
 import os
 import json
+import threading
 import time
 from typing import Any
 import importlib.util
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 try:
     from cryptography.fernet import Fernet, InvalidToken
@@ -18,7 +21,26 @@ if importlib.util.find_spec("keyring") is not None:
 
 from app.client.ciam import get_new_token
 from app.client.engsel import get_profile
-from app.util import ensure_api_key
+from app.service.config import DEFAULT_FETCH_CONCURRENCY, load_config
+from app.util import decode_jwt_claims, ensure_api_key
+
+# Renew this many seconds before the access token's `exp`.
+TOKEN_REFRESH_MARGIN = 60
+# Lifetime assumed for tokens without a readable `exp` claim.
+FALLBACK_TOKEN_LIFETIME = 300
+# Retry delays for the background refresher after a failed renewal.
+REFRESH_RETRY_DELAY = 15
+REFRESH_RETRY_MAX_DELAY = 300
+# Token file writes within this window are coalesced into one. Writes that
+# carry a rotated refresh token never wait: it is the only valid one.
+TOKEN_WRITE_DELAY = 1.0
+
+def token_expires_at(tokens: dict, issued_at: float) -> float:
+    for name in ("access_token", "id_token"):
+        exp = decode_jwt_claims(tokens.get(name, "")).get("exp")
+        if isinstance(exp, (int, float)):
+            return float(exp)
+    return issued_at + FALLBACK_TOKEN_LIFETIME
 
 class Auth:
     _instance_ = None
@@ -50,6 +72,7 @@ class Auth:
     # }
     
     last_refresh_time = None
+    token_expires_at = 0.0
     
     def __new__(cls, *args, **kwargs):
         if not cls._instance_:
@@ -67,6 +90,24 @@ class Auth:
             env_encrypt = os.getenv("MYXL_CLI_ENCRYPT_TOKENS", "1") not in {"0", "false", "False"}
             self.encryption_enabled = env_encrypt and has_crypto
 
+            # One lock per number: a refresh token rotates on use, so two
+            # threads must never spend the same one concurrently.
+            self._account_locks: dict[int, threading.Lock] = {}
+            self._write_lock = threading.RLock()
+            self._fernet = None
+            self._persisted_payload = None
+            self._persisted_refresh_tokens = None
+            self._tokens_dirty = False
+            self._write_timer = None
+            self._refresher_thread = None
+            self._refresher_wakeup = threading.Event()
+            # Live sessions by number, same shape as active_user.
+            self.sessions = {}
+            self.session_expires_at = {}
+            # Background renewal backoff by number: failures and next try.
+            self._refresh_failures: dict[int, int] = {}
+            self._refresh_retry_at: dict[int, float] = {}
+
             self._ensure_data_dir()
             self._migrate_legacy_files()
             self._warn_if_plaintext_storage()
@@ -74,7 +115,8 @@ class Auth:
             if os.path.exists(self.refresh_tokens_path):
                 self.load_tokens()
             else:
-                self.write_tokens_to_file()
+                self.write_tokens_to_file(immediate=True)
+            atexit.register(self.flush_tokens)
 
             # Select active user from file if available
             self.load_active_number()
@@ -110,17 +152,21 @@ class Auth:
         os.chmod(key_path, 0o600)
         return new_key
 
+    def _get_fernet(self):
+        # The key may come from keyring or disk; resolve it once per process.
+        if self._fernet is None:
+            self._fernet = Fernet(self._get_encryption_key())
+        return self._fernet
+
     def _encrypt_payload(self, payload: str) -> str:
         if not has_crypto:
             raise RuntimeError("Token encryption requires the optional cryptography dependency.")
-        fernet = Fernet(self._get_encryption_key())
-        return fernet.encrypt(payload.encode("utf-8")).decode("utf-8")
+        return self._get_fernet().encrypt(payload.encode("utf-8")).decode("utf-8")
 
     def _decrypt_payload(self, payload: str) -> str:
         if not has_crypto:
             raise RuntimeError("Token encryption requires the optional cryptography dependency.")
-        fernet = Fernet(self._get_encryption_key())
-        return fernet.decrypt(payload.encode("utf-8")).decode("utf-8")
+        return self._get_fernet().decrypt(payload.encode("utf-8")).decode("utf-8")
 
     def _warn_if_plaintext_storage(self):
         if self.encryption_enabled or self._warned_plaintext_storage:
@@ -144,7 +190,7 @@ class Auth:
             with open(legacy_tokens_path, "r", encoding="utf-8") as f:
                 legacy_tokens = json.load(f)
             self.refresh_tokens = legacy_tokens if isinstance(legacy_tokens, list) else []
-            self.write_tokens_to_file()
+            self.write_tokens_to_file(immediate=True)
             os.remove(legacy_tokens_path)
 
         if os.path.exists(legacy_active_path) and not os.path.exists(self.active_number_path):
@@ -169,7 +215,7 @@ class Auth:
         if isinstance(raw, list):
             if self.encryption_enabled:
                 self.refresh_tokens = raw
-                self.write_tokens_to_file()
+                self.write_tokens_to_file(immediate=True)
             return raw
 
         return []
@@ -187,9 +233,15 @@ class Auth:
             else:
                 print(f"Invalid token entry: {rt}")
 
+        # Only entries that change after this point need to hit the disk.
+        if self._persisted_payload is None:
+            self._persisted_payload = json.dumps(self.refresh_tokens, indent=4)
+            self._persisted_refresh_tokens = self._refresh_token_map()
+
     def add_refresh_token(self, number: int, refresh_token: str):
         # Check if number already exist, if yes, replace it, if not append
         existing = next((rt for rt in self.refresh_tokens if rt["number"] == number), None)
+        self._drop_session(int(number))
         if existing:
             existing["refresh_token"] = refresh_token
         else:
@@ -206,16 +258,17 @@ class Auth:
             })
         
         # Save to file
-        self.write_tokens_to_file()
+        self.write_tokens_to_file(immediate=True)
 
         # Set active user to newly added
         self.set_active_user(number)
             
     def remove_refresh_token(self, number: int):
         self.refresh_tokens = [rt for rt in self.refresh_tokens if rt["number"] != number]
+        self._drop_session(int(number))
         
         # Save to file
-        self.write_tokens_to_file()
+        self.write_tokens_to_file(immediate=True)
         
         # If the removed user was the active user, select a new active user if available
         if self.active_user and self.active_user["number"] == number:
@@ -230,25 +283,37 @@ class Auth:
                 self.active_user = None
 
     def set_active_user(self, number: int):
+        number = int(number)
+        with self._account_lock(number):
+            user, error = self._open_session(number)
+        if error:
+            print(error)
+            input("Press Enter to continue...")
+            return False
+        self._activate_session(user)
+
+    def _open_session(self, number: int) -> tuple[dict | None, str | None]:
+        # Caller holds the account lock.
+        # A warm session from the pool makes switching a pure in-memory swap.
+        session = self.sessions.get(number)
+        if session and not self._session_needs_refresh(number):
+            return session, None
+
         # Get refresh token for the number from refresh_tokens
         rt_entry = next((rt for rt in self.refresh_tokens if rt["number"] == number), None)
         if not rt_entry:
-            print(f"No refresh token found for number: {number}")
-            input("Press Enter to continue...")
-            return False
+            return None, f"No refresh token found for number: {number}"
 
         tokens = get_new_token(self.api_key, rt_entry["refresh_token"], rt_entry.get("subscriber_id", ""))
         if not tokens:
-            print(f"Failed to get tokens for number: {number}. The refresh token might be invalid or expired.")
-            input("Press Enter to continue...")
-            return False
+            return None, f"Failed to get tokens for number: {number}. The refresh token might be invalid or expired."
 
         profile_data = get_profile(self.api_key, tokens["access_token"], tokens["id_token"])
         subscriber_id = profile_data["profile"]["subscriber_id"]
         subscription_type = profile_data["profile"]["subscription_type"]
 
-        self.active_user = {
-            "number": int(number),
+        user = {
+            "number": number,
             "subscriber_id": subscriber_id,
             "subscription_type": subscription_type,
             "tokens": tokens
@@ -262,19 +327,72 @@ class Auth:
         rt_entry["refresh_token"] = tokens["refresh_token"]
         self.write_tokens_to_file()
         
+        self.sessions[number] = user
+        self.session_expires_at[number] = token_expires_at(tokens, time.time())
+        self._clear_refresh_backoff(number)
+        return user, None
+
+    def _activate_session(self, user: dict):
+        self.active_user = user
         self.last_refresh_time = int(time.time())
+        self.token_expires_at = self.session_expires_at[user["number"]]
+        self._refresher_wakeup.set()
         
         # Save active number to file
         self.write_active_number()
 
+    def _drop_session(self, number: int):
+        self.sessions.pop(number, None)
+        self.session_expires_at.pop(number, None)
+        self._clear_refresh_backoff(number)
+
+    def _account_lock(self, number: int) -> threading.Lock:
+        # setdefault is atomic, so racing callers end up with the same lock.
+        return self._account_locks.setdefault(int(number), threading.Lock())
+
+    def _clear_refresh_backoff(self, number: int):
+        self._refresh_failures.pop(number, None)
+        self._refresh_retry_at.pop(number, None)
+
+    def _publish_tokens(self, user: dict, tokens: dict):
+        # Readers grab user["tokens"] once per request; swapping in a fully
+        # built dict means they see either the old or the new set, never a mix.
+        user["tokens"] = tokens
+        expires_at = token_expires_at(tokens, time.time())
+        self.session_expires_at[user["number"]] = expires_at
+        if user is self.active_user:
+            self.last_refresh_time = int(time.time())
+            self.token_expires_at = expires_at
+
+        rt_entry = next((rt for rt in self.refresh_tokens if rt["number"] == user["number"]), None)
+        if rt_entry and rt_entry["refresh_token"] != tokens["refresh_token"]:
+            rt_entry["refresh_token"] = tokens["refresh_token"]
+            self.write_tokens_to_file()
+
+    def _renew_tokens(self, quiet: bool = False, force: bool = True, user: dict | None = None) -> bool:
+        user = user or self.active_user
+        if not user:
+            return False
+        with self._account_lock(user["number"]):
+            # Another thread may have renewed while we waited for the lock.
+            if not force and not self._session_needs_refresh(user["number"]):
+                return True
+            tokens = get_new_token(self.api_key, user["tokens"]["refresh_token"], user["subscriber_id"], quiet=quiet)
+            if not tokens:
+                return False
+            if self.sessions.get(user["number"]) is user or self.active_user is user:
+                self._publish_tokens(user, tokens)
+            return True
+
+    def _token_needs_refresh(self, margin: float = TOKEN_REFRESH_MARGIN) -> bool:
+        return time.time() >= self.token_expires_at - margin
+
+    def _session_needs_refresh(self, number: int, margin: float = TOKEN_REFRESH_MARGIN) -> bool:
+        return time.time() >= self.session_expires_at.get(number, 0.0) - margin
+
     def renew_active_user_token(self):
         if self.active_user:
-            tokens = get_new_token(self.api_key, self.active_user["tokens"]["refresh_token"], self.active_user["subscriber_id"])
-            if tokens:
-                self.active_user["tokens"] = tokens
-                self.last_refresh_time = int(time.time())
-                self.add_refresh_token(self.active_user["number"], self.active_user["tokens"]["refresh_token"])
-                
+            if self._renew_tokens():
                 print("Active user token renewed successfully.")
                 return True
             else:
@@ -296,27 +414,195 @@ class Auth:
                     return self.active_user
             return None
         
-        if self.last_refresh_time is None or (int(time.time()) - self.last_refresh_time) > 300:
-            self.renew_active_user_token()
-            self.last_refresh_time = time.time()
+        # With the background refresher running, only renew inline once the
+        # token has actually expired (e.g. after the machine slept).
+        margin = 0 if self.refresher_running() else TOKEN_REFRESH_MARGIN
+        if self._token_needs_refresh(margin):
+            with self._account_lock(self.active_user["number"]):
+                needs_refresh = self._token_needs_refresh(margin)
+            if needs_refresh:
+                self.renew_active_user_token()
         
         return self.active_user
+
+    def warm_sessions(self, max_workers: int | None = None) -> int:
+        """Fetch live tokens for every stored account concurrently.
+
+        Accounts whose subscriber info is not known yet are left to the
+        regular set_active_user path, which also fetches the profile.
+        """
+        pending = [
+            rt for rt in list(self.refresh_tokens)
+            if rt.get("subscriber_id") and rt.get("subscription_type")
+            and int(rt["number"]) not in self.sessions
+        ]
+        if not pending:
+            return 0
+
+        workers = max_workers or max(1, int(load_config().get("fetch_concurrency", DEFAULT_FETCH_CONCURRENCY)))
+
+        def warm(rt: dict) -> bool:
+            number = int(rt["number"])
+            with self._account_lock(number):
+                # set_active_user may have opened it (and rotated the token) meanwhile.
+                if number in self.sessions:
+                    return False
+                tokens = get_new_token(self.api_key, rt["refresh_token"], rt["subscriber_id"], quiet=True)
+                if not tokens:
+                    return False
+                user = {
+                    "number": number,
+                    "subscriber_id": rt["subscriber_id"],
+                    "subscription_type": rt["subscription_type"],
+                    "tokens": tokens,
+                }
+                self.sessions[number] = user
+                self._publish_tokens(user, tokens)
+                return True
+
+        warmed = 0
+        with ThreadPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+            for future in as_completed([executor.submit(warm, rt) for rt in pending]):
+                try:
+                    warmed += future.result()
+                except Exception:
+                    pass
+
+        if warmed:
+            self._refresher_wakeup.set()
+        return warmed
+
+    def start_session_warmup(self):
+        threading.Thread(target=self.warm_sessions, name="session-warmup", daemon=True).start()
+    
+    def refresher_running(self) -> bool:
+        return self._refresher_thread is not None and self._refresher_thread.is_alive()
+
+    def start_token_refresher(self):
+        """Renew pooled sessions in the background ahead of expiry."""
+        if self.refresher_running():
+            return
+        self._refresher_thread = threading.Thread(
+            target=self._refresh_loop, name="token-refresher", daemon=True
+        )
+        self._refresher_thread.start()
+
+    def _next_session_due(self) -> tuple[dict | None, float]:
+        """The session to renew next and the time it is due."""
+        # Warm-up threads and _publish_tokens change the dicts while we look;
+        # copying one is a single C-level call, so it never sees a resize.
+        expires_at = dict(self.session_expires_at)
+        retry_at = dict(self._refresh_retry_at)
+        due = {
+            number: max(expires - TOKEN_REFRESH_MARGIN, retry_at.get(number, 0.0))
+            for number, expires in expires_at.items()
+        }
+        due_number = min(due, key=due.get, default=None)
+        if due_number is None:
+            return None, 0.0
+        return self.sessions.get(due_number), due[due_number]
+
+    def _refresh_loop(self):
+        while True:
+            self._refresher_wakeup.clear()
+            user, due_at = self._next_session_due()
+            if user is None:
+                self._refresher_wakeup.wait(FALLBACK_TOKEN_LIFETIME)
+                continue
+
+            number = user["number"]
+            delay = due_at - time.time()
+            if delay > 0:
+                self._refresher_wakeup.wait(delay)
+                continue
+
+            try:
+                renewed = self._renew_tokens(quiet=True, force=False, user=user)
+            except Exception:
+                renewed = False
+            if renewed:
+                self._clear_refresh_backoff(number)
+                continue
+
+            if user is not self.active_user:
+                # Let a later switch to this account take the slow path instead
+                # of retrying it here while the rest of the pool goes stale.
+                self._drop_session(number)
+                continue
+
+            # Back off this account only; the others stay due on schedule.
+            # Leave it to the next foreground call if the token is already dead.
+            failures = self._refresh_failures.get(number, 0) + 1
+            self._refresh_failures[number] = failures
+            self._refresh_retry_at[number] = time.time() + min(
+                REFRESH_RETRY_DELAY * (2 ** (failures - 1)), REFRESH_RETRY_MAX_DELAY
+            )
     
+    def get_session_tokens(self, number: int) -> dict | None:
+        """Live tokens for a pooled account, renewed inline if they lapsed."""
+        number = int(number)
+        user = self.sessions.get(number)
+        if user is None and self.active_user and self.active_user["number"] == number:
+            user = self.active_user
+        if user is None:
+            return None
+
+        margin = 0 if self.refresher_running() else TOKEN_REFRESH_MARGIN
+        if self._session_needs_refresh(number, margin):
+            if not self._renew_tokens(quiet=True, force=False, user=user):
+                return None
+        return user["tokens"]
+
     def get_active_tokens(self) -> dict | None:
         active_user = self.get_active_user()
         return active_user["tokens"] if active_user else None
     
-    def write_tokens_to_file(self):
-        if self.encryption_enabled:
+    def write_tokens_to_file(self, immediate: bool = False):
+        """Persist refresh_tokens, coalescing bursts of calls into one write.
+
+        A changed refresh token is written at once, so a crash can't lose it.
+        """
+        with self._write_lock:
+            self._tokens_dirty = True
+            if immediate or self._refresh_token_map() != self._persisted_refresh_tokens:
+                self.flush_tokens()
+            elif self._write_timer is None:
+                self._write_timer = threading.Timer(TOKEN_WRITE_DELAY, self.flush_tokens)
+                self._write_timer.daemon = True
+                self._write_timer.start()
+
+    def flush_tokens(self):
+        with self._write_lock:
+            if self._write_timer is not None:
+                self._write_timer.cancel()
+                self._write_timer = None
+            if not self._tokens_dirty:
+                return
+            self._tokens_dirty = False
+
             payload = json.dumps(self.refresh_tokens, indent=4)
-            encrypted = self._encrypt_payload(payload)
-            data = {"encrypted": True, "payload": encrypted}
-        else:
-            self._warn_if_plaintext_storage()
-            data = self.refresh_tokens
+            if payload == self._persisted_payload and os.path.exists(self.refresh_tokens_path):
+                return
 
-        with open(self.refresh_tokens_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
+            if self.encryption_enabled:
+                encrypted = self._encrypt_payload(payload)
+                data = {"encrypted": True, "payload": encrypted}
+            else:
+                self._warn_if_plaintext_storage()
+                data = self.refresh_tokens
+
+            # Write next to the target and rename over it so a crash mid-write
+            # never leaves a truncated token file behind.
+            tmp_path = f"{self.refresh_tokens_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=4)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.refresh_tokens_path)
+            self._persisted_payload = payload
+            self._persisted_refresh_tokens = self._refresh_token_map()
+
+    def _refresh_token_map(self) -> dict:
+        return {rt["number"]: rt["refresh_token"] for rt in self.refresh_tokens}
     
     def write_active_number(self):
         if self.active_user:
@@ -334,4 +620,17 @@ class Auth:
                     number = int(number_str)
                     self.set_active_user(number)
 
-AuthInstance = Auth()
+class _LazyAuth:
+    """Stand-in for the Auth singleton that builds it on first use.
+
+    Constructing Auth loads the token store and may refresh tokens over the
+    network, which imports alone (e.g. `main.py --help`) should not pay for.
+    """
+
+    def __getattr__(self, name):
+        return getattr(Auth(), name)
+
+    def __setattr__(self, name, value):
+        setattr(Auth(), name, value)
+
+AuthInstance = _LazyAuth()
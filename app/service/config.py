@@ -3,11 +3,16 @@ import os
 from pathlib import Path
 from shutil import get_terminal_size
 
+from app.client.settings import ClientSettingsInstance
+
 try:
     import yaml
 except ImportError:  # pragma: no cover - optional dependency
     yaml = None
 
+# Worker threads for concurrent fetches (package details, accounts, session warm-up).
+DEFAULT_FETCH_CONCURRENCY = 6
+
 DEFAULT_CONFIG = {
     "enterprise_default": False,
     "no_color": False,
@@ -15,6 +20,14 @@ DEFAULT_CONFIG = {
     "table_width": 55,
     "purchase_delay_seconds": 0,
     "show_banner": True,
+    "fetch_concurrency": DEFAULT_FETCH_CONCURRENCY,
+    "parallel_family_probe": False,
+    "response_cache": True,
+    "warm_sessions": True,
+    "sentry_log_format": "jsonl",
+    "purchase_concurrency": 3,
+    "prearm_settlement": True,
+    "metrics_textfile": "",
 }
 
 CONFIG_ENV_KEY = "MYXL_CONFIG_PATH"
@@ -81,6 +94,7 @@ def apply_config(config: dict) -> None:
         os.environ["NO_COLOR"] = "1"
     else:
         os.environ.pop("NO_COLOR", None)
+    ClientSettingsInstance.update(config)
 
 
 def resolve_table_width(config: dict | None = None) -> int:
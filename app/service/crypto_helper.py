@@ -1,5 +1,6 @@
-import hashlib, os, hmac, base64
+import hashlib, os, hmac, base64, binascii
 from base64 import urlsafe_b64encode, urlsafe_b64decode
+from functools import lru_cache
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad, unpad
 
@@ -8,37 +9,131 @@ AX_API_SIG_KEY=os.getenv("AX_API_SIG_KEY")
 X_API_BASE_SECRET=os.getenv("X_API_BASE_SECRET")
 ENCRYPTED_FIELD_KEY=os.getenv("ENCRYPTED_FIELD_KEY")
 
+# Encoded once instead of on every request.
+XDATA_KEY_BYTES = XDATA_KEY.encode() if XDATA_KEY else None
+
+def _xdata_key_bytes() -> bytes:
+    if XDATA_KEY_BYTES is None:
+        raise ValueError("XDATA_KEY environment variable not set")
+    return XDATA_KEY_BYTES
+
+@lru_cache(maxsize=256)
 def derive_iv(xtime_ms: int) -> bytes:
-    sha = hashlib.sha256(str(xtime_ms).encode()).hexdigest()
-    return sha[:16].encode()
+    # First 16 hex chars of the digest == hex of its first 8 bytes.
+    return hashlib.sha256(str(xtime_ms).encode()).digest()[:8].hex().encode()
 
 def encrypt_xdata(plaintext: str, xtime_ms: int) -> str:
-    iv = derive_iv(xtime_ms)
-    key_bytes = XDATA_KEY.encode()
-    
-    cipher = AES.new(key_bytes, AES.MODE_CBC, iv)
+    cipher = AES.new(_xdata_key_bytes(), AES.MODE_CBC, derive_iv(xtime_ms))
     return urlsafe_b64encode(cipher.encrypt(pad(plaintext.encode(), 16, style="pkcs7"))).decode()
 
 def decrypt_xdata(xdata: str, xtime_ms: int) -> str:
-    iv = derive_iv(xtime_ms)
-    key_bytes = XDATA_KEY.encode()
-    
     ct = urlsafe_b64decode(xdata + "=" * ((4 - len(xdata) % 4) % 4))
-    pt = AES.new(key_bytes, AES.MODE_CBC, iv).decrypt(ct)
+    pt = AES.new(_xdata_key_bytes(), AES.MODE_CBC, derive_iv(xtime_ms)).decrypt(ct)
     return unpad(pt, 16, style="pkcs7").decode()
 
+_URLSAFE_TO_STD = bytes.maketrans(b"-_", b"+/")
+# Base64 chars per step. A multiple of 64 keeps every chunk aligned to both
+# base64 quads and AES blocks, so the CBC state carries across chunks.
+_XDATA_CHUNK = 64 * 1024
+
+def decrypt_xdata_into(xdata, xtime_ms: int) -> bytearray:
+    """Decrypt urlsafe-base64 xdata (bytes or memoryview) into a single buffer.
+
+    The ciphertext is decoded and decrypted chunk by chunk straight into the
+    result, so no full-size intermediate copies are made.
+    """
+    with memoryview(xdata) as view:
+        end = len(view)
+        while end and view[end - 1] == ord("="):
+            end -= 1
+        size = end * 3 // 4
+        if size == 0 or size % 16:
+            raise ValueError("Invalid xdata length")
+
+        out = bytearray(size)
+        cipher = AES.new(_xdata_key_bytes(), AES.MODE_CBC, derive_iv(xtime_ms))
+        with memoryview(out) as target:
+            pos = 0
+            for offset in range(0, end, _XDATA_CHUNK):
+                chunk = view[offset:min(offset + _XDATA_CHUNK, end)].tobytes().translate(_URLSAFE_TO_STD)
+                if len(chunk) % 4:
+                    chunk += b"=" * (4 - len(chunk) % 4)
+                ct = binascii.a2b_base64(chunk)
+                cipher.decrypt(ct, output=target[pos:pos + len(ct)])
+                pos += len(ct)
+
+    pad_len = out[-1]
+    if not 1 <= pad_len <= 16 or out[-pad_len:] != bytes((pad_len,)) * pad_len:
+        raise ValueError("Padding is incorrect.")
+    del out[-pad_len:]
+    return out
+
+# HMAC hashes any key longer than the digest block size before using it, so
+# for long keys the hash of the fixed key prefix can be computed once and
+# resumed per call with only the timestamp left to feed.
+_SHA512_BLOCK_SIZE = hashlib.sha512().block_size
+
+def _hmac_sha512_hex(key: bytes, msg: bytes) -> str:
+    return hmac.digest(key, msg, "sha512").hex()
+
+class XSigner:
+    """x-signature signer bound to one id_token and HTTP method.
+
+    The encoded key prefix, and for long keys the partial SHA-512 state over
+    it, is kept per path so repeated signing only hashes the timestamp and
+    the message.
+    """
+
+    def __init__(self, id_token: str, method: str):
+        self.id_token = id_token
+        self.method = method
+        self._key_prefix = f"{X_API_BASE_SECRET};{id_token};{method};".encode("utf-8")
+        self._msg_prefix = f"{id_token};".encode("utf-8")
+        self._paths: dict[str, tuple[bytes, object]] = {}
+
+    def _path_state(self, path: str):
+        state = self._paths.get(path)
+        if state is None:
+            prefix = self._key_prefix + f"{path};".encode("utf-8")
+            # Past the block size HMAC would hash the key anyway.
+            prefix_hash = hashlib.sha512(prefix) if len(prefix) > _SHA512_BLOCK_SIZE else None
+            state = (prefix, prefix_hash)
+            self._paths[path] = state
+        return state
+
+    def sign(self, path: str, sig_time_sec: int) -> str:
+        prefix, prefix_hash = self._path_state(path)
+        time_bytes = str(sig_time_sec).encode("ascii")
+        if prefix_hash is None:
+            key = prefix + time_bytes
+        else:
+            h = prefix_hash.copy()
+            h.update(time_bytes)
+            key = h.digest()
+        return _hmac_sha512_hex(key, self._msg_prefix + time_bytes + b";")
+
+    def sign_batch(self, items) -> list[str]:
+        """Sign an iterable of (path, sig_time_sec) pairs, in order."""
+        return [self.sign(path, sig_time_sec) for path, sig_time_sec in items]
+
+@lru_cache(maxsize=32)
+def get_signer(id_token: str, method: str) -> XSigner:
+    return XSigner(id_token, method)
+
 def make_x_signature(
     id_token: str,
     method: str,
     path:str,
     sig_time_sec:int
 ) -> str:
-    key_str = f"{X_API_BASE_SECRET};{id_token};{method};{path};{sig_time_sec}"
-    key_bytes = key_str.encode("utf-8")
-    
-    msg = f"{id_token};{sig_time_sec};".encode("utf-8")
-    
-    return hmac.new(key_bytes, msg, hashlib.sha512).hexdigest()
+    return get_signer(id_token, method).sign(path, sig_time_sec)
+
+def make_x_signature_batch(
+    id_token: str,
+    method: str,
+    items,
+) -> list[str]:
+    return get_signer(id_token, method).sign_batch(items)
 
 def make_x_signature_payment(
     access_token: str,
@@ -54,7 +149,7 @@ def make_x_signature_payment(
 
     msg = f"{access_token};{token_payment};{sig_time_sec};{payment_for};{payment_method};{package_code};".encode("utf-8")
 
-    return hmac.new(key_bytes, msg, hashlib.sha512).hexdigest()
+    return _hmac_sha512_hex(key_bytes, msg)
 
 def make_ax_api_signature(
     ts_for_sign: str,
@@ -82,7 +177,7 @@ def make_x_signature_bounty(
 
     msg = f"{access_token};{token_payment};{sig_time_sec};{package_code};".encode("utf-8")
 
-    return hmac.new(key_bytes, msg, hashlib.sha512).hexdigest()
+    return _hmac_sha512_hex(key_bytes, msg)
 
 def make_x_signature_loyalty(
     sig_time_sec: int,
@@ -95,7 +190,7 @@ def make_x_signature_loyalty(
     
     msg = f"{token_confirmation};{sig_time_sec};{package_code};".encode("utf-8")
     
-    return hmac.new(key_bytes, msg, hashlib.sha512).hexdigest()
+    return _hmac_sha512_hex(key_bytes, msg)
 
 def decrypt_circle_msisdn(encrypted_msisdn_b64: str) -> str:
     iv_ascii = encrypted_msisdn_b64[-16:]
@@ -137,7 +232,7 @@ def make_x_signature_bounty_allotment(
     
     msg = f"{token_confirmation};{sig_time_sec};{destination_msisdn};{package_code};".encode("utf-8")
     
-    return hmac.new(key_bytes, msg, hashlib.sha512).hexdigest()
+    return _hmac_sha512_hex(key_bytes, msg)
 
 def make_x_signature_basic(
     method: str,
@@ -149,4 +244,4 @@ def make_x_signature_basic(
 
     msg = f"{sig_time_sec};en;".encode("utf-8")
 
-    return hmac.new(key_bytes, msg, hashlib.sha512).hexdigest()
+    return _hmac_sha512_hex(key_bytes, msg)
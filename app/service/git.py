@@ -1,4 +1,8 @@
+import json
+import os
 import subprocess
+import threading
+import time
 import requests
 import xml.etree.ElementTree as ET
 
@@ -6,6 +10,15 @@ OWNER = "purplemashu"
 REPO  = "me-cli-sunset"
 BRANCH = "main"
 
+UPDATE_CACHE_PATH = os.path.join(os.path.expanduser("~/.myxl-cli"), "update-check.json")
+# How long a fetched remote commit is trusted, and how long to back off after
+# a failed fetch so offline runs don't retry on every start.
+UPDATE_CHECK_TTL = 6 * 60 * 60
+UPDATE_CHECK_FAILURE_TTL = 60 * 60
+
+_update_notice = None
+_update_thread = None
+
 def get_local_commit():
     """Return current local commit hash, or None if not in a git repo."""
     try:
@@ -32,25 +45,68 @@ def get_latest_commit_atom():
     # The SHA is the last path segment of the <id> URL
     return entry_id.text.rsplit("/", 1)[-1]
 
-def check_for_updates():
-    local = get_local_commit()
+def _load_update_cache() -> dict:
+    try:
+        with open(UPDATE_CACHE_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def _save_update_cache(remote: str | None) -> None:
+    try:
+        os.makedirs(os.path.dirname(UPDATE_CACHE_PATH), exist_ok=True)
+        tmp_path = f"{UPDATE_CACHE_PATH}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"checked_at": time.time(), "remote": remote}, f)
+        os.replace(tmp_path, UPDATE_CACHE_PATH)
+    except OSError:
+        pass
+
+def get_remote_commit_cached() -> str | None:
+    """Latest remote commit, served from the on-disk cache while it is fresh."""
+    cache = _load_update_cache()
+    age = time.time() - cache.get("checked_at", 0)
+    ttl = UPDATE_CHECK_TTL if cache.get("remote") else UPDATE_CHECK_FAILURE_TTL
+    if 0 <= age < ttl:
+        return cache.get("remote")
+
     try:
         remote = get_latest_commit_atom()
     except Exception:
         remote = None
+    _save_update_cache(remote)
+    return remote
 
-    if not remote:
-        # Could not fetch remote commit
-        return False
-
-    if not local:
-        # Not a git repo
-        return False
+def _update_notice_for(local: str | None, remote: str | None) -> str | None:
+    if not remote or not local or local == remote:
+        return None
+    return (
+        f"⚠️  A newer version is available (remote {remote[:7]} vs local {local[:7]}).\n"
+        "   Run: git pull --rebase to update."
+    )
 
-    if local != remote:
-        print(f"⚠️  A newer version is available (remote {remote[:7]} vs local {local[:7]}).")
-        print("   Run: git pull --rebase to update.")
+def check_for_updates():
+    notice = _update_notice_for(get_local_commit(), get_remote_commit_cached())
+    if notice:
+        print(notice)
         return True
-    else:
-        # Up to date
-        return False
+    return False
+
+def _run_update_check():
+    global _update_notice
+    _update_notice = _update_notice_for(get_local_commit(), get_remote_commit_cached())
+
+def start_update_check():
+    """Check for updates on a background thread; read the result with pop_update_notice."""
+    global _update_thread
+    if _update_thread is not None:
+        return
+    _update_thread = threading.Thread(target=_run_update_check, name="update-check", daemon=True)
+    _update_thread.start()
+
+def pop_update_notice() -> str | None:
+    """Return the update notice once it is ready, at most once per run."""
+    global _update_notice
+    notice, _update_notice = _update_notice, None
+    return notice
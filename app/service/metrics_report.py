@@ -0,0 +1,95 @@
+"""`main.py stats`: API call metrics per endpoint path, gathered across runs."""
+import json
+
+from app.client.metrics import LATENCY_BUCKETS, get_metrics, reset_metrics, write_prometheus_textfile
+
+
+def histogram_quantile(q: float, buckets: list[int]) -> float | None:
+    """Estimate a latency quantile (seconds) from histogram bucket counts.
+
+    Interpolates linearly inside the bucket, like Prometheus does; samples
+    in the +Inf bucket are reported as the largest finite bound.
+    """
+    total = sum(buckets)
+    if total == 0:
+        return None
+    rank = q * total
+    seen = 0
+    lower = 0.0
+    for bound, count in zip(LATENCY_BUCKETS, buckets):
+        if count and seen + count >= rank:
+            return lower + (bound - lower) * (rank - seen) / count
+        seen += count
+        lower = bound
+    return LATENCY_BUCKETS[-1]
+
+
+def _ms(seconds: float | None) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+
+def _avg_ms(total_seconds: float, count: int) -> str:
+    return f"{total_seconds / count * 1000:.1f}" if count else "-"
+
+
+def _kb(value: int) -> str:
+    return f"{value / 1024:.1f}"
+
+
+def print_metrics_report(totals: dict[str, dict]) -> None:
+    if not totals:
+        print("Belum ada metrik. Metrik terkumpul setiap kali aplikasi memanggil API.")
+        return
+
+    rows = []
+    for path, entry in sorted(totals.items(), key=lambda item: item[1]["requests"], reverse=True):
+        lookups = entry["cache_hits"] + entry["cache_misses"]
+        rows.append([
+            path,
+            str(entry["requests"]),
+            str(entry["errors"]),
+            str(entry["retries"]),
+            _avg_ms(entry["latency_seconds"], entry["requests"]),
+            _ms(histogram_quantile(0.5, entry["latency_buckets"])),
+            _ms(histogram_quantile(0.95, entry["latency_buckets"])),
+            _kb(entry["bytes_out"]),
+            _kb(entry["bytes_in"]),
+            _avg_ms(entry["encrypt_seconds"], entry["encrypts"]),
+            _avg_ms(entry["decrypt_seconds"], entry["decrypts"]),
+            str(entry["decrypt_errors"]),
+            f"{entry['cache_hits']}/{lookups}" if lookups else "-",
+        ])
+
+    headers = [
+        "path", "req", "err", "retry", "avg ms", "p50", "p95",
+        "out KB", "in KB", "enc ms", "dec ms", "dec err", "cache",
+    ]
+    widths = [max(len(header), *(len(row[i]) for row in rows)) for i, header in enumerate(headers)]
+    print("  ".join(header.ljust(widths[0]) if i == 0 else header.rjust(widths[i]) for i, header in enumerate(headers)))
+    print("  ".join("-" * width for width in widths))
+    for row in rows:
+        print("  ".join(cell.ljust(widths[0]) if i == 0 else cell.rjust(widths[i]) for i, cell in enumerate(row)))
+
+    requests = sum(entry["requests"] for entry in totals.values())
+    decrypt_errors = sum(entry["decrypt_errors"] for entry in totals.values())
+    print("-" * 55)
+    print(f"Total: {requests} request, {decrypt_errors} gagal decrypt, {len(totals)} path.")
+
+
+def show_stats(as_json: bool = False, prometheus_path: str | None = None, reset: bool = False) -> dict:
+    if reset:
+        reset_metrics()
+        print("Metrik direset.")
+        return {}
+
+    totals = get_metrics()
+    if prometheus_path:
+        if write_prometheus_textfile(prometheus_path, totals):
+            print(f"Metrik Prometheus ditulis ke {prometheus_path}")
+        return totals
+
+    if as_json:
+        print(json.dumps(totals, indent=2))
+    else:
+        print_metrics_report(totals)
+    return totals
@@ -0,0 +1,362 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from random import randint
+from typing import Callable
+
+from app.client.engsel import get_package
+from app.client.purchase.balance import settlement_balance
+from app.client.purchase.common import PREPARED_PAYMENT_TTL, prepare_payment
+from app.client.timing import PurchaseTrace
+from app.menus.util import pause
+from app.service.auth import AuthInstance
+from app.service.purchase_timing import TimingRun
+from app.type_dict import PaymentItem
+
+DEFAULT_PURCHASE_CONCURRENCY = 3
+# How long a prefetched option detail (and its token_confirmation) is
+# trusted before the settlement fetches it again. Like the payment token,
+# the server does not publish its lifetime.
+PREPARED_DETAIL_TTL = PREPARED_PAYMENT_TTL
+
+
+@dataclass
+class PurchaseTarget:
+    variant_name: str
+    variant_code: str
+    option_order: int
+    option_name: str
+    option_price: int
+    option_code: str
+
+    @property
+    def label(self) -> str:
+        return f"{self.variant_name}|{self.option_order}. {self.option_name} - {self.option_price}"
+
+
+@dataclass
+class PurchaseResult:
+    target: PurchaseTarget
+    status: str = "pending"  # pending | success | failed
+    error: str = ""
+    amount: int = 0
+    prepared_ahead: bool = False
+    prepare_seconds: float = 0.0
+    settle_seconds: float = 0.0
+    response: dict | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "variant_name": self.target.variant_name,
+            "variant_code": self.target.variant_code,
+            "option_order": self.target.option_order,
+            "option_name": self.target.option_name,
+            "option_price": self.target.option_price,
+            "option_code": self.target.option_code,
+            "status": self.status,
+            "error": self.error,
+            "amount": self.amount,
+            "prepared_ahead": self.prepared_ahead,
+            "prepare_seconds": round(self.prepare_seconds, 3),
+            "settle_seconds": round(self.settle_seconds, 3),
+        }
+
+
+@dataclass
+class PreparedPurchase:
+    items: list[PaymentItem] = field(default_factory=list)
+    amount: int = 0
+    token_confirmation_idx: int = 0
+    payment: dict | None = None
+    error: str = ""
+    seconds: float = 0.0
+    fetched_at: float = 0.0
+
+    def is_stale(self, ttl: float = PREPARED_DETAIL_TTL) -> bool:
+        return time.monotonic() - self.fetched_at >= ttl
+
+
+def family_targets(family_data: dict, start_from_option: int = 1) -> list[PurchaseTarget]:
+    """Every option of the family in menu order, starting at start_from_option."""
+    targets = []
+    start_buying = start_from_option <= 1
+    for variant in family_data["package_variants"]:
+        for option in variant["package_options"]:
+            if not start_buying and option["order"] == start_from_option:
+                start_buying = True
+            if not start_buying:
+                print(f"Skipping option {option['order']}. {option['name']}")
+                continue
+            targets.append(PurchaseTarget(
+                variant_name=variant["name"],
+                variant_code=variant["package_variant_code"],
+                option_order=option["order"],
+                option_name=option["name"],
+                option_price=option["price"],
+                option_code=option["package_option_code"],
+            ))
+    return targets
+
+
+def _payment_item(package_detail: dict) -> PaymentItem:
+    return PaymentItem(
+        item_code=package_detail["package_option"]["package_option_code"],
+        product_type="",
+        item_price=package_detail["package_option"]["price"],
+        item_name=str(randint(1000, 9999)) + " " + package_detail["package_option"]["name"],
+        tax=0,
+        token_confirmation=package_detail["token_confirmation"],
+    )
+
+
+class PurchaseEngine:
+    """Buys a list of options with BALANCE, pipelining the preparation.
+
+    Settlements run one at a time, in order. While one settles, a pool of
+    ``concurrency`` workers fetches the option detail, the decoy detail and
+    the payment token (intercept-page + payment-methods-option) of the next
+    options, so each settlement usually needs a single round trip.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        targets: list[PurchaseTarget],
+        decoy_option_code: str | None = None,
+        concurrency: int = DEFAULT_PURCHASE_CONCURRENCY,
+        delay_seconds: int = 0,
+        pause_on_success: bool = False,
+        tokens_provider: Callable[[], dict | None] | None = None,
+        journal=None,
+        min_settle_interval: float = 0,
+        label: str | None = None,
+        timings: TimingRun | None = None,
+    ):
+        self.api_key = api_key
+        self.targets = targets
+        self.decoy_option_code = decoy_option_code
+        self.concurrency = max(1, int(concurrency))
+        self.delay_seconds = delay_seconds
+        self.pause_on_success = pause_on_success
+        self.tokens_provider = tokens_provider or AuthInstance.get_active_tokens
+        self.journal = journal
+        # Minimum seconds between the starts of two settlements, regardless
+        # of their outcome; delay_seconds only applies after a success.
+        self.min_settle_interval = min_settle_interval
+        # With a label, progress is one prefixed line per option so several
+        # engines can share the terminal.
+        self.label = label
+        self.timings = timings
+        self.results = [PurchaseResult(target) for target in targets]
+        # Prefetch workers and the settlement share one trace per option.
+        self.traces = [
+            PurchaseTrace(target.label if label is None else f"{label} {target.label}") for target in targets
+        ]
+        self._last_settle_at = None
+
+    def _log(self, message: str) -> None:
+        if self.label is None:
+            print(message)
+
+    def _wait_for_rate_limit(self) -> None:
+        if self._last_settle_at is not None and self.min_settle_interval > 0:
+            wait = self._last_settle_at + self.min_settle_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+        self._last_settle_at = time.monotonic()
+
+    def _tokens(self) -> dict:
+        tokens = self.tokens_provider()
+        if not tokens:
+            raise RuntimeError("No active tokens")
+        return tokens
+
+    def prepare(self, target: PurchaseTarget) -> PreparedPurchase:
+        started = time.monotonic()
+        prepared = PreparedPurchase()
+        try:
+            tokens = self._tokens()
+            prepared.fetched_at = time.monotonic()
+            target_detail = get_package(self.api_key, tokens, target.option_code, use_cache=False, quiet=True)
+            if not target_detail:
+                prepared.error = "Failed to get package details"
+                return prepared
+
+            prepared.items.append(_payment_item(target_detail))
+            prepared.amount = target_detail["package_option"]["price"]
+
+            if self.decoy_option_code:
+                decoy_detail = get_package(self.api_key, tokens, self.decoy_option_code, use_cache=False, quiet=True)
+                if not decoy_detail:
+                    prepared.error = "Failed to load decoy package details"
+                    return prepared
+                prepared.items.append(_payment_item(decoy_detail))
+                prepared.amount += decoy_detail["package_option"]["price"]
+                # The decoy carries the token confirmation for the settlement.
+                prepared.token_confirmation_idx = 1
+
+            # A missing payment token is not fatal; the settlement fetches one.
+            prepared.payment = prepare_payment(
+                self.api_key, tokens, prepared.items, prepared.token_confirmation_idx, quiet=True
+            )
+            if self.journal is not None:
+                self.journal.mark_detail_fetched(target)
+        except Exception as e:
+            prepared.error = f"Exception while preparing: {e}"
+        finally:
+            prepared.seconds = time.monotonic() - started
+        return prepared
+
+    def settle(self, result: PurchaseResult, prepared: PreparedPurchase) -> None:
+        self._wait_for_rate_limit()
+        started = time.monotonic()
+        tokens = self._tokens()
+        quiet = self.label is not None
+        result.amount = prepared.amount
+        res = settlement_balance(
+            self.api_key,
+            tokens,
+            prepared.items,
+            "🤑",
+            False,
+            overwrite_amount=prepared.amount,
+            token_confirmation_idx=prepared.token_confirmation_idx,
+            prepared_payment=prepared.payment,
+            quiet=quiet,
+        )
+
+        error_msg = ""
+        if not isinstance(res, dict):
+            error_msg = str(res) or "Invalid settlement response"
+        elif res.get("status", "") != "SUCCESS":
+            error_msg = res.get("message", "") or "Unknown error"
+            if "Bizz-err.Amount.Total" in error_msg:
+                valid_amount = int(error_msg.split("=")[1].strip())
+                self._log(f"Adjusted total amount to: {valid_amount}")
+                result.amount = valid_amount
+                # The first attempt consumed the prepared token_payment.
+                res = settlement_balance(
+                    self.api_key,
+                    tokens,
+                    prepared.items,
+                    "SHARE_PACKAGE",
+                    False,
+                    overwrite_amount=valid_amount,
+                    token_confirmation_idx=-1,
+                    quiet=quiet,
+                )
+                if isinstance(res, dict) and res.get("status", "") == "SUCCESS":
+                    error_msg = ""
+                else:
+                    error_msg = res.get("message", "") if isinstance(res, dict) else str(res)
+                    error_msg = error_msg or "Unknown error"
+
+        result.response = res if isinstance(res, dict) else None
+        result.status = "failed" if error_msg else "success"
+        result.error = error_msg
+        result.settle_seconds = time.monotonic() - started
+
+    def _report_outcome(self, result: PurchaseResult) -> None:
+        if self.label is None:
+            return
+        outcome = "OK" if result.status == "success" else f"GAGAL ({result.error})"
+        print(f"[{self.label}] {result.target.label}: {outcome}")
+
+    def _record_timing(self, index: int) -> None:
+        if self.timings is None:
+            return
+        trace = self.traces[index]
+        trace.status = "SUCCESS" if self.results[index].status == "success" else "FAILED"
+        self.timings.add(trace)
+
+    def run(self) -> list[PurchaseResult]:
+        total = len(self.targets)
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="purchase-prep")
+        pending = {}
+        try:
+            submitted = 0
+            for index, result in enumerate(self.results):
+                # Keep up to `concurrency` options prepared ahead, counting this one.
+                while submitted < min(total, index + self.concurrency):
+                    pending[submitted] = executor.submit(
+                        self.traces[submitted].call, self.prepare, self.targets[submitted]
+                    )
+                    submitted += 1
+
+                target = result.target
+                self._log(f"Pruchase {index + 1} of {total}...")
+                self._log(f"Trying to buy: {target.variant_name} - {target.option_order}. {target.option_name} - {target.option_price}")
+
+                future = pending.pop(index)
+                result.prepared_ahead = future.done()
+                prepared = future.result()
+                if not prepared.error and prepared.is_stale():
+                    self._log("Prepared details are too old, fetching them again...")
+                    prepared = self.traces[index].call(self.prepare, target)
+                    result.prepared_ahead = False
+                result.prepare_seconds = prepared.seconds
+                if prepared.error:
+                    result.status = "failed"
+                    result.error = prepared.error
+                    if self.journal is not None:
+                        self.journal.record_result(result)
+                    self._log(f"{prepared.error} for {target.variant_name} - {target.option_name}. Skipping.")
+                    self._log("-------------------------------------------------------")
+                    self._report_outcome(result)
+                    self._record_timing(index)
+                    continue
+
+                if self.journal is not None:
+                    # Fsynced before the settlement can go out, so --resume
+                    # never replays a purchase that may have been paid.
+                    self.journal.mark_settling(target)
+                try:
+                    with self.traces[index].activate():
+                        self.settle(result, prepared)
+                except Exception as e:
+                    self._log(f"Exception occurred while creating order: {e}")
+                    result.status = "failed"
+                    result.error = str(e)
+                if self.journal is not None:
+                    self.journal.record_result(result)
+
+                if result.status == "success":
+                    self._log("Purchase successful!")
+                    if self.pause_on_success:
+                        pause()
+                self._log("-------------------------------------------------------")
+                self._report_outcome(result)
+                self._record_timing(index)
+
+                should_delay = result.status == "success" or "Failed call ipaas purchase" in result.error
+                if self.delay_seconds > 0 and should_delay and index < total - 1:
+                    self._log(f"Waiting for {self.delay_seconds} seconds before next purchase...")
+                    time.sleep(self.delay_seconds)
+        finally:
+            # On Ctrl+C, don't wait for prefetches of options that won't be bought.
+            for future in pending.values():
+                future.cancel()
+            executor.shutdown(wait=False)
+        return self.results
+
+
+def print_purchase_report(title: str, results: list[PurchaseResult]) -> None:
+    successful = [result for result in results if result.status == "success"]
+    failed = [result for result in results if result.status == "failed"]
+    print(f"{title}\nSuccessful: {len(successful)}")
+    if successful:
+        print("-" * 55)
+        print("Successful purchases:")
+        for result in successful:
+            print(f"- {result.target.label}")
+    if failed:
+        print("-" * 55)
+        print("Failed purchases:")
+        for result in failed:
+            print(f"- {result.target.label}: {result.error}")
+    prepared_ahead = sum(1 for result in results if result.prepared_ahead)
+    if results:
+        print("-" * 55)
+        print(f"Prepared ahead: {prepared_ahead}/{len(results)}, "
+              f"settlement time: {sum(result.settle_seconds for result in results):.1f}s")
+    print("-" * 55)
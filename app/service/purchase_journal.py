@@ -0,0 +1,156 @@
+"""Write-ahead journal for bulk purchases.
+
+Each run is one JSONL file under ~/.myxl-cli/purchase-journal. The first
+line describes the run and its full option list, so a resumed run does not
+need the family again. Every state change of an option is appended and
+fsynced before the run moves on, so the journal survives a crash or Ctrl+C.
+
+An option is "detail-fetched" once it is prepared (possibly ahead of its
+turn) and "settling" right before its settlement request goes out. Only a
+settling option can have been paid without a recorded outcome.
+"""
+import glob
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+from app.service.purchase_engine import PurchaseTarget
+
+JOURNAL_DIR = os.path.join(os.path.expanduser("~/.myxl-cli"), "purchase-journal")
+
+STATE_PENDING = "pending"
+STATE_DETAIL_FETCHED = "detail-fetched"
+STATE_SETTLING = "settling"
+STATE_SETTLED = "settled"
+STATE_FAILED = "failed"
+
+
+def _target_key(target: PurchaseTarget) -> str:
+    return f"{target.variant_code}|{target.option_order}|{target.option_code}"
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]", "_", value) or "family"
+
+
+class PurchaseJournal:
+    def __init__(self, path: str, run: dict, targets: list[PurchaseTarget], states: dict | None = None):
+        self.path = path
+        self.run = run
+        self.targets = targets
+        # target key -> {"state": ..., "error": ..., "time": ...}
+        self.states: dict[str, dict] = states or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(
+        cls,
+        family_code: str,
+        family_name: str,
+        targets: list[PurchaseTarget],
+        use_decoy: bool,
+        directory: str = JOURNAL_DIR,
+    ) -> "PurchaseJournal":
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path = os.path.join(directory, f"{_safe_name(family_code)}-{stamp}.jsonl")
+        run = {
+            "type": "run",
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "family_code": family_code,
+            "family_name": family_name,
+            "use_decoy": use_decoy,
+            "targets": [target.__dict__ for target in targets],
+        }
+        journal = cls(path, run, targets)
+        journal._append(run)
+        for target in targets:
+            journal.record(target, STATE_PENDING)
+        return journal
+
+    @classmethod
+    def load(cls, path: str) -> "PurchaseJournal":
+        run = None
+        states = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-write.
+                    continue
+                if record.get("type") == "run":
+                    run = record
+                elif record.get("type") == "state":
+                    states[record["key"]] = {
+                        "state": record["state"],
+                        "error": record.get("error", ""),
+                        "time": record.get("time"),
+                    }
+        if run is None:
+            raise ValueError(f"{path} is not a purchase journal")
+        targets = [PurchaseTarget(**target) for target in run["targets"]]
+        return cls(path, run, targets, states)
+
+    @classmethod
+    def find_latest(cls, family_code: str | None = None, directory: str = JOURNAL_DIR) -> "PurchaseJournal | None":
+        pattern = f"{_safe_name(family_code)}-*.jsonl" if family_code else "*.jsonl"
+        for path in sorted(glob.glob(os.path.join(directory, pattern)), key=os.path.getmtime, reverse=True):
+            try:
+                return cls.load(path)
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+        return None
+
+    def _append(self, record: dict) -> None:
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def record(self, target: PurchaseTarget, state: str, error: str = "") -> None:
+        key = _target_key(target)
+        now = datetime.now().isoformat(timespec="seconds")
+        self._append({"type": "state", "time": now, "key": key, "state": state, "error": error})
+        self.states[key] = {"state": state, "error": error, "time": now}
+
+    def mark_detail_fetched(self, target: PurchaseTarget) -> None:
+        self.record(target, STATE_DETAIL_FETCHED)
+
+    def mark_settling(self, target: PurchaseTarget) -> None:
+        self.record(target, STATE_SETTLING)
+
+    def record_result(self, result) -> None:
+        if result.status == "success":
+            self.record(result.target, STATE_SETTLED)
+        else:
+            self.record(result.target, STATE_FAILED, result.error)
+
+    def state_of(self, target: PurchaseTarget) -> str:
+        return self.states.get(_target_key(target), {}).get("state", STATE_PENDING)
+
+    def remaining_targets(self, include_interrupted: bool = False) -> list[PurchaseTarget]:
+        """Targets safe to buy again: pending, detail-fetched or failed.
+
+        Interrupted (settling) targets may already be paid; they are only
+        included when the user confirmed it.
+        """
+        skipped = {STATE_SETTLED} if include_interrupted else {STATE_SETTLED, STATE_SETTLING}
+        return [target for target in self.targets if self.state_of(target) not in skipped]
+
+    def interrupted_targets(self) -> list[PurchaseTarget]:
+        """Targets whose settlement may have been sent without a recorded outcome."""
+        return [target for target in self.targets if self.state_of(target) == STATE_SETTLING]
+
+    def counts(self) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for target in self.targets:
+            state = self.state_of(target)
+            counts[state] = counts.get(state, 0) + 1
+        return counts
@@ -0,0 +1,227 @@
+"""Bulk purchases across several stored accounts at once.
+
+The option list is resolved once, then every account gets its own
+PurchaseEngine running on the account's pooled session. Accounts run in
+parallel up to ``parallel_accounts``; within an account, settlements stay
+sequential and are spaced by ``min_settle_interval``.
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from app.client.engsel import get_family
+from app.service.auth import AuthInstance
+from app.service.purchase_engine import (
+    DEFAULT_PURCHASE_CONCURRENCY,
+    PurchaseEngine,
+    PurchaseResult,
+    PurchaseTarget,
+    family_targets,
+)
+from app.service.purchase_timing import TimingRun
+
+HOT_LIST_PATH = "hot_data/hot.json"
+REPORT_DIR = os.path.join(os.path.expanduser("~/.myxl-cli"), "purchase-reports")
+# Default minimum seconds between two settlements of the same account.
+DEFAULT_SETTLE_INTERVAL = 2.0
+
+
+@dataclass
+class AccountRun:
+    number: int
+    results: list[PurchaseResult] = field(default_factory=list)
+    error: str = ""
+    seconds: float = 0.0
+
+    @property
+    def succeeded(self) -> list[PurchaseResult]:
+        return [result for result in self.results if result.status == "success"]
+
+    @property
+    def failed(self) -> list[PurchaseResult]:
+        return [result for result in self.results if result.status != "success"]
+
+
+def load_hot_entries(indexes: list[int] | None = None, path: str = HOT_LIST_PATH) -> list[dict]:
+    """Hot list entries by 1-based menu number; all of them when indexes is empty."""
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    if not indexes:
+        return entries
+    return [entries[index - 1] for index in indexes if 1 <= index <= len(entries)]
+
+
+def _matches_variant(entry: dict, variant: dict) -> bool:
+    if entry.get("variant_code"):
+        return entry["variant_code"] == variant["package_variant_code"]
+    return entry.get("variant_name") == variant["name"]
+
+
+def resolve_hot_targets(api_key: str, tokens: dict, entries: list[dict]) -> list[PurchaseTarget]:
+    targets = []
+    families = {}
+    for entry in entries:
+        family_code = entry["family_code"]
+        if family_code not in families:
+            families[family_code] = get_family(api_key, tokens, family_code, entry.get("is_enterprise"))
+        family_data = families[family_code]
+        if not family_data:
+            continue
+
+        target = None
+        for variant in family_data["package_variants"]:
+            if not _matches_variant(entry, variant):
+                continue
+            for option in variant["package_options"]:
+                if option["order"] == entry["order"]:
+                    target = PurchaseTarget(
+                        variant_name=variant["name"],
+                        variant_code=variant["package_variant_code"],
+                        option_order=option["order"],
+                        option_name=option["name"],
+                        option_price=option["price"],
+                        option_code=option["package_option_code"],
+                    )
+                    break
+        if target is None:
+            print(f"Opsi {entry.get('variant_name', '')} #{entry['order']} tidak ditemukan di {family_code}.")
+            continue
+        targets.append(target)
+    return targets
+
+
+class PurchaseScheduler:
+    def __init__(
+        self,
+        api_key: str,
+        numbers: list[int],
+        family_code: str | None = None,
+        hot_entries: list[dict] | None = None,
+        start_from_option: int = 1,
+        parallel_accounts: int = 4,
+        concurrency: int = DEFAULT_PURCHASE_CONCURRENCY,
+        min_settle_interval: float = DEFAULT_SETTLE_INTERVAL,
+        delay_seconds: int = 0,
+    ):
+        self.api_key = api_key
+        self.numbers = [int(number) for number in numbers]
+        self.family_code = family_code
+        self.hot_entries = hot_entries
+        self.start_from_option = start_from_option
+        self.parallel_accounts = max(1, int(parallel_accounts))
+        self.concurrency = concurrency
+        self.min_settle_interval = min_settle_interval
+        self.delay_seconds = delay_seconds
+        self.title = ""
+        self.timings: TimingRun | None = None
+
+    def resolve_targets(self, tokens: dict) -> list[PurchaseTarget]:
+        if self.family_code:
+            family_data = get_family(self.api_key, tokens, self.family_code)
+            if not family_data:
+                return []
+            self.title = f"Family: {family_data['package_family']['name']}"
+            return family_targets(family_data, self.start_from_option)
+
+        self.title = "Hot list"
+        return resolve_hot_targets(self.api_key, tokens, self.hot_entries or [])
+
+    def _run_account(self, number: int, targets: list[PurchaseTarget]) -> AccountRun:
+        run = AccountRun(number)
+        started = time.monotonic()
+        if AuthInstance.get_session_tokens(number) is None:
+            run.error = "Tidak ada sesi aktif untuk nomor ini"
+            run.results = [PurchaseResult(target, status="failed", error=run.error) for target in targets]
+            print(f"[{number}] {run.error}.")
+            return run
+
+        engine = PurchaseEngine(
+            self.api_key,
+            targets,
+            concurrency=self.concurrency,
+            delay_seconds=self.delay_seconds,
+            tokens_provider=lambda: AuthInstance.get_session_tokens(number),
+            min_settle_interval=self.min_settle_interval,
+            label=str(number),
+            timings=self.timings,
+        )
+        try:
+            run.results = engine.run()
+        except Exception as e:
+            run.error = str(e)
+            run.results = engine.results
+        run.seconds = time.monotonic() - started
+        return run
+
+    def run(self) -> list[AccountRun]:
+        print(f"Preparing sessions for {len(self.numbers)} account(s)...")
+        AuthInstance.warm_sessions()
+        AuthInstance.start_token_refresher()
+
+        resolver = next(
+            (tokens for tokens in map(AuthInstance.get_session_tokens, self.numbers) if tokens),
+            None,
+        )
+        if resolver is None:
+            print("Tidak ada akun dengan sesi aktif.")
+            return []
+        targets = self.resolve_targets(resolver)
+        if not targets:
+            print("Tidak ada opsi untuk dibeli.")
+            return []
+
+        self.timings = TimingRun(self.title)
+        print(f"Membeli {len(targets)} opsi di {len(self.numbers)} akun...")
+        workers = min(self.parallel_accounts, len(self.numbers))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="purchase-account") as executor:
+            return list(executor.map(lambda number: self._run_account(number, targets), self.numbers))
+
+
+def print_scheduler_report(title: str, runs: list[AccountRun]) -> None:
+    print("=" * 55)
+    print(title)
+    print("=" * 55)
+    print(f"{'Nomor':<16}{'Sukses':>8}{'Gagal':>8}{'Total Rp':>12}{'Waktu':>9}")
+    for run in runs:
+        spent = sum(result.amount for result in run.succeeded)
+        print(f"{run.number:<16}{len(run.succeeded):>8}{len(run.failed):>8}{spent:>12,}{run.seconds:>8.1f}s")
+    print("-" * 55)
+    total_ok = sum(len(run.succeeded) for run in runs)
+    total = sum(len(run.results) for run in runs)
+    print(f"Sukses {total_ok}/{total} pembelian di {len(runs)} akun.")
+
+    failures = [(run.number, result) for run in runs for result in run.failed]
+    if failures:
+        print("-" * 55)
+        print("Gagal:")
+        for number, result in failures:
+            print(f"- {number} {result.target.label}: {result.error}")
+    print("-" * 55)
+
+
+def save_scheduler_report(title: str, runs: list[AccountRun], directory: str = REPORT_DIR) -> str | None:
+    report = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "title": title,
+        "accounts": [
+            {
+                "number": run.number,
+                "error": run.error,
+                "seconds": round(run.seconds, 3),
+                "results": [result.to_dict() for result in run.results],
+            }
+            for run in runs
+        ],
+    }
+    try:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"purchase-{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    except OSError as e:
+        print(f"Gagal menyimpan laporan: {e}")
+        return None
+    return path
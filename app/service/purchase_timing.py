@@ -0,0 +1,133 @@
+"""Per-phase latency of purchases.
+
+A purchase trace collects spans for package detail, intercept-page,
+payment-methods-option, signing, the settlement POST and decrypt. Client
+code marks phases with ``phase()`` from app.client.timing; this module
+starts the traces and reports on them.
+
+Finished traces are appended to ~/.myxl-cli/purchase-timings.jsonl. Bulk
+runs also print a p50/p95/p99 summary per phase and log it there.
+"""
+import functools
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+from app.client.timing import PHASES, PurchaseTrace, _current_trace
+
+TIMING_LOG_PATH = os.path.join(os.path.expanduser("~/.myxl-cli"), "purchase-timings.jsonl")
+
+_log_lock = threading.Lock()
+
+
+def _append_log(records: list[dict], path: str = TIMING_LOG_PATH) -> None:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with _log_lock, open(path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"Gagal menulis log timing: {e}")
+
+
+def traced_purchase(label: str):
+    """Trace an interactive purchase menu; logged only if it reached a settlement."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = PurchaseTrace(label)
+            try:
+                with trace.activate():
+                    return fn(*args, **kwargs)
+            finally:
+                if trace.settled:
+                    _append_log([trace.to_record()])
+        return wrapper
+    return decorator
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class TimingRun:
+    """Traces of one bulk run, summarised per phase when the run ends."""
+
+    def __init__(self, title: str, log_path: str = TIMING_LOG_PATH):
+        self.title = title
+        self.log_path = log_path
+        self.run_id = uuid.uuid4().hex[:12]
+        self.traces: list[PurchaseTrace] = []
+        self._tracked: PurchaseTrace | None = None
+        self._token = None
+        self._lock = threading.Lock()
+
+    def add(self, trace: PurchaseTrace) -> None:
+        with self._lock:
+            self.traces.append(trace)
+        _append_log([trace.to_record(self.run_id)], self.log_path)
+
+    def track(self, label: str) -> PurchaseTrace:
+        """Start the trace of the next purchase in a sequential loop.
+
+        The previous tracked trace is closed and kept first.
+        """
+        self._close_tracked()
+        trace = PurchaseTrace(label)
+        self._tracked = trace
+        self._token = _current_trace.set(trace)
+        return trace
+
+    def _close_tracked(self) -> None:
+        if self._tracked is None:
+            return
+        _current_trace.reset(self._token)
+        if self._tracked.phases:
+            self.add(self._tracked)
+        self._tracked, self._token = None, None
+
+    def summary(self) -> dict[str, dict]:
+        summary = {}
+        for name in PHASES:
+            values = sorted(
+                trace.seconds(name) * 1000 for trace in self.traces if trace.seconds(name) is not None
+            )
+            if not values:
+                continue
+            summary[name] = {
+                "count": len(values),
+                "p50": round(percentile(values, 50), 1),
+                "p95": round(percentile(values, 95), 1),
+                "p99": round(percentile(values, 99), 1),
+                "max": round(values[-1], 1),
+            }
+        return summary
+
+    def print_summary(self, summary: dict[str, dict]) -> None:
+        print(f"Latency per phase (ms, {len(self.traces)} purchases)")
+        print(f"{'phase':<18}{'n':>5}{'p50':>10}{'p95':>10}{'p99':>10}")
+        for name, stats in summary.items():
+            print(f"{name:<18}{stats['count']:>5}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}")
+        print("-" * 55)
+
+    def finish(self) -> dict[str, dict]:
+        self._close_tracked()
+        summary = self.summary()
+        if not summary:
+            return summary
+        self.print_summary(summary)
+        _append_log([{
+            "type": "summary",
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "run": self.run_id,
+            "title": self.title,
+            "purchases": len(self.traces),
+            "phases": summary,
+        }], self.log_path)
+        return summary
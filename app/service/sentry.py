@@ -1,37 +1,237 @@
-from app.client.engsel import get_package, send_api_request
-from app.menus.util import clear_screen, pause
+import asyncio
 import json
+import os
+import random
+import sys
+import threading
+from dataclasses import dataclass, field
 from datetime import datetime
+
+from app.client.engsel import async_get_quota_details
+from app.menus.util import clear_screen, pause
 from app.service.auth import AuthInstance
-from time import sleep
-import threading
-import sys
-import os
+from app.service.config import load_config, prompt_bool
+from app.service.sentry_store import ColumnarSentryStore
+
+# Polling interval bounds per account, in seconds. Quotas that just changed
+# are polled at MIN_INTERVAL; each unchanged poll stretches the interval by
+# IDLE_GROWTH up to MAX_INTERVAL.
+MIN_INTERVAL = 1.0
+MAX_INTERVAL = 30.0
+IDLE_GROWTH = 1.5
+# Failed polls (including 429s that outlast the transport retries) back off
+# exponentially from ERROR_BACKOFF up to MAX_ERROR_BACKOFF.
+ERROR_BACKOFF = 2.0
+MAX_ERROR_BACKOFF = 300.0
+
+
+def _quota_map(quotas: list[dict]) -> dict[str, dict]:
+    """Index quotas by quota_code; repeated codes get a #n suffix."""
+    indexed = {}
+    for quota in quotas:
+        base = str(quota.get("quota_code") or quota.get("name") or "")
+        key = base
+        n = 1
+        while key in indexed:
+            n += 1
+            key = f"{base}#{n}"
+        indexed[key] = quota
+    return indexed
+
+
+def diff_quotas(previous: dict[str, dict], current: dict[str, dict]) -> dict:
+    """Quota-level delta between two snapshots from _quota_map."""
+    return {
+        "added": [current[key] for key in current.keys() - previous.keys()],
+        "removed": sorted(previous.keys() - current.keys()),
+        "changed": [
+            current[key]
+            for key in current.keys() & previous.keys()
+            if current[key] != previous[key]
+        ],
+    }
+
+
+@dataclass
+class AccountWatch:
+    number: int
+    interval: float = MIN_INTERVAL
+    failures: int = 0
+    polls: int = 0
+    changes: int = 0
+    last_quotas: dict[str, dict] | None = None
+    last_error: str = ""
+    next_poll_at: float = field(default=0.0)
+
+
+class SentryEngine:
+    """Watches quota-details for several accounts on one event loop.
 
+    The first successful poll of an account is logged as a full snapshot,
+    later polls as deltas against the previous one when something changed,
+    or as a bare "seen" record when nothing did, so the analysis knows how
+    long the values held. With a columnar store, changed benefits are also
+    appended there as typed rows.
+    """
 
-def enter_sentry_mode():
+    def __init__(
+        self,
+        api_key: str,
+        numbers: list[int],
+        log_path: str | None,
+        store: ColumnarSentryStore | None = None,
+    ):
+        self.api_key = api_key
+        self.watches = [AccountWatch(number=int(number)) for number in numbers]
+        self.log_path = log_path
+        self.store = store
+        self._log_file = None
+        self._loop = None
+        self._stop = None
+
+    def stop(self) -> None:
+        """Thread-safe; ends run() after the polls in flight finish."""
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        try:
+            if self.log_path:
+                self._log_file = open(self.log_path, "a", encoding="utf-8")
+            await asyncio.gather(
+                self._report_status(),
+                *(self._watch(watch) for watch in self.watches),
+            )
+        finally:
+            if self._log_file is not None:
+                self._log_file.close()
+            if self.store is not None:
+                self.store.close()
+
+    def _tokens_for(self, number: int) -> dict | None:
+        # Sessions are renewed by the Auth background refresher; read the
+        # current tokens on every poll instead of holding on to one set.
+        session = AuthInstance.sessions.get(number)
+        if session is not None:
+            return session["tokens"]
+        active = AuthInstance.active_user
+        if active and active["number"] == number:
+            return active["tokens"]
+        return None
+
+    def _write(self, record: dict) -> None:
+        if self._log_file is None:
+            return
+        self._log_file.write(json.dumps(record) + "\n")
+        self._log_file.flush()
+
+    async def _sleep(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _poll(self, watch: AccountWatch) -> None:
+        tokens = self._tokens_for(watch.number)
+        if tokens is None:
+            raise RuntimeError("no live session")
+
+        data = await async_get_quota_details(self.api_key, tokens)
+        if data is None:
+            raise RuntimeError("quota-details request failed")
+
+        now = datetime.now()
+        timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
+        quotas = data.get("quotas", [])
+        current = _quota_map(quotas)
+        watch.polls += 1
+        if self.store is not None:
+            self.store.record_quotas(now.timestamp(), watch.number, quotas)
+
+        if watch.last_quotas is None:
+            self._write({
+                "time": timestamp,
+                "number": watch.number,
+                "type": "snapshot",
+                "quotas": list(current.values()),
+            })
+            watch.last_quotas = current
+            return
+
+        delta = diff_quotas(watch.last_quotas, current)
+        watch.last_quotas = current
+        if delta["added"] or delta["removed"] or delta["changed"]:
+            watch.changes += 1
+            watch.interval = MIN_INTERVAL
+            self._write({"time": timestamp, "number": watch.number, "type": "delta", **delta})
+        else:
+            watch.interval = min(watch.interval * IDLE_GROWTH, MAX_INTERVAL)
+            self._write({"time": timestamp, "number": watch.number, "type": "seen"})
+
+    async def _watch(self, watch: AccountWatch) -> None:
+        # Spread the first polls so accounts don't hit the API in lockstep.
+        await self._sleep(random.uniform(0, MIN_INTERVAL))
+        while not self._stop.is_set():
+            try:
+                await self._poll(watch)
+                watch.failures = 0
+                watch.last_error = ""
+                delay = watch.interval
+            except Exception as e:
+                watch.failures += 1
+                watch.last_error = str(e)
+                delay = min(ERROR_BACKOFF * (2 ** (watch.failures - 1)), MAX_ERROR_BACKOFF)
+                delay *= random.uniform(0.8, 1.2)
+            watch.next_poll_at = self._loop.time() + delay
+            await self._sleep(delay)
+
+    async def _report_status(self) -> None:
+        while not self._stop.is_set():
+            now = self._loop.time()
+            parts = []
+            for watch in self.watches:
+                state = f"err x{watch.failures}" if watch.failures else f"{watch.changes} chg"
+                parts.append(f"{watch.number}: {state}, next {max(0, watch.next_poll_at - now):.0f}s")
+            print(" | ".join(parts)[:200].ljust(200), end="\r")
+            await self._sleep(1)
+
+
+def enter_sentry_mode(all_accounts: bool | None = None):
     api_key = AuthInstance.api_key
     active_user = AuthInstance.get_active_user()
     if active_user is None:
         print("No active user. Please login first.")
         pause()
         return
-    
-    tokens = active_user["tokens"]
+
+    if all_accounts is None:
+        all_accounts = len(AuthInstance.refresh_tokens) > 1 and prompt_bool(
+            "Pantau semua akun? (y/n)", False
+        )
+
+    numbers = [active_user["number"]]
+    if all_accounts:
+        print("Preparing sessions for all accounts...")
+        AuthInstance.warm_sessions()
+        numbers += [n for n in AuthInstance.sessions if n != active_user["number"]]
+    AuthInstance.start_token_refresher()
 
     clear_screen()
-    print("Entering Sentry Mode...")
+    print(f"Entering Sentry Mode for {len(numbers)} account(s)...")
     print("Press Ctrl+C or type 'q' + Enter to exit.")
-    
+
     if not os.path.exists("sentry"):
         os.makedirs("sentry")
 
-    file_name = os.path.join(
-        "sentry",
-        f"sentry_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
-    )
+    log_format = load_config().get("sentry_log_format", "jsonl")
+    stem = f"sentry_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    file_name = os.path.join("sentry", f"{stem}.jsonl") if log_format in ("jsonl", "both") else None
+    store_name = os.path.join("sentry", f"{stem}.qcol") if log_format in ("columnar", "both") else None
 
-    stop_flag = {"stop": False}
+    store = ColumnarSentryStore(store_name) if store_name else None
+    engine = SentryEngine(api_key, numbers, file_name, store)
 
     # Background listener for "q"
     def listen_for_quit():
@@ -40,53 +240,17 @@ def enter_sentry_mode():
             if not user_input:  # Ignore empty input (prevents instant exit)
                 continue
             if user_input.strip().lower() == "q":
-                stop_flag["stop"] = True
+                engine.stop()
                 break
 
     listener_thread = threading.Thread(target=listen_for_quit, daemon=True)
     listener_thread.start()
 
-    id_token = tokens.get("id_token")
-    
-    path = "api/v8/packages/quota-details"
-    
-    payload = {
-        "is_enterprise": False,
-        "lang": "en",
-        "family_member_id": ""
-    }
-    
     try:
-        with open(file_name, 'a') as f:
-            while not stop_flag["stop"]:
-                sleep(1)
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-                try:
-                    print(f"Fetching data at {timestamp}...", end="\r")
-                    
-                    res = send_api_request(api_key, path, payload, id_token, "POST")
-                    if res.get("status") != "SUCCESS":
-                        print("Failed to fetch packages")
-                        print("Response:", res)
-                        pause()
-                        return None
-                    
-                    quotas = res["data"]["quotas"]
-
-                    data_point = {
-                        "time": timestamp,
-                        "quotas": quotas
-                    }
-
-                    f.write(json.dumps(data_point) + "\n")
-                    f.flush()
-                except Exception as e:
-                    print(f"Error during fetch at {timestamp}: {e}")
-                    continue
-
+        asyncio.run(engine.run())
     except KeyboardInterrupt:
         print("\nKeyboard interrupt received. Exiting Sentry Mode...")
     finally:
-        print(f"\nSentry Mode exited. Data saved to {file_name}.")
+        saved = ", ".join(name for name in (file_name, store_name) if name)
+        print(f"\nSentry Mode exited. Data saved to {saved}.")
         pause()
@@ -0,0 +1,324 @@
+"""Offline analysis of sentry logs: consumption rate, peak window, depletion.
+
+Logs are streamed sample by sample, so memory stays bounded by the number
+of benefits and usage windows rather than the number of samples. Columnar
+stores (.qcol) are aggregated a segment at a time, vectorized with numpy
+when it is installed.
+"""
+import glob
+import json
+import os
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from app.service.sentry_store import ColumnarSentryReader
+
+DEFAULT_WINDOW_MINUTES = 60
+# The depletion forecast uses the consumption rate over this trailing span.
+RECENT_RATE_HOURS = 24
+
+
+class BenefitStats:
+    """Running aggregates for one (account, quota, benefit)."""
+
+    def __init__(self, number: int, quota_code: str, benefit_id: str, name: str = "", data_type: str = ""):
+        self.number = number
+        self.quota_code = quota_code
+        self.benefit_id = benefit_id
+        self.name = name
+        self.data_type = data_type
+        self.samples = 0
+        self.first_ts = None
+        self.last_ts = None
+        self.last_remaining = None
+        self.total = 0
+        self.consumed = 0
+        self.topups = 0
+        # window start (ms) -> consumed in that window
+        self.windows: dict[int, int] = {}
+
+    def add(self, ts_ms: int, remaining: int, total: int, window_ms: int) -> None:
+        if self.first_ts is None:
+            self.first_ts = ts_ms
+        elif self.last_remaining is not None:
+            drop = self.last_remaining - remaining
+            if drop > 0:
+                self.consumed += drop
+                window = ts_ms - ts_ms % window_ms
+                self.windows[window] = self.windows.get(window, 0) + drop
+            elif drop < 0:
+                self.topups += 1
+        self.samples += 1
+        self.last_ts = ts_ms
+        self.last_remaining = remaining
+        self.total = total
+
+    def add_many(self, ts, remaining, total, window_ms: int) -> None:
+        """Vectorized add() for numpy arrays of one benefit, in time order."""
+        if len(ts) == 0:
+            return
+        if self.last_remaining is None:
+            self.first_ts = int(ts[0])
+            previous = remaining[:-1]
+            current = remaining[1:]
+            drop_ts = ts[1:]
+        else:
+            previous = np.concatenate(([self.last_remaining], remaining[:-1]))
+            current = remaining
+            drop_ts = ts
+
+        drops = previous - current
+        used = drops > 0
+        self.consumed += int(drops[used].sum())
+        self.topups += int((drops < 0).sum())
+        if used.any():
+            buckets = drop_ts[used] - drop_ts[used] % window_ms
+            starts, inverse = np.unique(buckets, return_inverse=True)
+            sums = np.bincount(inverse, weights=drops[used])
+            for start, amount in zip(starts.tolist(), sums.tolist()):
+                self.windows[start] = self.windows.get(start, 0) + int(amount)
+
+        self.samples += len(ts)
+        self.last_ts = int(ts[-1])
+        self.last_remaining = int(remaining[-1])
+        self.total = int(total[-1])
+
+    def observe(self, ts_ms: int) -> None:
+        """Extend the series to a later poll that saw the same values.
+
+        Logs only hold changes; without this the span (and the rate, the
+        24 h window and the depletion time) would end at the last change.
+        """
+        if self.last_ts is not None and ts_ms > self.last_ts:
+            self.last_ts = int(ts_ms)
+
+    def summary(self, window_ms: int) -> dict:
+        elapsed_h = max((self.last_ts - self.first_ts) / 3_600_000, 0) if self.samples else 0
+        rate = self.consumed / elapsed_h if elapsed_h else 0.0
+
+        recent_from = (self.last_ts or 0) - RECENT_RATE_HOURS * 3_600_000
+        recent = sum(v for k, v in self.windows.items() if k >= recent_from)
+        recent_h = min(elapsed_h, RECENT_RATE_HOURS)
+        recent_rate = recent / recent_h if recent_h else rate
+
+        peak_start, peak_amount = None, 0
+        if self.windows:
+            peak_start, peak_amount = max(self.windows.items(), key=lambda item: item[1])
+
+        depletion_ts = None
+        if recent_rate > 0 and self.last_remaining:
+            depletion_ts = self.last_ts + int(self.last_remaining / recent_rate * 3_600_000)
+
+        return {
+            "number": self.number,
+            "quota_code": self.quota_code,
+            "benefit_id": self.benefit_id,
+            "name": self.name,
+            "data_type": self.data_type,
+            "samples": self.samples,
+            "first_ts": self.first_ts,
+            "last_ts": self.last_ts,
+            "remaining": self.last_remaining,
+            "total": self.total,
+            "consumed": self.consumed,
+            "topups": self.topups,
+            "rate_per_hour": rate,
+            "recent_rate_per_hour": recent_rate,
+            "peak_window_start": peak_start,
+            "peak_window_end": peak_start + window_ms if peak_start is not None else None,
+            "peak_window_consumed": peak_amount,
+            "depletion_ts": depletion_ts,
+        }
+
+
+class SentryAnalyzer:
+    def __init__(self, window_minutes: int = DEFAULT_WINDOW_MINUTES, vectorized: bool | None = None):
+        self.window_ms = int(window_minutes * 60_000)
+        self.vectorized = (np is not None) if vectorized is None else (vectorized and np is not None)
+        self.stats: dict[tuple, BenefitStats] = {}
+        # JSONL: number -> quota_code -> stats of the benefits last seen in it.
+        self._present: dict = {}
+
+    def _stats_for(self, number, quota_code, benefit: dict) -> BenefitStats:
+        key = (number, quota_code, str(benefit.get("id", "")))
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = BenefitStats(
+                number, quota_code, key[2], benefit.get("name", ""), benefit.get("data_type", "")
+            )
+            self.stats[key] = stats
+        return stats
+
+    def _add_quotas(self, number, ts_ms: int, quotas) -> None:
+        present = self._present.setdefault(number, {})
+        reset = set()
+        for quota in quotas:
+            quota_code = quota.get("quota_code", "")
+            if quota_code not in reset:
+                present[quota_code] = []
+                reset.add(quota_code)
+            for benefit in quota.get("benefits", []) or []:
+                stats = self._stats_for(number, quota_code, benefit)
+                stats.add(
+                    ts_ms,
+                    int(benefit.get("remaining", 0) or 0),
+                    int(benefit.get("total", 0) or 0),
+                    self.window_ms,
+                )
+                present[quota_code].append(stats)
+
+    def _observe(self, number, ts_ms: int) -> None:
+        for benefits in self._present.get(number, {}).values():
+            for stats in benefits:
+                stats.observe(ts_ms)
+
+    def add_jsonl(self, path: str) -> None:
+        """Stream a sentry JSONL log (legacy full snapshots or snapshot/delta/seen records)."""
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    ts_ms = int(datetime.fromisoformat(record["time"]).timestamp() * 1000)
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+                number = record.get("number")
+                record_type = record.get("type")
+                if record_type == "delta":
+                    # Only benefits of added/changed quotas have new values.
+                    present = self._present.setdefault(number, {})
+                    for quota_code in record.get("removed", []):
+                        present.pop(quota_code, None)
+                    self._add_quotas(number, ts_ms, record.get("added", []) + record.get("changed", []))
+                elif record_type != "seen":
+                    self._present[number] = {}
+                    self._add_quotas(number, ts_ms, record.get("quotas", []))
+                self._observe(number, ts_ms)
+
+    def add_columnar(self, path: str) -> None:
+        with ColumnarSentryReader(path) as reader:
+            keys = reader.keys
+            for _, columns in reader.iter_segments():
+                if self.vectorized:
+                    self._add_segment_vectorized(keys, columns)
+                else:
+                    self._add_segment(keys, columns)
+                del columns
+            for key_id, seen_ts in enumerate(reader.seen):
+                if seen_ts:
+                    self._stats_for_key(keys[key_id]).observe(seen_ts)
+
+    def _stats_for_key(self, key: dict) -> BenefitStats:
+        return self._stats_for(
+            key["number"],
+            key["quota_code"],
+            {"id": key["benefit_id"], "name": key.get("name", ""), "data_type": key.get("data_type", "")},
+        )
+
+    def _add_segment(self, keys: list[dict], columns: dict) -> None:
+        ts, key_ids = columns["ts"], columns["key"]
+        remaining, total = columns["remaining"], columns["total"]
+        for i in range(len(ts)):
+            self._stats_for_key(keys[key_ids[i]]).add(ts[i], remaining[i], total[i], self.window_ms)
+
+    def _add_segment_vectorized(self, keys: list[dict], columns: dict) -> None:
+        ts = np.asarray(columns["ts"], dtype=np.int64)
+        key_ids = np.asarray(columns["key"], dtype=np.int64)
+        remaining = np.asarray(columns["remaining"], dtype=np.int64)
+        total = np.asarray(columns["total"], dtype=np.int64)
+
+        # Group rows by key while keeping each key's rows in time order.
+        order = np.argsort(key_ids, kind="stable")
+        sorted_keys = key_ids[order]
+        bounds = np.flatnonzero(np.diff(sorted_keys)) + 1
+        for group in np.split(order, bounds):
+            self._stats_for_key(keys[int(key_ids[group[0]])]).add_many(
+                ts[group], remaining[group], total[group], self.window_ms
+            )
+
+    def add_path(self, path: str) -> None:
+        if path.endswith(".qcol"):
+            self.add_columnar(path)
+        else:
+            self.add_jsonl(path)
+
+    def summaries(self) -> list[dict]:
+        return [stats.summary(self.window_ms) for stats in self.stats.values() if stats.samples]
+
+
+def find_sentry_logs(directory: str = "sentry") -> list[str]:
+    """Sentry logs in the directory, skipping JSONL that has a columnar twin."""
+    paths = sorted(glob.glob(os.path.join(directory, "*.qcol")))
+    stems = {path[:-len(".qcol")] for path in paths}
+    for path in sorted(glob.glob(os.path.join(directory, "*.jsonl"))):
+        if path[:-len(".jsonl")] not in stems:
+            paths.append(path)
+    return sorted(paths)
+
+
+def _format_amount(amount: float, data_type: str) -> str:
+    if data_type == "DATA":
+        from app.menus.util import format_quota_byte
+
+        return format_quota_byte(int(amount))
+    if data_type == "VOICE":
+        return f"{amount / 60:.1f} menit"
+    return f"{amount:,.0f}"
+
+
+def _format_ts(ts_ms: int | None) -> str:
+    if ts_ms is None:
+        return "-"
+    return datetime.fromtimestamp(ts_ms / 1000).strftime("%Y-%m-%d %H:%M")
+
+
+def print_report(summaries: list[dict]) -> None:
+    if not summaries:
+        print("Tidak ada data sentry untuk dianalisis.")
+        return
+
+    for s in sorted(summaries, key=lambda item: (str(item["number"]), item["quota_code"], item["benefit_id"])):
+        data_type = s["data_type"]
+        label = s["name"] or s["benefit_id"] or s["quota_code"]
+        print("-------------------------------------------------------")
+        if s["number"] is not None:
+            print(f"Nomor      : {s['number']}")
+        print(f"Benefit    : {label} ({s['quota_code']})")
+        print(f"Sampel     : {s['samples']} ({_format_ts(s['first_ts'])} - {_format_ts(s['last_ts'])})")
+        print(f"Sisa       : {_format_amount(s['remaining'] or 0, data_type)} / {_format_amount(s['total'], data_type)}")
+        print(f"Terpakai   : {_format_amount(s['consumed'], data_type)}")
+        print(f"Laju       : {_format_amount(s['rate_per_hour'], data_type)}/jam "
+              f"(24 jam terakhir: {_format_amount(s['recent_rate_per_hour'], data_type)}/jam)")
+        if s["peak_window_start"] is not None:
+            print(f"Puncak     : {_format_ts(s['peak_window_start'])} - {_format_ts(s['peak_window_end'])} "
+                  f"({_format_amount(s['peak_window_consumed'], data_type)})")
+        print(f"Habis pada : {_format_ts(s['depletion_ts']) if s['depletion_ts'] else 'tidak diperkirakan'}")
+    print("-------------------------------------------------------")
+
+
+def analyze_sentry_logs(
+    paths: list[str] | None = None,
+    window_minutes: int = DEFAULT_WINDOW_MINUTES,
+    as_json: bool = False,
+) -> list[dict]:
+    paths = paths or find_sentry_logs()
+    analyzer = SentryAnalyzer(window_minutes)
+    for path in paths:
+        try:
+            analyzer.add_path(path)
+        except (OSError, ValueError) as e:
+            print(f"Gagal membaca {path}: {e}")
+
+    summaries = analyzer.summaries()
+    if as_json:
+        print(json.dumps(summaries, indent=2))
+    else:
+        print_report(summaries)
+    return summaries
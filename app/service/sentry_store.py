@@ -0,0 +1,322 @@
+"""Append-only columnar storage for sentry quota samples.
+
+A store is two files:
+
+* ``<name>.qcol`` – a file header followed by sealed segments. Each segment
+  holds up to ``segment_rows`` rows as four typed columns (timestamp ms,
+  key id, remaining, total), zlib-compressed by default.
+* ``<name>.qcol.idx`` – JSON index with the key table (account number,
+  quota code, benefit id, name, data type), the last time each key was
+  seen in a poll and, per segment, its offset, time range and the key ids
+  it contains.
+
+Rows are buffered in memory and sealed into a segment when the buffer is
+full or ``seal_interval`` seconds have passed. Unchanged values are not
+written as rows; the per-key ``seen`` times carry the polls that saw them.
+The index is rewritten atomically after every seal (or, when only ``seen``
+moved, at the same interval), so a reader only ever sees complete segments.
+"""
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from array import array
+
+FILE_MAGIC = b"MXQCOL1\n"
+SEGMENT_MAGIC = b"SEGM"
+# magic, row count, flags
+_SEGMENT_HEADER = struct.Struct("<4sII")
+_BLOCK_LENGTH = struct.Struct("<I")
+FLAG_ZLIB = 1
+
+# Column name -> array typecode, in on-disk order.
+COLUMNS = (
+    ("ts", "q"),
+    ("key", "I"),
+    ("remaining", "q"),
+    ("total", "q"),
+)
+
+DEFAULT_SEGMENT_ROWS = 4096
+DEFAULT_SEAL_INTERVAL = 60.0
+
+
+def index_path_for(path: str) -> str:
+    return f"{path}.idx"
+
+
+def _key_tuple(number: int, quota_code: str, benefit_id: str) -> tuple:
+    return (int(number), str(quota_code), str(benefit_id))
+
+
+class ColumnarSentryStore:
+    """Writer side. Not thread-safe; use it from one thread or event loop."""
+
+    def __init__(
+        self,
+        path: str,
+        segment_rows: int = DEFAULT_SEGMENT_ROWS,
+        seal_interval: float = DEFAULT_SEAL_INTERVAL,
+        compress: bool = True,
+    ):
+        self.path = path
+        self.index_path = index_path_for(path)
+        self.segment_rows = segment_rows
+        self.seal_interval = seal_interval
+        self.compress = compress
+
+        self._index = {"version": 1, "keys": [], "seen": [], "segments": []}
+        self._key_ids: dict[tuple, int] = {}
+        # Last (remaining, total) written per key, to skip unchanged rows.
+        self._last_values: dict[int, tuple[int, int]] = {}
+        self._buffer = {name: array(code) for name, code in COLUMNS}
+        self._buffer_started = time.monotonic()
+        self._seen_dirty = False
+        self._open()
+
+    def _open(self) -> None:
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self._index = json.load(f)
+            for key_id, key in enumerate(self._index["keys"]):
+                self._key_ids[_key_tuple(key["number"], key["quota_code"], key["benefit_id"])] = key_id
+            # Stores written before per-key seen times start with none.
+            seen = self._index.setdefault("seen", [])
+            seen.extend([0] * (len(self._index["keys"]) - len(seen)))
+
+        end = len(FILE_MAGIC)
+        if self._index["segments"]:
+            last = self._index["segments"][-1]
+            end = last["offset"] + last["length"]
+
+        self._file = open(self.path, "a+b")
+        self._file.seek(0, os.SEEK_END)
+        size = self._file.tell()
+        if size == 0:
+            self._file.write(FILE_MAGIC)
+            self._file.flush()
+        elif size > end:
+            # Bytes past the last indexed segment come from an interrupted
+            # seal; drop them so the next segment starts where the index says.
+            self._file.truncate(end)
+
+    def key_id(self, number: int, quota_code: str, benefit: dict) -> int:
+        benefit_id = benefit.get("id", "")
+        key = _key_tuple(number, quota_code, benefit_id)
+        key_id = self._key_ids.get(key)
+        if key_id is None:
+            key_id = len(self._index["keys"])
+            self._key_ids[key] = key_id
+            self._index["keys"].append({
+                "number": key[0],
+                "quota_code": key[1],
+                "benefit_id": key[2],
+                "name": benefit.get("name", ""),
+                "data_type": benefit.get("data_type", ""),
+            })
+            self._index["seen"].append(0)
+        return key_id
+
+    def append(self, ts_ms: int, key_id: int, remaining: int, total: int) -> None:
+        buffer = self._buffer
+        buffer["ts"].append(int(ts_ms))
+        buffer["key"].append(key_id)
+        buffer["remaining"].append(int(remaining))
+        buffer["total"].append(int(total))
+        self._last_values[key_id] = (int(remaining), int(total))
+        self._maybe_seal()
+
+    def record_quotas(self, timestamp: float, number: int, quotas: list[dict]) -> int:
+        """Append one row per benefit whose remaining/total changed. Returns rows written."""
+        ts_ms = int(timestamp * 1000)
+        written = 0
+        for quota in quotas:
+            quota_code = quota.get("quota_code", "")
+            for benefit in quota.get("benefits", []) or []:
+                key_id = self.key_id(number, quota_code, benefit)
+                self._index["seen"][key_id] = ts_ms
+                self._seen_dirty = True
+                values = (int(benefit.get("remaining", 0) or 0), int(benefit.get("total", 0) or 0))
+                if self._last_values.get(key_id) == values:
+                    continue
+                self.append(ts_ms, key_id, *values)
+                written += 1
+        self._maybe_seal()
+        return written
+
+    def _maybe_seal(self) -> None:
+        rows = len(self._buffer["ts"])
+        if rows >= self.segment_rows or (
+            (rows or self._seen_dirty) and time.monotonic() - self._buffer_started >= self.seal_interval
+        ):
+            self.seal()
+
+    def seal(self) -> None:
+        """Write buffered rows as one segment and publish it in the index."""
+        rows = len(self._buffer["ts"])
+        self._buffer_started = time.monotonic()
+        if rows == 0:
+            if self._seen_dirty:
+                self._write_index()
+            return
+
+        flags = FLAG_ZLIB if self.compress else 0
+        parts = [_SEGMENT_HEADER.pack(SEGMENT_MAGIC, rows, flags)]
+        for name, _ in COLUMNS:
+            block = self._buffer[name].tobytes()
+            if self.compress:
+                block = zlib.compress(block, 6)
+            parts.append(_BLOCK_LENGTH.pack(len(block)))
+            parts.append(block)
+        data = b"".join(parts)
+
+        self._file.seek(0, os.SEEK_END)
+        offset = self._file.tell()
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        ts = self._buffer["ts"]
+        self._index["segments"].append({
+            "offset": offset,
+            "length": len(data),
+            "rows": rows,
+            "t_min": min(ts),
+            "t_max": max(ts),
+            "keys": sorted(set(self._buffer["key"])),
+        })
+        self._write_index()
+        self._buffer = {name: array(code) for name, code in COLUMNS}
+
+    def _write_index(self) -> None:
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+        self._seen_dirty = False
+
+    def close(self) -> None:
+        self.seal()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ColumnarSentryReader:
+    """Memory-maps a store and reads only the segments a query needs."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(index_path_for(path), "r", encoding="utf-8") as f:
+            self._index = json.load(f)
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(FILE_MAGIC)] != FILE_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a sentry columnar store")
+
+    @property
+    def keys(self) -> list[dict]:
+        return self._index["keys"]
+
+    @property
+    def segments(self) -> list[dict]:
+        return self._index["segments"]
+
+    @property
+    def seen(self) -> list[int]:
+        """Last poll time (ms) per key id, 0 when unknown."""
+        return self._index.get("seen", [])
+
+    def find_keys(
+        self,
+        quota_code: str | None = None,
+        benefit_id: str | None = None,
+        number: int | None = None,
+    ) -> list[int]:
+        return [
+            key_id
+            for key_id, key in enumerate(self.keys)
+            if (quota_code is None or key["quota_code"] == quota_code)
+            and (benefit_id is None or key["benefit_id"] == benefit_id)
+            and (number is None or key["number"] == int(number))
+        ]
+
+    def read_segment(self, segment: dict) -> dict:
+        """Columns of one segment as arrays (or memoryviews when uncompressed)."""
+        view = memoryview(self._mm)
+        pos = segment["offset"]
+        magic, rows, flags = _SEGMENT_HEADER.unpack_from(self._mm, pos)
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"Corrupt segment at offset {pos}")
+        pos += _SEGMENT_HEADER.size
+
+        columns = {}
+        for name, code in COLUMNS:
+            (length,) = _BLOCK_LENGTH.unpack_from(self._mm, pos)
+            pos += _BLOCK_LENGTH.size
+            block = view[pos:pos + length]
+            pos += length
+            if flags & FLAG_ZLIB:
+                column = array(code)
+                column.frombytes(zlib.decompress(block))
+            else:
+                column = block.cast(code)
+            if len(column) != rows:
+                raise ValueError(f"Corrupt column {name} at offset {segment['offset']}")
+            columns[name] = column
+        return columns
+
+    def iter_segments(self, key_ids=None, t_min: int | None = None, t_max: int | None = None):
+        wanted = set(key_ids) if key_ids is not None else None
+        for segment in self.segments:
+            if wanted is not None and wanted.isdisjoint(segment["keys"]):
+                continue
+            if t_min is not None and segment["t_max"] < t_min:
+                continue
+            if t_max is not None and segment["t_min"] > t_max:
+                continue
+            yield segment, self.read_segment(segment)
+
+    def series(self, key_id: int, t_min: int | None = None, t_max: int | None = None):
+        """Yield (ts_ms, remaining, total) for one key, oldest first."""
+        for _, columns in self.iter_segments([key_id], t_min, t_max):
+            ts, keys = columns["ts"], columns["key"]
+            remaining, total = columns["remaining"], columns["total"]
+            for i in range(len(ts)):
+                if keys[i] != key_id:
+                    continue
+                if t_min is not None and ts[i] < t_min:
+                    continue
+                if t_max is not None and ts[i] > t_max:
+                    continue
+                yield ts[i], remaining[i], total[i]
+
+    def remaining_over_time(self, quota_code: str, benefit_id: str, number: int | None = None):
+        """Yield (ts_ms, remaining) for the benefit, across matching accounts."""
+        for key_id in self.find_keys(quota_code, benefit_id, number):
+            for ts, remaining, _ in self.series(key_id):
+                yield ts, remaining
+
+    def close(self) -> None:
+        if getattr(self, "_mm", None) is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                # Columns of uncompressed segments are still borrowed by the
+                # caller; the map is released once they are garbage collected.
+                pass
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
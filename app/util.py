@@ -1,3 +1,5 @@
+import base64
+import json
 import os
 
 def load_api_key() -> str:
@@ -32,3 +34,13 @@ def verify_api_key(api_key: str, *, timeout: float = 10.0) -> bool:
 
 def ensure_api_key() -> str:
     return "Noir1"
+
+
+def decode_jwt_claims(token: str) -> dict:
+    """Return the (unverified) claims of a JWT, or an empty dict."""
+    try:
+        payload_b64 = token.split(".")[1]
+        padded = payload_b64 + "=" * (-len(payload_b64) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded))
+    except (AttributeError, IndexError, ValueError):
+        return {}
@@ -0,0 +1,86 @@
+"""Per-call cost of xdata encrypt/decrypt, before vs after key/IV caching.
+
+Run from the repository root:
+
+    python -m bench.crypto
+"""
+import hashlib
+import json
+import os
+import time
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from bench.common import ensure_env, per_call_us, print_table
+
+ensure_env()
+
+from Crypto.Cipher import AES  # noqa: E402
+from Crypto.Util.Padding import pad, unpad  # noqa: E402
+
+from app.service import crypto_helper  # noqa: E402
+
+PAYLOAD_SIZES = [200, 2_000, 20_000, 200_000]
+
+
+# Verbatim copy of the previous implementation, kept as the baseline.
+def baseline_derive_iv(xtime_ms: int) -> bytes:
+    sha = hashlib.sha256(str(xtime_ms).encode()).hexdigest()
+    return sha[:16].encode()
+
+
+def baseline_encrypt_xdata(plaintext: str, xtime_ms: int) -> str:
+    iv = baseline_derive_iv(xtime_ms)
+    key_bytes = os.environ["XDATA_KEY"].encode()
+
+    cipher = AES.new(key_bytes, AES.MODE_CBC, iv)
+    return urlsafe_b64encode(cipher.encrypt(pad(plaintext.encode(), 16, style="pkcs7"))).decode()
+
+
+def baseline_decrypt_xdata(xdata: str, xtime_ms: int) -> str:
+    iv = baseline_derive_iv(xtime_ms)
+    key_bytes = os.environ["XDATA_KEY"].encode()
+
+    ct = urlsafe_b64decode(xdata + "=" * ((4 - len(xdata) % 4) % 4))
+    pt = AES.new(key_bytes, AES.MODE_CBC, iv).decrypt(ct)
+    return unpad(pt, 16, style="pkcs7").decode()
+
+
+def make_payload(size: int) -> str:
+    items = []
+    body = ""
+    while len(body) < size:
+        items.append({"item_code": f"OPT{len(items):06d}", "item_price": 10000, "item_name": "Xtra Combo"})
+        body = json.dumps({"items": items}, separators=(",", ":"))
+    return body[:size]
+
+
+def main() -> None:
+    xtime = int(time.time() * 1000)
+    rows = []
+    for size in PAYLOAD_SIZES:
+        plaintext = make_payload(size)
+        xdata = crypto_helper.encrypt_xdata(plaintext, xtime)
+        assert baseline_encrypt_xdata(plaintext, xtime) == xdata
+        assert crypto_helper.decrypt_xdata(xdata, xtime) == plaintext
+
+        enc_before = per_call_us(lambda: baseline_encrypt_xdata(plaintext, xtime))
+        enc_after = per_call_us(lambda: crypto_helper.encrypt_xdata(plaintext, xtime))
+        dec_before = per_call_us(lambda: baseline_decrypt_xdata(xdata, xtime))
+        dec_after = per_call_us(lambda: crypto_helper.decrypt_xdata(xdata, xtime))
+        rows.append([
+            f"{size:,} B",
+            f"{enc_before:.1f}",
+            f"{enc_after:.1f}",
+            f"{dec_before:.1f}",
+            f"{dec_after:.1f}",
+        ])
+
+    print("xdata encrypt/decrypt, microseconds per call (best of 5)")
+    print_table(
+        ["payload", "encrypt before", "encrypt after", "decrypt before", "decrypt after"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Peak memory and time of decoding a large xdata response, old path vs buffer path.
+
+Run from the repository root:
+
+    python -m bench.decrypt
+"""
+import json
+import time
+import tracemalloc
+
+from bench.common import ensure_env, per_call_us, print_table
+
+ensure_env()
+
+from app.client.encrypt import decrypt_xdata, decrypt_xdata_bytes  # noqa: E402
+from app.service.crypto_helper import encrypt_xdata  # noqa: E402
+
+PLAINTEXT_SIZES = [1_000_000, 4_000_000, 16_000_000]
+
+
+def make_response_body(size: int, xtime: int) -> bytes:
+    row = {
+        "code": "TRX",
+        "title": "Xtra Combo Flex S",
+        "price": 25000,
+        "status": "SUCCESS",
+        "timestamp": xtime // 1000,
+    }
+    row_len = len(json.dumps(row, separators=(",", ":"))) + 1
+    plaintext = json.dumps(
+        {"code": "000", "status": "SUCCESS", "data": {"list": [row] * (size // row_len)}},
+        separators=(",", ":"),
+    )
+    envelope = {"xdata": encrypt_xdata(plaintext, xtime), "xtime": xtime}
+    return json.dumps(envelope).encode()
+
+
+def old_path(body: bytes) -> dict:
+    # What send_api_request used to do with resp.text.
+    return decrypt_xdata("", json.loads(body.decode("utf-8")))
+
+
+def new_path(body: bytes) -> dict:
+    return decrypt_xdata_bytes("", body)
+
+
+def transient_mb(fn, body: bytes) -> float:
+    """Peak allocations minus what the decoded result itself keeps alive."""
+    tracemalloc.start()
+    result = fn(body)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return (peak - retained) / 1_000_000
+
+
+def main() -> None:
+    xtime = int(time.time() * 1000)
+    rows = []
+    for size in PLAINTEXT_SIZES:
+        body = make_response_body(size, xtime)
+        assert old_path(body) == new_path(body)
+
+        old_peak = transient_mb(old_path, body)
+        new_peak = transient_mb(new_path, body)
+        old_ms = per_call_us(lambda: old_path(body), min_time=0.5, repeat=3) / 1000
+        new_ms = per_call_us(lambda: new_path(body), min_time=0.5, repeat=3) / 1000
+        rows.append([
+            f"{len(body) / 1_000_000:.1f} MB",
+            f"{old_peak:.1f}",
+            f"{new_peak:.1f}",
+            f"{(1 - new_peak / old_peak) * 100:.0f}%",
+            f"{old_ms:.1f}",
+            f"{new_ms:.1f}",
+        ])
+
+    print("Decoding one xdata response (transient = peak allocations beyond the decoded result)")
+    print_table(
+        ["body", "old transient MB", "new transient MB", "reduction", "old ms", "new ms"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
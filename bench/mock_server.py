@@ -0,0 +1,768 @@
+"""Local stand-in for the XL API, so the client can be measured offline.
+
+Requests are decrypted from the xdata envelope and their x-signature is
+checked the way the client computes it: the basic signature for ordinary
+calls, and the payment, bounty, loyalty and allotment signatures for the
+settlement paths. Replies to the main engsel, store, payment, circle and
+famplan paths are canned and go back encrypted. The CIAM login and token
+endpoints answer plain JSON. Latency and failures can be injected:
+
+    python -m bench.mock_server --port 8989 --latency-ms 40 --jitter-ms 20 --error-rate 0.05
+
+Then point the client at it, using the same XDATA_KEY and X_API_BASE_SECRET
+as the server (bench.common fills in dummy keys when .env has none):
+
+    BASE_API_URL=http://127.0.0.1:8989 BASE_CIAM_URL=http://127.0.0.1:8989 python main.py
+
+Any 6-digit OTP logs in. Paths without a canned reply get an empty SUCCESS.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from bench.common import ensure_env, print_table
+
+ensure_env()
+
+from app.service.crypto_helper import (  # noqa: E402
+    decrypt_xdata,
+    encrypt_xdata,
+    make_x_signature,
+    make_x_signature_bounty,
+    make_x_signature_bounty_allotment,
+    make_x_signature_loyalty,
+    make_x_signature_payment,
+)
+
+DEFAULT_PORT = 8989
+SETTLEMENT_PATHS = (
+    "payments/api/v8/settlement-multipayment",
+    "payments/api/v8/settlement-multipayment/qris",
+    "payments/api/v8/settlement-multipayment/ewallet",
+)
+BOUNTY_PATH = "api/v8/personalization/bounties-exchange"
+LOYALTY_PATH = "gamification/api/v8/loyalties/tiering/exchange"
+ALLOTMENT_PATH = "gamification/api/v8/loyalties/tiering/bounties-allotment"
+
+
+@dataclass
+class MockOptions:
+    connect_ms: float = 0.0
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    # path -> fixed latency in ms, replacing latency_ms for that path
+    path_latency_ms: dict[str, float] = field(default_factory=dict)
+    error_rate: float = 0.0
+    error_statuses: tuple[int, ...] = (503,)
+    fail_rate: float = 0.0
+    garble_rate: float = 0.0
+    verify_signatures: bool = True
+    token_ttl: float = 300.0
+    seed: int | None = None
+    quiet: bool = False
+
+
+class MockState:
+    """What the server has handed out, so later requests can be checked."""
+
+    def __init__(self, seed: int | None = None):
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        # token_payment -> (timestamp to sign, monotonic issue time)
+        self.payment_tokens: dict[str, tuple[int, float]] = {}
+        # Package detail timestamps; bounties-allotment is signed with one.
+        self.detail_timestamps: deque[int] = deque(maxlen=256)
+        self.access_tokens: dict[str, str] = {}
+        self.hits: Counter = Counter()
+        self.injected: Counter = Counter()
+        self.rejected: Counter = Counter()
+
+    def roll(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self.lock:
+            return self.rng.random() < rate
+
+    def jitter(self, jitter_ms: float) -> float:
+        with self.lock:
+            return self.rng.uniform(0, jitter_ms)
+
+    def issue_tokens(self, refresh_token: str | None = None) -> dict:
+        key = uuid.uuid4().hex[:16]
+        tokens = {
+            "access_token": f"mock-access-{key}",
+            "id_token": f"mock-id-{key}",
+            "refresh_token": refresh_token or f"mock-refresh-{key}",
+            "token_type": "Bearer",
+            "expires_in": 300,
+            "refresh_expires_in": 86400,
+            "scope": "openid",
+        }
+        with self.lock:
+            self.access_tokens[tokens["id_token"]] = tokens["access_token"]
+        return tokens
+
+    def issue_payment_token(self) -> tuple[str, int]:
+        token = uuid.uuid4().hex
+        timestamp = int(time.time())
+        with self.lock:
+            self.payment_tokens[token] = (timestamp, time.monotonic())
+        return token, timestamp
+
+    def payment_timestamp(self, token: str, ttl: float) -> int | None:
+        with self.lock:
+            issued = self.payment_tokens.get(token)
+        if issued is None or time.monotonic() - issued[1] > ttl:
+            return None
+        return issued[0]
+
+    def consume_payment_token(self, token: str) -> None:
+        with self.lock:
+            self.payment_tokens.pop(token, None)
+
+    def issue_detail_timestamp(self) -> int:
+        timestamp = int(time.time())
+        with self.lock:
+            self.detail_timestamps.append(timestamp)
+        return timestamp
+
+
+# ---------------------------------------------------------------- canned data
+
+def _benefit(name: str, data_type: str, total: int) -> dict:
+    return {
+        "id": f"mock-{data_type.lower()}",
+        "item_id": f"mock-{data_type.lower()}",
+        "name": name,
+        "data_type": data_type,
+        "total": total,
+        "remaining": total // 2,
+        "is_unlimited": False,
+    }
+
+
+def _family(family_code: str) -> dict:
+    variants = []
+    for variant_index, variant_name in enumerate(("Reguler", "Malam"), start=1):
+        variant_code = f"{family_code}-V{variant_index}"
+        variants.append({
+            "name": variant_name,
+            "package_variant_code": variant_code,
+            "package_options": [
+                {
+                    "name": f"{variant_name} {gb}GB",
+                    "order": order,
+                    "price": 10000 * order,
+                    "package_option_code": f"{variant_code}-O{order}",
+                }
+                for order, gb in enumerate((2, 5, 10), start=1)
+            ],
+        })
+    return {
+        "package_family": {
+            "name": f"Mock Family {family_code}",
+            "package_family_code": family_code,
+            "package_family_type": "REGULAR",
+            "payment_for": "BUY_PACKAGE",
+            "rc_bonus_type": "",
+        },
+        "package_variants": variants,
+    }
+
+
+def _package_detail(state: MockState, option_code: str) -> dict:
+    family_code = option_code.split("-V")[0] if "-V" in option_code else "MOCKFAM"
+    try:
+        price = 10000 * int(option_code.rsplit("-O", 1)[1])
+    except (IndexError, ValueError):
+        price = 10000
+    return {
+        "package_option": {
+            "package_option_code": option_code,
+            "name": f"Mock {option_code}",
+            "price": price,
+            "validity": "30 Hari",
+            "tnc": "<p>Paket uji dari mock server.</p>",
+            "benefits": [
+                _benefit("Kuota Utama", "DATA", 5 * 1024 ** 3),
+                _benefit("Nelpon", "VOICE", 60 * 60),
+            ],
+        },
+        "package_family": _family(family_code)["package_family"],
+        "package_detail_variant": {"name": "Reguler"},
+        "package_addon": {"parent_code": ""},
+        "token_confirmation": uuid.uuid4().hex,
+        "timestamp": state.issue_detail_timestamp(),
+    }
+
+
+def _profile(state, payload, ctx):
+    return {
+        "profile": {
+            "subscriber_id": "mock-subscriber",
+            "subscription_type": "PREPAID",
+            "msisdn": "6281234567890",
+            "full_name": "Mock User",
+        }
+    }
+
+
+def _balance(state, payload, ctx):
+    return {"balance": {"remaining": 150000, "expired_at": int(time.time()) + 30 * 86400}}
+
+
+def _tiering(state, payload, ctx):
+    return {"tier": 2, "current_point": 1234}
+
+
+def _options_list(state, payload, ctx):
+    return _family(payload.get("package_family_code") or "MOCKFAM")
+
+
+def _families(state, payload, ctx):
+    category = payload.get("package_category_code") or "MOCKCAT"
+    return {
+        "results": [
+            {"label": f"Mock Family {index}", "id": f"{category}-F{index}"}
+            for index in range(1, 4)
+        ]
+    }
+
+
+def _options_detail(state, payload, ctx):
+    return _package_detail(state, payload.get("package_option_code") or "MOCKFAM-V1-O1")
+
+
+def _addons(state, payload, ctx):
+    return {"bonuses": [], "addons": []}
+
+
+def _quota_details(state, payload, ctx):
+    return {
+        "quotas": [
+            {
+                "quota_code": "MOCKFAM-V1-O2",
+                "group_code": "MOCKGRP",
+                "group_name": "Mock Group",
+                "name": "Mock 5GB",
+                "product_subscription_type": "PREPAID",
+                "product_domain": "DATA",
+                "benefits": [_benefit("Kuota Utama", "DATA", 5 * 1024 ** 3)],
+            }
+        ]
+    }
+
+
+def _payment_methods(state, payload, ctx):
+    token, timestamp = state.issue_payment_token()
+    return {
+        "token_payment": token,
+        "timestamp": timestamp,
+        "payment_methods": [
+            {"payment_method": "BALANCE", "label": "Pulsa"},
+            {"payment_method": "QRIS", "label": "QRIS"},
+        ],
+    }
+
+
+def _settlement(state, payload, ctx):
+    data = {
+        "transaction_code": f"MOCK-{uuid.uuid4().hex[:12].upper()}",
+        "total_amount": payload.get("total_amount"),
+        "payment_method": payload.get("payment_method"),
+    }
+    if ctx["path"].endswith("/ewallet"):
+        data["deeplink"] = f"https://mock.invalid/pay/{data['transaction_code']}"
+    return data
+
+
+def _pending_detail(state, payload, ctx):
+    return {"qr_code": f"00020101021226MOCK{payload.get('transaction_id', '')}"}
+
+
+def _pending_payment(state, payload, ctx):
+    return {"pending_payment": []}
+
+
+def _transaction_history(state, payload, ctx):
+    return {
+        "list": [
+            {
+                "code": "MOCKFAM-V1-O1",
+                "title": "Mock 2GB",
+                "price": "IDR 10000",
+                "raw_price": 10000,
+                "payment_method": "BALANCE",
+                "payment_method_label": "Pulsa",
+                "validity": "30 Hari",
+                "formated_date": "",
+                "timestamp": int(time.time()) - 3600,
+                "status": "SUCCESS",
+            }
+        ]
+    }
+
+
+def _notifications(state, payload, ctx):
+    return {
+        "notifications": [
+            {
+                "notification_id": "mock-notif-1",
+                "brief_message": "Selamat datang di mock server",
+                "full_message": "Semua respons berasal dari bench.mock_server.",
+                "timestamp": int(time.time()),
+                "is_read": False,
+            }
+        ]
+    }
+
+
+def _segments(state, payload, ctx):
+    return {
+        "store_segments": [
+            {
+                "title": "Mock Segment",
+                "banners": [
+                    {
+                        "title": "Mock 5GB",
+                        "family_name": "Mock Family",
+                        "discounted_price": 20000,
+                        "validity": "30 Hari",
+                        "action_type": "PDP",
+                        "action_param": "MOCKFAM-V1-O2",
+                    }
+                ],
+            }
+        ]
+    }
+
+
+def _store_search(state, payload, ctx):
+    return {
+        "results_price_only": [
+            {
+                "title": f"Mock {gb}GB",
+                "family_name": "Mock Family",
+                "original_price": 10000 * order,
+                "discounted_price": 10000 * order,
+                "validity": "30 Hari",
+                "action_type": "PDP",
+                "action_param": f"MOCKFAM-V1-O{order}",
+            }
+            for order, gb in enumerate((2, 5, 10), start=1)
+        ]
+    }
+
+
+def _redeemables(state, payload, ctx):
+    return {
+        "categories": [
+            {
+                "category_name": "Mock Rewards",
+                "category_code": "MOCKREWARD",
+                "redeemables": [
+                    {
+                        "name": "Mock Bonus 1GB",
+                        "valid_until": int(time.time()) + 7 * 86400,
+                        "action_type": "PDP",
+                        "action_param": "MOCKFAM-V2-O1",
+                    }
+                ],
+            }
+        ]
+    }
+
+
+def _circle_group(state, payload, ctx):
+    return {
+        "group_id": "mock-group",
+        "group_status": "ACTIVE",
+        "group_name": "Mock Circle",
+        "owner_name": "Mock User",
+    }
+
+
+def _circle_members(state, payload, ctx):
+    return {
+        "members": [
+            {
+                "member_id": "mock-member-1",
+                "member_role": "PARENT",
+                "subscriber_number": "mock-subscriber",
+                "msisdn": "",
+                "member_name": "Mock User",
+                "status": "ACTIVE",
+            }
+        ],
+        "package": {
+            "name": "Mock Circle 20GB",
+            "benefit": {
+                "allocation": 20 * 1024 ** 3,
+                "consumption": 5 * 1024 ** 3,
+                "remaining": 15 * 1024 ** 3,
+            },
+        },
+    }
+
+
+def _spending_tracker(state, payload, ctx):
+    return {"spending": 50000, "target": 100000}
+
+
+def _circle_bonus(state, payload, ctx):
+    return {"bonuses": []}
+
+
+def _famplan_info(state, payload, ctx):
+    return {
+        "member_info": {
+            "plan_type": "MOCK_FAMILY",
+            "parent_msisdn": "6281234567890",
+            "total_quota": 40 * 1024 ** 3,
+            "remaining_quota": 30 * 1024 ** 3,
+            "end_date": int(time.time()) + 30 * 86400,
+            "members": [
+                {
+                    "msisdn": "6281234567890" if slot == 1 else "",
+                    "alias": "Parent" if slot == 1 else "",
+                    "slot_id": slot,
+                    "family_member_id": f"mock-fm-{slot}",
+                    "member_type": "PARENT" if slot == 1 else "CHILD",
+                    "add_chances": 0,
+                    "total_add_chances": 2,
+                    "usage": {
+                        "quota_allocated": 10 * 1024 ** 3,
+                        "quota_used": 1024 ** 3 if slot == 1 else 0,
+                        "quota_expired_at": int(time.time()) + 30 * 86400,
+                    },
+                }
+                for slot in range(1, 4)
+            ],
+        }
+    }
+
+
+def _check_dukcapil(state, payload, ctx):
+    return {"family_plan_role": "NO_ROLE"}
+
+
+ROUTES = {
+    "api/v8/profile": _profile,
+    "api/v8/auth/login": _profile,
+    "api/v8/packages/balance-and-credit": _balance,
+    "gamification/api/v8/loyalties/tiering/info": _tiering,
+    "api/v8/xl-stores/options/list": _options_list,
+    "api/v8/xl-stores/families": _families,
+    "api/v8/xl-stores/options/search/family-list": _families,
+    "api/v8/xl-stores/options/detail": _options_detail,
+    "api/v8/xl-stores/options/addons-pinky-box": _addons,
+    "api/v8/packages/quota-details": _quota_details,
+    "payments/api/v8/payment-methods-option": _payment_methods,
+    "payments/api/v8/pending-detail": _pending_detail,
+    "payments/api/v8/pending-payment": _pending_payment,
+    "payments/api/v8/transaction-history": _transaction_history,
+    "api/v8/notification-non-grouping": _notifications,
+    "api/v8/configs/store/segments": _segments,
+    "api/v9/xl-stores/options/search": _store_search,
+    "api/v8/personalization/redeemables": _redeemables,
+    "family-hub/api/v8/groups/status": _circle_group,
+    "family-hub/api/v8/members/info": _circle_members,
+    "gamification/api/v8/family-hub/spending-tracker": _spending_tracker,
+    "gamification/api/v8/family-hub/bonus/list": _circle_bonus,
+    "sharings/api/v8/family-plan/member-info": _famplan_info,
+    "api/v8/auth/check-dukcapil": _check_dukcapil,
+    BOUNTY_PATH: _settlement,
+    LOYALTY_PATH: _settlement,
+    ALLOTMENT_PATH: _settlement,
+}
+ROUTES.update({path: _settlement for path in SETTLEMENT_PATHS})
+
+
+# ------------------------------------------------------------- x-signature
+
+def _item_codes(payload: dict) -> str:
+    return ";".join(item.get("item_code", "") for item in payload.get("items") or [])
+
+
+def check_signature(state: MockState, options: MockOptions, path: str, method: str, headers, payload: dict) -> str | None:
+    """None when the request is signed correctly, otherwise the reason."""
+    signature = headers.get("x-signature", "")
+    id_token = headers.get("authorization", "").removeprefix("Bearer ").strip()
+
+    if path in SETTLEMENT_PATHS:
+        token = payload.get("token_payment") or payload.get("verification_token") or ""
+        timestamp = state.payment_timestamp(token, options.token_ttl)
+        if timestamp is None:
+            return "Invalid or expired token payment"
+        access_token = payload.get("access_token") or state.access_tokens.get(id_token, "")
+        expected = [make_x_signature_payment(
+            access_token, timestamp, _item_codes(payload), token,
+            payload.get("payment_method", ""), payload.get("payment_for", ""), path,
+        )]
+    elif path == BOUNTY_PATH:
+        expected = [make_x_signature_bounty(
+            payload.get("access_token", ""), payload.get("timestamp", 0),
+            _item_codes(payload), payload.get("token_confirmation", ""),
+        )]
+    elif path == LOYALTY_PATH:
+        expected = [make_x_signature_loyalty(
+            payload.get("timestamp", 0), payload.get("item_code", ""),
+            payload.get("token_confirmation", ""), path,
+        )]
+    elif path == ALLOTMENT_PATH:
+        # Signed with the package detail timestamp, which is not in the body.
+        with state.lock:
+            timestamps = list(state.detail_timestamps)
+        expected = [
+            make_x_signature_bounty_allotment(
+                timestamp, payload.get("item_code", ""), payload.get("token_confirmation", ""),
+                path, payload.get("destination_msisdn", ""),
+            )
+            for timestamp in reversed(timestamps)
+        ]
+    else:
+        try:
+            sig_time_sec = int(headers.get("x-signature-time", ""))
+        except ValueError:
+            return "Missing x-signature-time"
+        expected = [make_x_signature(id_token, method, path, sig_time_sec)]
+
+    if signature not in expected:
+        return "Invalid signature"
+    return None
+
+
+# ------------------------------------------------------------------ server
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, delayed ACKs
+    # add ~40 ms to every reused connection.
+    disable_nagle_algorithm = True
+    server: "MockXLServer"
+
+    def setup(self):
+        super().setup()
+        if self.server.options.connect_ms:
+            time.sleep(self.server.options.connect_ms / 1000)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def _handle(self, method: str) -> None:
+        options, state = self.server.options, self.server.state
+        url = urlsplit(self.path)
+        path = url.path.lstrip("/")
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        with state.lock:
+            state.hits[path] += 1
+
+        delay_ms = options.path_latency_ms.get(path, options.latency_ms)
+        if options.jitter_ms:
+            delay_ms += state.jitter(options.jitter_ms)
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+
+        if state.roll(options.error_rate):
+            with state.lock:
+                status = state.rng.choice(options.error_statuses)
+                state.injected[f"HTTP {status}"] += 1
+            self._send_json(status, {"status": "FAILED", "code": str(status), "message": "Injected error"})
+            return
+
+        if path.startswith(("realms/", "ciam/")):
+            self._handle_ciam(path, parse_qs(url.query), raw)
+        else:
+            self._handle_api(method, path, raw)
+
+    def _handle_ciam(self, path: str, query: dict, raw: bytes) -> None:
+        state = self.server.state
+        if path.endswith("auth/otp"):
+            contact = query.get("contact", [""])[0]
+            self._send_json(200, {"subscriber_id": f"mock-subscriber-{contact}"})
+        elif path.endswith("auth/extend-session"):
+            self._send_json(200, {"data": {"exchange_code": uuid.uuid4().hex}})
+        elif path.endswith("openid-connect/token"):
+            form = {key: values[0] for key, values in parse_qs(raw.decode("utf-8", "replace")).items()}
+            grant_type = form.get("grant_type", "")
+            if grant_type == "refresh_token":
+                self._send_json(200, state.issue_tokens(form.get("refresh_token")))
+            elif grant_type == "password":
+                self._send_json(200, state.issue_tokens())
+            else:
+                self._send_json(400, {"error": "unsupported_grant_type"})
+        elif path.endswith("authorization-token/generate"):
+            self._send_json(200, {"status": "Success", "data": {"authorization_code": uuid.uuid4().hex}})
+        else:
+            self._send_json(404, {"error": "not_found", "path": path})
+
+    def _handle_api(self, method: str, path: str, raw: bytes) -> None:
+        options, state = self.server.options, self.server.state
+        try:
+            envelope = json.loads(raw)
+            payload = json.loads(decrypt_xdata(envelope["xdata"], int(envelope["xtime"])))
+        except (KeyError, TypeError, ValueError) as e:
+            self._reject(path, 400, f"Invalid xdata envelope: {e}")
+            return
+
+        if options.verify_signatures:
+            reason = check_signature(state, options, path, method, self.headers, payload)
+            if reason:
+                # Token problems come back like the real API: 200 and FAILED.
+                status = 200 if "token payment" in reason else 401
+                self._reject(path, status, reason)
+                return
+
+        if state.roll(options.garble_rate):
+            with state.lock:
+                state.injected["garbled"] += 1
+            self._send_json(200, {"xdata": "not-valid-xdata", "xtime": int(time.time() * 1000)})
+            return
+
+        if state.roll(options.fail_rate):
+            with state.lock:
+                state.injected["FAILED"] += 1
+            self._send_encrypted(200, {"code": "500", "status": "FAILED", "message": "Injected failure"})
+            return
+
+        handler = ROUTES.get(path)
+        data = handler(state, payload, {"path": path, "method": method}) if handler else {}
+        if path in SETTLEMENT_PATHS:
+            state.consume_payment_token(payload.get("token_payment") or payload.get("verification_token") or "")
+        self._send_encrypted(200, {"code": "000", "status": "SUCCESS", "data": data})
+
+    def _reject(self, path: str, status: int, message: str) -> None:
+        with self.server.state.lock:
+            self.server.state.rejected[path] += 1
+        if not self.server.options.quiet:
+            print(f"[mock] {path}: {message}")
+        self._send_encrypted(status, {"code": str(status), "status": "FAILED", "message": message})
+
+    def _send_encrypted(self, status: int, body: dict) -> None:
+        xtime = int(time.time() * 1000)
+        self._send_json(status, {"xdata": encrypt_xdata(json.dumps(body), xtime), "xtime": xtime})
+
+    def _send_json(self, status: int, body: dict) -> None:
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, format, *args):
+        if not self.server.options.quiet:
+            super().log_message(format, *args)
+
+
+class MockXLServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, options: MockOptions | None = None):
+        self.options = options or MockOptions()
+        self.state = MockState(self.options.seed)
+        self._thread: threading.Thread | None = None
+        super().__init__((host, port), MockHandler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockXLServer":
+        """Serve from a daemon thread, for use inside benchmarks."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def print_summary(self) -> None:
+        state = self.state
+        with state.lock:
+            rows = [
+                [path, str(count), str(state.rejected.get(path, 0))]
+                for path, count in state.hits.most_common()
+            ]
+            injected = dict(state.injected)
+        if not rows:
+            print("No requests served.")
+            return
+        print_table(["path", "requests", "rejected"], rows)
+        if injected:
+            print("Injected: " + ", ".join(f"{name} x{count}" for name, count in sorted(injected.items())))
+
+
+def _path_latency(value: str) -> tuple[str, float]:
+    path, sep, ms = value.rpartition("=")
+    if not sep or not path:
+        raise argparse.ArgumentTypeError("expected PATH=MS")
+    return path.lstrip("/"), float(ms)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in XL API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--connect-ms", type=float, default=0.0, help="Delay for every new connection")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay for every request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra random delay, 0..N ms")
+    parser.add_argument(
+        "--path-latency", type=_path_latency, action="append", default=[], metavar="PATH=MS",
+        help="Fixed delay for one path instead of --latency-ms (repeatable)",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with an HTTP error")
+    parser.add_argument(
+        "--error-status", type=int, action="append", default=None,
+        help="HTTP status for injected errors (repeatable, default 503)",
+    )
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of API calls answered with status FAILED")
+    parser.add_argument("--garble-rate", type=float, default=0.0, help="Share of API calls answered with broken xdata")
+    parser.add_argument("--token-ttl", type=float, default=300.0, help="Lifetime of a token_payment in seconds")
+    parser.add_argument("--no-verify", action="store_true", help="Skip x-signature checks")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for injected latency and errors")
+    parser.add_argument("--quiet", action="store_true", help="Do not log every request")
+    args = parser.parse_args()
+
+    options = MockOptions(
+        connect_ms=args.connect_ms,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        path_latency_ms=dict(args.path_latency),
+        error_rate=args.error_rate,
+        error_statuses=tuple(args.error_status or (503,)),
+        fail_rate=args.fail_rate,
+        garble_rate=args.garble_rate,
+        verify_signatures=not args.no_verify,
+        token_ttl=args.token_ttl,
+        seed=args.seed,
+        quiet=args.quiet,
+    )
+    server = MockXLServer(args.host, args.port, options)
+    print(f"Mock XL API listening on {server.url}")
+    print(f"  export BASE_API_URL={server.url} BASE_CIAM_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print()
+        server.print_summary()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Time `sentry analyze` over a synthetic week of 1 Hz sentry samples.
+
+Run from the repository root:
+
+    python -m bench.sentry_analyze
+"""
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from bench.common import ensure_env, print_table
+
+ensure_env()
+
+from app.service import sentry_analyze  # noqa: E402
+from app.service.sentry_store import ColumnarSentryStore  # noqa: E402
+
+SECONDS = 7 * 24 * 3600
+BENEFITS = 3
+NUMBER = 6281234567890
+
+
+def generate(directory: str) -> tuple[str, str]:
+    """Write the same week as a columnar store and as snapshot/delta JSONL."""
+    qcol_path = os.path.join(directory, "week.qcol")
+    jsonl_path = os.path.join(directory, "week.jsonl")
+    rng = random.Random(42)
+    start = int(time.time()) - SECONDS
+    remaining = [50 * 1024 ** 3] * BENEFITS
+
+    with ColumnarSentryStore(qcol_path, seal_interval=float("inf")) as store, \
+            open(jsonl_path, "w", encoding="utf-8") as jsonl:
+        benefits = [{"id": f"B{i}", "name": f"Kuota {i}", "data_type": "DATA"} for i in range(BENEFITS)]
+        key_ids = [store.key_id(NUMBER, "QUOTA", benefit) for benefit in benefits]
+        for second in range(SECONDS):
+            ts = start + second
+            for i in range(BENEFITS):
+                # Busier in the evening, some idle seconds, rare top-ups.
+                hour = (ts // 3600) % 24
+                if rng.random() < (0.9 if 18 <= hour <= 23 else 0.4):
+                    remaining[i] -= rng.randint(0, 200_000)
+                if remaining[i] < 0:
+                    remaining[i] = 50 * 1024 ** 3
+                store.append(ts * 1000, key_ids[i], remaining[i], 50 * 1024 ** 3)
+
+            quota = {
+                "quota_code": "QUOTA",
+                "benefits": [
+                    {**benefits[i], "remaining": remaining[i], "total": 50 * 1024 ** 3}
+                    for i in range(BENEFITS)
+                ],
+            }
+            record = {
+                "time": datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S"),
+                "number": NUMBER,
+                "type": "snapshot" if second == 0 else "delta",
+            }
+            if second == 0:
+                record["quotas"] = [quota]
+            else:
+                record.update({"added": [], "removed": [], "changed": [quota]})
+            jsonl.write(json.dumps(record) + "\n")
+    return qcol_path, jsonl_path
+
+
+def run(path: str, vectorized: bool) -> tuple[float, float]:
+    analyzer = sentry_analyze.SentryAnalyzer(vectorized=vectorized)
+    start = time.perf_counter()
+    analyzer.add_path(path)
+    analyzer.summaries()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    peak_analyzer = sentry_analyze.SentryAnalyzer(vectorized=vectorized)
+    peak_analyzer.add_path(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1_000_000
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Generating {SECONDS:,} s x {BENEFITS} benefits...")
+        qcol_path, jsonl_path = generate(directory)
+        sizes = {path: os.path.getsize(path) / 1_000_000 for path in (qcol_path, jsonl_path)}
+
+        cases = [("jsonl, streaming", jsonl_path, False), (".qcol, pure Python", qcol_path, False)]
+        if sentry_analyze.np is not None:
+            cases.append((".qcol, numpy", qcol_path, True))
+        else:
+            print("numpy not installed; skipping the vectorized case.")
+
+        rows = []
+        for label, path, vectorized in cases:
+            elapsed, peak = run(path, vectorized)
+            rows.append([label, f"{sizes[path]:.1f}", f"{elapsed:.2f}", f"{peak:.1f}"])
+
+    print(f"One week of 1 Hz samples, {SECONDS * BENEFITS:,} benefit readings")
+    print_table(["input", "file MB", "seconds", "peak MB"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""End-to-end settlement latency, one-off requests.post vs the pooled client.
+
+The local mock server (bench.mock_server) charges a fixed handshake cost on
+every new connection and a round trip on every request, so the numbers show
+what connection reuse saves against a remote API. Run
+from the repository root:
+
+    python -m bench.settlement
+"""
+import json
+import os
+import statistics
+import time
+
+from bench.common import ensure_env, print_table
+
+PORT = 18989
+ensure_env()
+os.environ["BASE_API_URL"] = f"http://127.0.0.1:{PORT}"
+
+import requests  # noqa: E402
+
+from app.client.encrypt import decrypt_xdata, encryptsign_xdata  # noqa: E402
+from app.client.purchase.settlement import build_settlement_headers, send_settlement  # noqa: E402
+from bench.mock_server import MockOptions, MockXLServer  # noqa: E402
+
+# Roughly a TCP + TLS handshake and one round trip to the real API.
+CONNECT_MS = 60
+ROUND_TRIP_MS = 25
+SETTLEMENTS = 30
+PATH = "payments/api/v8/settlement-multipayment"
+TOKENS = {"id_token": "bench-id-token", "access_token": "bench-access-token"}
+
+
+def settlement_payload(index: int) -> dict:
+    return {
+        "payment_method": "BALANCE",
+        "payment_for": "BUY_PACKAGE",
+        "token_payment": f"bench-token-{index}",
+        "timestamp": int(time.time()),
+        "total_amount": 25000,
+        "items": [{"item_code": f"bench-option-{index}", "item_price": 25000}],
+    }
+
+
+def old_settlement(index: int) -> dict:
+    # What the purchase modules did before: a fresh connection per settlement.
+    encrypted = encryptsign_xdata(
+        api_key="", method="POST", path=PATH, id_token=TOKENS["id_token"], payload=settlement_payload(index)
+    )
+    body = encrypted["encrypted_body"]
+    headers = build_settlement_headers(TOKENS["id_token"], int(body["xtime"]) // 1000, "bench-signature")
+    resp = requests.post(f"{os.environ['BASE_API_URL']}/{PATH}", headers=headers, data=json.dumps(body), timeout=30)
+    return decrypt_xdata("", json.loads(resp.text))
+
+
+def new_settlement(index: int) -> dict:
+    return send_settlement("", TOKENS, PATH, settlement_payload(index), "bench-signature")
+
+
+def measure(fn) -> list[float]:
+    samples = []
+    for index in range(SETTLEMENTS):
+        start = time.perf_counter()
+        res = fn(index)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert res["status"] == "SUCCESS", res
+    return samples
+
+
+def main() -> None:
+    # The bench sends placeholder signatures, so the server skips the check.
+    options = MockOptions(connect_ms=CONNECT_MS, latency_ms=ROUND_TRIP_MS, verify_signatures=False, quiet=True)
+    server = MockXLServer(port=PORT, options=options).start()
+    try:
+        rows = []
+        for name, fn in [("requests.post per call", old_settlement), ("send_settlement (pooled)", new_settlement)]:
+            samples = sorted(measure(fn))
+            rows.append([
+                name,
+                f"{samples[0]:.1f}",
+                f"{statistics.median(samples):.1f}",
+                f"{samples[int(len(samples) * 0.95) - 1]:.1f}",
+                f"{sum(samples):.0f}",
+            ])
+    finally:
+        server.stop()
+
+    print(
+        f"{SETTLEMENTS} sequential settlements against the mock server "
+        f"({CONNECT_MS} ms per new connection, {ROUND_TRIP_MS} ms per request), in ms"
+    )
+    print_table(["client", "min", "median", "p95", "total"], rows)
+
+
+if __name__ == "__main__":
+    main()
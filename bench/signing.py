@@ -0,0 +1,79 @@
+"""Per-call cost of x-signature signing, before vs after the cached signer.
+
+Run from the repository root:
+
+    python -m bench.signing
+"""
+import hashlib
+import hmac
+import os
+import secrets
+import time
+
+from bench.common import ensure_env, per_call_us, print_table
+
+ensure_env()
+
+from app.service import crypto_helper  # noqa: E402
+
+# Real id_tokens are RS256 JWTs of roughly this length.
+ID_TOKEN = secrets.token_urlsafe(900)
+PATH = "api/v8/xl-stores/options/detail"
+BATCH_SIZE = 1000
+
+
+# Verbatim copies of the previous implementations, kept as the baseline.
+def baseline_make_x_signature(id_token, method, path, sig_time_sec):
+    key_str = f"{os.environ['X_API_BASE_SECRET']};{id_token};{method};{path};{sig_time_sec}"
+    key_bytes = key_str.encode("utf-8")
+    msg = f"{id_token};{sig_time_sec};".encode("utf-8")
+    return hmac.new(key_bytes, msg, hashlib.sha512).hexdigest()
+
+
+def baseline_make_x_signature_payment(
+    access_token, sig_time_sec, package_code, token_payment, payment_method, payment_for, path
+):
+    key_str = f"{os.environ['X_API_BASE_SECRET']};{sig_time_sec}#ae-hei_9Tee6he+Ik3Gais5=;POST;{path};{sig_time_sec}"
+    key_bytes = key_str.encode("utf-8")
+    msg = f"{access_token};{token_payment};{sig_time_sec};{payment_for};{payment_method};{package_code};".encode("utf-8")
+    return hmac.new(key_bytes, msg, hashlib.sha512).hexdigest()
+
+
+def main() -> None:
+    now = int(time.time())
+    pairs = [(PATH, now + i) for i in range(BATCH_SIZE)]
+    short_token = "eyJhbGciOi.short"
+
+    for token in (ID_TOKEN, short_token):
+        for path, ts in pairs[:50]:
+            assert crypto_helper.make_x_signature(token, "POST", path, ts) == baseline_make_x_signature(token, "POST", path, ts)
+    payment_args = ("access", now, "PKG", "tok-pay", "BALANCE", "BUY_PACKAGE", "payments/api/v8/settlement-multipayment")
+    assert crypto_helper.make_x_signature_payment(*payment_args) == baseline_make_x_signature_payment(*payment_args)
+
+    rows = [
+        [
+            f"x-signature (token {len(ID_TOKEN)} chars)",
+            per_call_us(lambda: baseline_make_x_signature(ID_TOKEN, "POST", PATH, now)),
+            per_call_us(lambda: crypto_helper.make_x_signature(ID_TOKEN, "POST", PATH, now)),
+        ],
+        [
+            f"x-signature batch of {BATCH_SIZE}, per item",
+            per_call_us(lambda: [baseline_make_x_signature(ID_TOKEN, "POST", p, t) for p, t in pairs]) / BATCH_SIZE,
+            per_call_us(lambda: crypto_helper.make_x_signature_batch(ID_TOKEN, "POST", pairs)) / BATCH_SIZE,
+        ],
+        [
+            "x-signature-payment",
+            per_call_us(lambda: baseline_make_x_signature_payment(*payment_args)),
+            per_call_us(lambda: crypto_helper.make_x_signature_payment(*payment_args)),
+        ],
+    ]
+
+    print("Signing cost, microseconds per signature (best of 5)")
+    print_table(
+        ["case", "before", "after", "speedup"],
+        [[name, f"{before:.2f}", f"{after:.2f}", f"{before / after:.2f}x"] for name, before, after in rows],
+    )
+
+
+if __name__ == "__main__":
+    main()
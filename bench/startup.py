@@ -0,0 +1,120 @@
+"""Wall-clock startup time of main.py per subcommand.
+
+Each case runs main.py in a fresh interpreter, logged in to the mock server
+(bench.mock_server) under a throwaway HOME, with stdin closed. A subcommand
+runs its real entry path: imports, token store, session bootstrap and the
+first requests, until it finishes or stops at its first prompt. The
+``--help`` row is the import floor of main.py itself. Run from the
+repository root:
+
+    python -m bench.startup
+    python -m bench.startup --importtime packages   # slowest imports of one case
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench.common import DUMMY_ENV, print_table
+
+CASES = {
+    "--help": ["--help"],
+    "login": ["login"],
+    "packages": ["packages"],
+    "history": ["history"],
+    "notifications": ["notifications"],
+    "sentry analyze": ["sentry", "analyze"],
+    "stats": ["stats"],
+}
+RUNS = 7
+CASE_TIMEOUT = 60
+MOCK_NUMBER = "6281234567890"
+
+LOGIN_SCRIPT = f"""
+from app.client.ciam import submit_otp
+from app.service.auth import AuthInstance
+tokens = submit_otp("bench", "SMS", "{MOCK_NUMBER}", "123456")
+AuthInstance.add_refresh_token({MOCK_NUMBER}, tokens["refresh_token"])
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _run(argv: list[str], env: dict, stderr=subprocess.DEVNULL) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *argv],
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=stderr,
+        timeout=CASE_TIMEOUT,
+        check=False,
+    )
+
+
+def time_case(args: list[str], env: dict) -> float:
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        _run(["main.py", *args], env)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def top_imports(args: list[str], env: dict, limit: int = 15) -> list[list[str]]:
+    """Slowest imports (cumulative) of one case, from ``python -X importtime``."""
+    result = _run(["-X", "importtime", "main.py", *args], env, stderr=subprocess.PIPE)
+    rows = []
+    for line in result.stderr.decode(errors="replace").splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line.removeprefix("import time:").split("|", 2)
+        # Indentation marks nesting; only top-level imports add up to the total.
+        if name.startswith("  ") and not name.startswith("   "):
+            rows.append((int(cumulative_us), name.strip()))
+    rows.sort(reverse=True)
+    return [[name, f"{us / 1000:.1f}"] for us, name in rows[:limit]]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--importtime", metavar="CASE", choices=CASES, help="Show the slowest imports of one case")
+    args = parser.parse_args()
+
+    # Imported here so ensure_env() in bench.mock_server only touches this process.
+    from bench.mock_server import MockOptions, MockXLServer
+
+    server = MockXLServer(port=_free_port(), options=MockOptions(quiet=True)).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with tempfile.TemporaryDirectory() as home:
+            env = {**os.environ, **DUMMY_ENV, "HOME": home, "BASE_API_URL": base_url, "BASE_CIAM_URL": base_url}
+            _run(["-c", LOGIN_SCRIPT], env)
+
+            if args.importtime:
+                print(f"main.py {' '.join(CASES[args.importtime])}: slowest top-level imports")
+                print_table(["module", "ms"], top_imports(CASES[args.importtime], env))
+                return
+
+            start = time.perf_counter()
+            _run(["-c", "pass"], env)
+            interpreter = (time.perf_counter() - start) * 1000
+            rows = [[label, f"{time_case(argv, env):.0f}"] for label, argv in CASES.items()]
+    finally:
+        server.stop()
+
+    print(f"main.py startup against the mock server, median of {RUNS} runs in ms "
+          f"(bare interpreter: {interpreter:.0f} ms)")
+    print_table(["command", "ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
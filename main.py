@@ -1,35 +1,16 @@
 from dotenv import load_dotenv
 
-from app.service.git import check_for_updates
 load_dotenv()
 
 import argparse
 import sys, json
 from datetime import datetime
 from app.menus.util import clear_screen, pause, render_header, format_price, style_text
-from app.client.engsel import (
-    get_balance,
-    get_tiering_info,
-)
-from app.client.famplan import validate_msisdn
-from app.menus.payment import show_transaction_history, show_pending_transactions
-from app.service.auth import AuthInstance
-from app.menus.bookmark import show_bookmark_menu
-from app.menus.account import show_account_menu
-from app.menus.package import fetch_my_packages, get_packages_by_family, show_package_details
-from app.menus.hot import show_hot_menu, show_hot_menu2
-from app.service.sentry import enter_sentry_mode
-from app.menus.purchase import purchase_by_family
-from app.menus.famplan import show_family_info
-from app.menus.circle import show_circle_info
-from app.menus.notification import show_notification_menu
-from app.menus.config import show_config_menu
-from app.menus.store.segments import show_store_segments_menu
-from app.menus.store.search import show_family_list_menu, show_store_packages_menu
-from app.menus.store.redemables import show_redeemables_menu
-from app.client.registration import dukcapil
 from app.service.config import apply_config, load_config, prompt_bool, prompt_int
 
+# Menu and client modules are imported inside the functions that use them, so
+# `--help` and single subcommands only load (and bootstrap) what they need.
+
 
 def show_main_menu(profile, width: int):
     clear_screen()
@@ -74,6 +55,9 @@ def show_main_menu(profile, width: int):
 show_menu = True
 
 def ensure_active_user():
+    from app.menus.account import show_account_menu
+    from app.service.auth import AuthInstance
+
     active_user = AuthInstance.get_active_user()
     if active_user is None:
         selected_user_number = show_account_menu()
@@ -85,6 +69,10 @@ def ensure_active_user():
     return active_user
 
 def run_login_command(args):
+    from app.client.famplan import validate_msisdn
+    from app.menus.account import show_account_menu
+    from app.service.auth import AuthInstance
+
     selected_user_number = show_account_menu()
     if selected_user_number:
         AuthInstance.set_active_user(selected_user_number)
@@ -105,6 +93,9 @@ def run_login_command(args):
         pause()
 
 def run_packages_command(args):
+    from app.menus.package import fetch_my_packages, get_packages_by_family, show_package_details
+    from app.service.auth import AuthInstance
+
     active_user = ensure_active_user()
     if not active_user:
         return
@@ -124,6 +115,14 @@ def run_packages_command(args):
     fetch_my_packages()
 
 def run_purchase_command(args):
+    from app.menus.package import show_package_details
+    from app.menus.purchase import purchase_by_family
+    from app.service.auth import AuthInstance
+
+    if args.hot is not None and args.accounts is None:
+        print("--hot hanya bisa dipakai bersama --accounts.")
+        return
+
     active_user = ensure_active_user()
     if not active_user:
         return
@@ -139,6 +138,38 @@ def run_purchase_command(args):
         )
         return
 
+    if args.accounts:
+        from app.menus.purchase import purchase_for_accounts
+
+        if args.accounts == "all":
+            numbers = [rt["number"] for rt in AuthInstance.refresh_tokens]
+        else:
+            numbers = args.accounts
+        hot_indexes = None if args.hot == "all" else args.hot
+        if not args.family_code and args.hot is None:
+            print("Gunakan --family-code atau --hot bersama --accounts.")
+            return
+        purchase_for_accounts(
+            numbers,
+            family_code=args.family_code,
+            hot_indexes=hot_indexes,
+            start_from_option=args.start_from_option or 1,
+            delay_seconds=args.delay_seconds if args.delay_seconds is not None else config["purchase_delay_seconds"],
+            parallel_accounts=args.parallel_accounts,
+            account_interval=args.account_interval,
+        )
+        return
+
+    if args.resume:
+        purchase_by_family(
+            args.family_code or "",
+            False,
+            bool(args.pause_on_success),
+            args.delay_seconds if args.delay_seconds is not None else config["purchase_delay_seconds"],
+            resume=True,
+        )
+        return
+
     if not args.family_code:
         family_code = input("Enter family code (or '99' to cancel): ")
         if family_code == "99":
@@ -181,19 +212,50 @@ def run_purchase_command(args):
     )
 
 def run_history_command(args):
+    from app.menus.payment import show_transaction_history
+    from app.service.auth import AuthInstance
+
     active_user = ensure_active_user()
     if not active_user:
         return
     show_transaction_history(AuthInstance.api_key, active_user["tokens"])
 
 def run_notifications_command(args):
+    from app.menus.notification import show_notification_menu
+
     active_user = ensure_active_user()
     if not active_user:
         return
     show_notification_menu()
 
 def run_sentry_command(args):
-    enter_sentry_mode()
+    if args.sentry_command == "analyze":
+        from app.service.sentry_analyze import analyze_sentry_logs
+
+        analyze_sentry_logs(args.paths, args.window_minutes, args.json)
+        return
+
+    from app.service.sentry import enter_sentry_mode
+
+    enter_sentry_mode(args.all_accounts)
+
+def run_stats_command(args):
+    from app.service.metrics_report import show_stats
+
+    show_stats(args.json, args.prometheus, args.reset)
+
+def number_list(value: str) -> list[int] | str:
+    """'all' or comma-separated numbers, for --accounts and --hot."""
+    if value.strip().lower() == "all":
+        return "all"
+    try:
+        numbers = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        numbers = []
+    if not numbers:
+        raise argparse.ArgumentTypeError(f"harus 'all' atau nomor dipisah koma, bukan {value!r}")
+    return numbers
+
 
 def build_parser():
     parser = argparse.ArgumentParser(description="MyXL CLI")
@@ -248,6 +310,33 @@ def build_parser():
         default=None,
         help="Mulai pembelian dari nomor option",
     )
+    purchase_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Lanjutkan pembelian family terakhir dari jurnal (opsi gagal/terputus dicoba ulang)",
+    )
+    purchase_parser.add_argument(
+        "--accounts",
+        type=number_list,
+        help="Beli untuk beberapa akun sekaligus: nomor dipisah koma, atau 'all'",
+    )
+    purchase_parser.add_argument(
+        "--hot",
+        type=number_list,
+        help="Dengan --accounts: beli paket hot list (nomor dipisah koma, atau 'all')",
+    )
+    purchase_parser.add_argument(
+        "--parallel-accounts",
+        type=int,
+        default=None,
+        help="Jumlah akun yang diproses paralel (default: request paralel maksimal)",
+    )
+    purchase_parser.add_argument(
+        "--account-interval",
+        type=float,
+        default=None,
+        help="Jeda minimal antar settlement per akun (detik, default 2)",
+    )
     purchase_parser.set_defaults(func=run_purchase_command)
 
     history_parser = subparsers.add_parser("history", help="Riwayat transaksi")
@@ -257,7 +346,40 @@ def build_parser():
     notifications_parser.set_defaults(func=run_notifications_command)
 
     sentry_parser = subparsers.add_parser("sentry", help="Masuk ke Sentry Mode")
+    sentry_parser.add_argument(
+        "--all-accounts",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Pantau semua akun tersimpan sekaligus",
+    )
     sentry_parser.set_defaults(func=run_sentry_command)
+    sentry_subparsers = sentry_parser.add_subparsers(dest="sentry_command")
+    analyze_parser = sentry_subparsers.add_parser(
+        "analyze",
+        help="Analisis log sentry: laju pemakaian, jam puncak, perkiraan habis",
+    )
+    analyze_parser.add_argument(
+        "paths",
+        nargs="*",
+        help="File log (.jsonl/.qcol); default semua log di folder sentry",
+    )
+    analyze_parser.add_argument(
+        "--window-minutes",
+        type=int,
+        default=60,
+        help="Lebar jendela untuk mencari pemakaian puncak (menit)",
+    )
+    analyze_parser.add_argument("--json", action="store_true", help="Cetak hasil sebagai JSON")
+
+    stats_parser = subparsers.add_parser("stats", help="Statistik panggilan API per endpoint")
+    stats_parser.add_argument("--json", action="store_true", help="Cetak hasil sebagai JSON")
+    stats_parser.add_argument(
+        "--prometheus",
+        metavar="PATH",
+        help="Tulis metrik ke file textfile Prometheus (node exporter) lalu keluar",
+    )
+    stats_parser.add_argument("--reset", action="store_true", help="Hapus semua metrik tersimpan")
+    stats_parser.set_defaults(func=run_stats_command)
 
     return parser
 
@@ -270,8 +392,31 @@ def run_cli():
     return True
 
 def main():
+    from app.client.engsel import get_balance, get_tiering_info
+    from app.client.famplan import validate_msisdn
+    from app.client.registration import dukcapil
+    from app.menus.account import show_account_menu
+    from app.menus.bookmark import show_bookmark_menu
+    from app.menus.circle import show_circle_info
+    from app.menus.config import show_config_menu
+    from app.menus.famplan import show_family_info
+    from app.menus.hot import show_hot_menu, show_hot_menu2
+    from app.menus.notification import show_notification_menu
+    from app.menus.package import fetch_my_packages, get_packages_by_family, show_package_details
+    from app.menus.payment import show_transaction_history, show_pending_transactions
+    from app.menus.purchase import purchase_by_family
+    from app.menus.store.redemables import show_redeemables_menu
+    from app.menus.store.search import show_family_list_menu, show_store_packages_menu
+    from app.menus.store.segments import show_store_segments_menu
+    from app.service.auth import AuthInstance
+    from app.service.git import pop_update_notice
+    from app.service.sentry import enter_sentry_mode
+
     config = load_config()
     apply_config(config)
+    AuthInstance.start_token_refresher()
+    if config.get("warm_sessions"):
+        AuthInstance.start_session_warmup()
     
     while True:
         active_user = AuthInstance.get_active_user()
@@ -300,6 +445,9 @@ def main():
             }
 
             show_main_menu(profile, config["table_width"])
+            update_notice = pop_update_notice()
+            if update_notice:
+                print(update_notice)
 
             choice = input("Pilih menu: ")
             # Testing shortcuts
@@ -439,13 +587,14 @@ if __name__ == "__main__":
     try:
         config = load_config()
         apply_config(config)
-        print("Checking for updates...")
-        need_update = check_for_updates()
-        if need_update:
-            pause()
 
         handled = run_cli()
         if not handled:
+            # Only the interactive menu checks for updates, in the background;
+            # the notice shows under the menu once the result is in.
+            from app.service.git import start_update_check
+
+            start_update_check()
             main()
     except KeyboardInterrupt:
         print("\nExiting the application.")